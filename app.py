@@ -1,11 +1,27 @@
+import json
 import streamlit as st
 from dotenv import load_dotenv
 from src.system_control import SystemControl
+from src.tracing import tracer
+
+
+def hardware_action_message(intent, entities):
+    """意圖對應的硬體動作提示，非硬體意圖回傳 None"""
+    if intent == 'wave':
+        return "機器人揮手👋"
+    if intent == 'lower-arm':
+        return "機器人放下手臂🙇"
+    if intent == 'raise-arm':
+        return "機器人舉起手臂🙋‍♂️"
+    if intent == 'shine':
+        color = next((e['value'] for e in entities if e['entity'] == 'color'), 'white')
+        return f"機器人發光: {color}✨"
+    return None
 
 
 def process_message(user_input):
-    """處理使用者訊息並執行相應動作"""
-    if not st.session_state.assistant:
+    """處理使用者訊息：交給對話管線，拿到回覆就顯示，語音與動作在背景進行"""
+    if not st.session_state.get('tjbot'):
         st.error("服務尚未初始化！")
         return
     
@@ -13,54 +29,116 @@ def process_message(user_input):
         st.warning("請輸入有效訊息")
         return
     
-    # 發送到 Watson Assistant
-    response = st.session_state.assistant.send_message(user_input)
-    
-    if response:
-        # 處理回應
-        intents = response.get('output', {}).get('intents', [])
-        entities = response.get('output', {}).get('entities', [])
-        response_texts = response.get('output', {}).get('generic', [])
-        
-        # 像原始代碼一樣逐條處理回應文字
-        for text in response_texts:
-            if text['response_type'] == 'text':
-                bot_reply = text['text']
-                
-                # 保存對話歷史 - 機器人回應
-                st.session_state.chat_history.append(("assistant", bot_reply))
-
-                # 顯示於chat介面
-                st.chat_message("assistant").write(bot_reply)
-                
-                # 語音輸出 - 直接在TJBot上播放
-                if st.session_state.tts:
-                    st.session_state.tts.speak(bot_reply)
+    # 送入管線：快速路徑動作立即執行，Assistant 回覆後平行播放語音與執行動作
+    try:
+        # 從 UI 送出到顯示回覆的時間（服務模式包含 HTTP 來回）
+        with tracer.span('ui.message'):
+            result = st.session_state.tjbot.message(user_input)
+    except Exception as e:
+        st.error(f"無法獲取 Watson 回應: {e}")
+        return None
 
-        
-        # 執行硬體動作
-        if intents and len(intents) > 0:
-            top_intent = intents[0]['intent']
-            if top_intent == 'wave':
-                st.session_state.hardware.wave()
-                st.info("機器人揮手👋")
-            elif top_intent == 'lower-arm':
-                st.session_state.hardware.lower_arm()
-                st.info("機器人放下手臂🙇")
-            elif top_intent == 'raise-arm':
-                st.session_state.hardware.raise_arm()
-                st.info("機器人舉起手臂🙋‍♂️")
-            elif top_intent == 'shine':
-                # 從 entities 提取顏色
-                color = next((e['value'] for e in entities if e['entity'] == 'color'), 'white')
-                st.session_state.hardware.shine(color)
-                st.info(f"機器人發光: {color}✨")
-
-        return "處理完成"
-    else:
+    if not result['replies'] and not result['intents']:
         st.error("無法獲取 Watson 回應")
         return None
 
+    # 像原始代碼一樣逐條處理回應文字
+    for bot_reply in result['replies']:
+        # 保存對話歷史 - 機器人回應
+        st.session_state.chat_history.append(("assistant", bot_reply))
+
+        # 顯示於chat介面
+        st.chat_message("assistant").write(bot_reply)
+
+    # 顯示硬體動作
+    intent = result['intent']
+    message = hardware_action_message(intent, result['entities']) if intent else None
+    if message:
+        st.info(message)
+
+    return "處理完成"
+
+
+def sync_voice_turns():
+    """把喚醒詞、語音插話觸發的回合補進對話歷史（這些回合不經過 process_message）"""
+    tjbot = st.session_state.get('tjbot')
+    if not tjbot:
+        return
+    try:
+        turns = tjbot.status().get('voice_turns', [])
+    except Exception as e:
+        print(f"無法取得語音對話紀錄: {e}")
+        return
+    last = st.session_state.get('last_voice_turn', 0)
+    for result in turns:
+        if result['id'] <= last:
+            continue
+        st.session_state.chat_history.append(("user", result['text']))
+        for bot_reply in result['replies']:
+            st.session_state.chat_history.append(("assistant", bot_reply))
+        st.session_state.last_voice_turn = result['id']
+
+
+def change_color():
+    """只在選擇的顏色改變時才送出，重新整理頁面不會重複發光"""
+    if st.session_state.get('tjbot'):
+        st.session_state.tjbot.shine(st.session_state.led_color)
+
+
+def change_tracing():
+    """開關延遲追蹤（本機 UI 與 TJBot 執行環境一起）"""
+    enabled = st.session_state.tracing_enabled
+    tracer.configure(enabled=enabled)
+    if st.session_state.get('tjbot'):
+        st.session_state.tjbot.set_tracing(enabled)
+
+
+def change_wake_word():
+    """開關常駐聆聽（說喚醒詞開始語音輸入）"""
+    tjbot = st.session_state.get('tjbot')
+    if not tjbot:
+        st.session_state.wake_word_enabled = False
+        return
+    if st.session_state.wake_word_enabled and not tjbot.set_wake_word(True):
+        st.session_state.wake_word_enabled = False
+        st.session_state.wake_word_error = "無法啟動常駐聆聽（請確認麥克風與喚醒詞樣板）"
+    elif not st.session_state.wake_word_enabled:
+        tjbot.set_wake_word(False)
+
+
+def diagnostics_panel():
+    """各階段延遲的 p50/p95/p99 與 Chrome trace 下載"""
+    tjbot = st.session_state.get('tjbot')
+    with st.expander("🩺 診斷"):
+        if not tjbot:
+            st.caption("請先初始化系統")
+            return
+        try:
+            status = tjbot.status()
+            stats = tjbot.trace_stats()
+        except Exception as e:
+            st.error(f"無法取得診斷資料: {e}")
+            return
+
+        st.checkbox("延遲追蹤", value=status.get('tracing', False), key='tracing_enabled', on_change=change_tracing)
+        # 服務模式下 UI 的紀錄在本行程，其餘在服務行程
+        stats.update({name: row for name, row in tracer.stats().items() if name.startswith('ui.')})
+        if stats:
+            st.dataframe([
+                {'階段': name, '次數': row['count'], 'p50 ms': round(row['p50'], 1),
+                 'p95 ms': round(row['p95'], 1), 'p99 ms': round(row['p99'], 1)}
+                for name, row in sorted(stats.items())
+            ], use_container_width=True, hide_index=True)
+            st.download_button("下載 Chrome trace", json.dumps(tjbot.trace_events()),
+                               file_name='tjbot_trace.json', mime='application/json')
+        else:
+            st.caption("尚無追蹤資料")
+
+
+def perform_gesture(name):
+    if st.session_state.get('tjbot'):
+        st.session_state.tjbot.gesture(name)
+
 
 
 def main():
@@ -69,14 +147,8 @@ def main():
     # Initial Session State
     if 'chat_history' not in st.session_state:
         st.session_state.chat_history = []
-    if 'assistant' not in st.session_state:
-        st.session_state.assistant = None
-    if 'tts' not in st.session_state:
-        st.session_state.tts = None
-    if 'stt' not in st.session_state:
-        st.session_state.stt = None
-    if 'hardware' not in st.session_state:
-        st.session_state.hardware = None
+    if 'tjbot' not in st.session_state:
+        st.session_state.tjbot = None  # TJBotRuntime（本機）或 TJBotClient（常駐服務）
 
     # 網頁標題配置
     st.set_page_config(
@@ -95,6 +167,11 @@ def main():
                 with st.spinner("正在初始化系統..."):
                     if SystemControl.initialize_system():
                         st.success("系統已初始化")
+                        # 各元件的啟動時間
+                        startup = st.session_state.tjbot.status().get('startup') or {}
+                        if startup:
+                            st.caption(" / ".join(f"{name} {seconds * 1000:.0f} ms"
+                                                  for name, seconds in startup.items()))
                     else:
                         st.error("系統初始化失敗")
 
@@ -107,32 +184,25 @@ def main():
                         
         # 燈光控制
         colors = ["off", "red", "green", "blue", "white", "yellow", "purple", "orange"]
-        color = st.selectbox("選擇燈光顏色", colors)
-        if color:
-            if st.session_state.hardware:
-                st.session_state.hardware.shine(color)       
+        st.selectbox("選擇燈光顏色", colors, key='led_color', on_change=change_color)
 
         # 動作控制
         col1, col2 = st.columns(2)
 
         with col1:
             if st.button("👋 揮手"):
-                if st.session_state.hardware:
-                    st.session_state.hardware.wave()
+                perform_gesture('wave')
             
             if st.button("🙋‍♂️ 舉手"):
-                if st.session_state.hardware:
-                    st.session_state.hardware.raise_arm()
+                perform_gesture('raise_arm')
 
         with col2:
             if st.button("🙇 放下手"):
-                if st.session_state.hardware:
-                    st.session_state.hardware.lower_arm()
+                perform_gesture('lower_arm')
                     
 
             if st.button("🕺 跳舞"):
-                if st.session_state.hardware:
-                    st.session_state.hardware.dance()
+                perform_gesture('dance')
 
         # 語音輸入按鈕
         st.header("聊天控制")
@@ -146,9 +216,9 @@ def main():
         if st.session_state.is_recording:
             if st.button("🔴 停止錄音", use_container_width=True, type="secondary"):
                 st.session_state.is_recording = False
-                if st.session_state.stt:
+                if st.session_state.tjbot:
                     with st.spinner("正在處理語音..."):
-                        user_input = st.session_state.stt.listen()
+                        user_input = st.session_state.tjbot.listen()
                         if user_input and user_input.strip():
                             # 保存到對話歷史
                             st.session_state.chat_history.append(("user", user_input))
@@ -162,9 +232,9 @@ def main():
                     st.error("語音系統未初始化")
         else:
             if st.button("🎤 開始語音輸入", use_container_width=True, type="primary"):
-                if st.session_state.stt:
+                if st.session_state.tjbot:
                     st.session_state.is_recording = True
-                    if st.session_state.stt.start_microphone():
+                    if st.session_state.tjbot.start_microphone():
                         st.info("🎤 正在錄音，請說話... (5秒後自動結束)")
                         st.experimental_rerun()
                     else:
@@ -177,14 +247,23 @@ def main():
         if st.session_state.is_recording:
             st.info("🔴 錄音中...")
 
+        # 常駐聆聽：說 "TJBot" 之後的話直接交給 TJBot 回應，不必按按鈕
+        st.checkbox("👂 常駐聆聽（喚醒詞）", key='wake_word_enabled', on_change=change_wake_word)
+        error = st.session_state.pop('wake_word_error', None)
+        if error:
+            st.error(error)
+
         # 清除對話按鈕
         if st.button("清除對話", use_container_width=True):
             st.session_state.chat_history = []
             st.experimental_rerun()
 
+        diagnostics_panel()
+
 
     # 主要區域 - 聊天介面
     st.header("聊天&對話")
+    sync_voice_turns()
         
     # 顯示聊天歷史
     for role, message in st.session_state.chat_history:
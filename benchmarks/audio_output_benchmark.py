@@ -0,0 +1,88 @@
+"""比較 aplay 子程序與常駐 OutputStream 的啟動與每段話播放延遲
+
+需要在有音效卡的 TJBot 上執行: python -m benchmarks.audio_output_benchmark
+"""
+import statistics
+import subprocess
+import time
+import numpy as np
+
+from src import audio_output
+from src.audio_output import AplayOutput, AudioOutput, find_output_device
+
+SAMPLE_RATE = 22050  # Watson TTS 預設的 WAV 採樣率
+UTTERANCES = 10
+
+
+def time_call(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+
+def detect_aplay_uncached():
+    """原本 TextToSpeech._detect_audio_device 的流程：aplay -l 並逐一試播"""
+    result = subprocess.run(['aplay', '-l'], capture_output=True, text=True)
+    for line in result.stdout.split('\n'):
+        if line.startswith('card') and 'device' in line:
+            parts = line.split()
+            card_num = parts[1].rstrip(':')
+            device_num = parts[parts.index('device') + 1].rstrip(':')
+            device_id = f"plughw:{card_num},{device_num}"
+            probe = subprocess.run(['aplay', '-D', device_id, '/dev/null'], capture_output=True, timeout=2)
+            if probe.returncode == 0:
+                return device_id
+    return "plughw:2,0"
+
+
+def per_utterance_latency(output, pcm):
+    """每段話扣除音訊本身長度後的額外時間（程序啟動、開啟設備等）"""
+    timings = []
+    for _ in range(UTTERANCES):
+        start = time.perf_counter()
+        output.play(pcm, SAMPLE_RATE)
+        output.finish()
+        timings.append(time.perf_counter() - start - len(pcm) / SAMPLE_RATE)
+    return timings
+
+
+def report(name, timings):
+    print(f"{name:<28}{statistics.median(timings) * 1000:>10.1f}{max(timings) * 1000:>10.1f}")
+
+
+def main():
+    pcm = (np.sin(2 * np.pi * 440 * np.arange(SAMPLE_RATE // 4) / SAMPLE_RATE) * 3000).astype(np.int16)
+
+    print("== 啟動 (裝置偵測) ==")
+    try:
+        elapsed, device_id = time_call(detect_aplay_uncached)
+        print(f"aplay -l + 逐一試播: {elapsed * 1000:.1f} ms -> {device_id}")
+    except FileNotFoundError:
+        device_id = None
+        print("找不到 aplay，略過")
+
+    try:
+        elapsed, _ = time_call(find_output_device)
+        print(f"sounddevice 查詢 (首次): {elapsed * 1000:.1f} ms")
+        elapsed, _ = time_call(find_output_device)
+        print(f"sounddevice 查詢 (快取): {elapsed * 1000:.1f} ms")
+        elapsed, _ = time_call(audio_output.load_cached_device, 'aplay_device')
+        print(f"讀取 aplay 設備快取: {elapsed * 1000:.3f} ms")
+    except OSError as e:
+        print(f"無法使用 sounddevice: {e}")
+        return
+
+    print(f"\n== 每段話額外延遲 ({UTTERANCES} 次, 0.25 秒音訊) ==")
+    print(f"{'輸出':<28}{'中位數 ms':>10}{'最大 ms':>10}")
+    if device_id:
+        report("aplay 子程序", per_utterance_latency(AplayOutput(device_id), pcm))
+
+    output = AudioOutput(find_output_device())
+    open_time, _ = time_call(output._ensure_stream, SAMPLE_RATE, 1)
+    print(f"{'OutputStream 開啟 (一次)':<28}{open_time * 1000:>10.1f}")
+    report("常駐 OutputStream", per_utterance_latency(output, pcm))
+    output.close()
+
+
+if __name__ == "__main__":
+    main()
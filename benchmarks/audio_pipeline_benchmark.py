@@ -0,0 +1,92 @@
+"""比較以暫存 WAV 檔與記憶體緩衝區處理音訊的延遲與記憶體配置
+
+執行方式: python -m benchmarks.audio_pipeline_benchmark
+"""
+import os
+import shutil
+import statistics
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+import scipy.io.wavfile as wavfile
+
+from src.audio_utils import decode_wav, encode_wav
+
+SAMPLE_RATE = 44100
+DURATION = 5  # 秒
+ROUNDS = 30
+
+
+def capture_to_file(recording, workdir):
+    """原本的做法：寫入 temp_recording.wav 再讀回來上傳"""
+    filename = os.path.join(workdir, "temp_recording.wav")
+    wavfile.write(filename, SAMPLE_RATE, recording)
+    os.path.getsize(filename)
+    with open(filename, 'rb') as audio_file:
+        payload = audio_file.read()
+    os.remove(filename)
+    return payload
+
+
+def capture_in_memory(recording, workdir):
+    """新的做法：直接在記憶體中編碼"""
+    return encode_wav(recording, SAMPLE_RATE)
+
+
+def playback_from_file(audio, workdir):
+    """原本的做法：寫入 response.wav，再由播放程式讀檔"""
+    filename = os.path.join(workdir, "response.wav")
+    with open(filename, 'wb') as audio_file:
+        audio_file.write(audio)
+    with open(filename, 'rb') as audio_file:
+        data = audio_file.read()
+    return decode_wav(data)
+
+
+def playback_from_memory(audio, workdir):
+    """新的做法：直接解析記憶體中的 WAV（零複製）"""
+    return decode_wav(audio)
+
+
+def measure(func, arg, workdir):
+    timings = []
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        func(arg, workdir)
+        timings.append(time.perf_counter() - start)
+
+    # 量測單次處理過程中配置的峰值記憶體
+    tracemalloc.start()
+    func(arg, workdir)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return statistics.median(timings), peak
+
+
+def main():
+    rng = np.random.default_rng(0)
+    recording = (rng.standard_normal(SAMPLE_RATE * DURATION) * 3000).astype(np.int16)
+    response_wav = encode_wav(recording, SAMPLE_RATE)
+
+    # 預設在目前目錄下測量，才能反映 SD 卡的寫入成本
+    workdir = tempfile.mkdtemp(dir=os.getcwd())
+    cases = [
+        ("錄音 -> 編碼 (檔案)", capture_to_file, recording),
+        ("錄音 -> 編碼 (記憶體)", capture_in_memory, recording),
+        ("合成 -> 播放 (檔案)", playback_from_file, response_wav),
+        ("合成 -> 播放 (記憶體)", playback_from_memory, response_wav),
+    ]
+
+    print(f"{DURATION} 秒 {SAMPLE_RATE} Hz 音訊，每項 {ROUNDS} 次取中位數")
+    print(f"{'路徑':<24}{'延遲 (ms)':>12}{'峰值配置 (KB)':>16}")
+    try:
+        for name, func, arg in cases:
+            latency, peak = measure(func, arg, workdir)
+            print(f"{name:<24}{latency * 1000:>12.2f}{peak / 1024:>16.1f}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""插話偵測：不同回音延遲與音量下，從開始說話到偵測到的延遲，以及只有回音時的誤觸發
+
+執行: python -m benchmarks.barge_in_benchmark
+播放中的合成語音延遲、衰減並加上殘響後當作麥克風收到的回音，使用者在播放中途開口。
+從偵測到停止播放還要加上喇叭輸出緩衝（TextToSpeech 的 abort 約 50 ms 以內），
+完整的「開口到靜音」延遲在實機上看 'turn.barge_in' 追蹤事件或 runtime 印出的插話延遲。
+"""
+import argparse
+import time
+import numpy as np
+
+from src.echo_suppression import BargeInDetector
+from tests.audio_fixtures import OTHER_WORDS, SAMPLE_RATE, concat, echo, mix, sentence, silence, speech, word
+
+BLOCK = 1024
+
+
+def to_int16(samples):
+    return (np.clip(samples, -1, 1) * 32767).astype(np.int16)
+
+
+def run(mic, reference):
+    """逐區塊送入參考與麥克風，回傳 (觸發的秒數或 None, CPU 秒數)"""
+    detector = BargeInDetector(SAMPLE_RATE)
+    mic = to_int16(mic)
+    reference = to_int16(reference)
+    started = time.process_time()
+    for i in range(0, len(mic), BLOCK):
+        detector.add_reference(reference[i:i + BLOCK], SAMPLE_RATE, at_index=i)
+        if detector.process(mic[i:i + BLOCK].reshape(-1, 1)):
+            return i / SAMPLE_RATE, time.process_time() - started
+    return None, time.process_time() - started
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--trials', type=int, default=5, help="每種情境的句數")
+    parser.add_argument('--seconds', type=float, default=5.0, help="每段播放的長度")
+    args = parser.parse_args()
+
+    print(f"== 插話偵測（{SAMPLE_RATE} Hz，每種情境 {args.trials} 句）==")
+    print(f"{'延遲':>6} {'回音':>5} {'音量':>5} {'偵測':>7} {'延遲 p50':>9} {'p95':>7} {'誤觸發':>6}")
+    total_cpu = 0.0
+    total_seconds = 0.0
+    for delay in (0.02, 0.08, 0.2):
+        for gain in (0.2, 0.6, 1.5):
+            for level in (0.15, 0.3):
+                latencies = []
+                false_triggers = 0
+                for trial in range(args.trials):
+                    seed = trial * 10
+                    reference = sentence(args.seconds, seed=seed + 1)
+                    room = mix(echo(reference, delay, gain), silence(args.seconds, seed=seed + 2))
+
+                    detected, cpu = run(room, reference)
+                    false_triggers += detected is not None
+                    total_cpu += cpu
+                    total_seconds += args.seconds
+
+                    onset = 1.5 + 0.3 * trial / args.trials
+                    user = concat(np.zeros(int(onset * SAMPLE_RATE), np.float32),
+                                  word(OTHER_WORDS[trial % len(OTHER_WORDS)], pitch=120, level=level, seed=seed),
+                                  speech(1.5, pitch=120, level=level, seed=seed + 3))
+                    detected, cpu = run(mix(room, user)[:len(reference)], reference)
+                    total_cpu += cpu
+                    total_seconds += args.seconds
+                    if detected is not None and detected >= onset:
+                        latencies.append((detected - onset) * 1000)
+                    elif detected is not None:
+                        false_triggers += 1
+
+                p50 = f"{np.percentile(latencies, 50):.0f} ms" if latencies else "-"
+                p95 = f"{np.percentile(latencies, 95):.0f} ms" if latencies else "-"
+                print(f"{delay * 1000:4.0f}ms {gain:5.1f} {level:5.2f} {len(latencies):3d}/{args.trials:<3d} "
+                      f"{p50:>9} {p95:>7} {false_triggers:6d}")
+    print(f"CPU: {total_cpu / total_seconds:.2%} 單核")
+
+
+if __name__ == "__main__":
+    main()
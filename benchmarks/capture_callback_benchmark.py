@@ -0,0 +1,101 @@
+"""錄音回調的成本：舊的「複製 + 端點偵測 + Queue.put」與新的環形緩衝區寫入比較
+
+執行: python -m benchmarks.capture_callback_benchmark
+量測每次回調的時間分佈（另有一個執行緒持續佔用 CPU，模擬對話進行中的負載）與每次回調配置的記憶體。
+回調超過一個區塊的時間（1024 幀 @ 44.1kHz 約 23 ms）就會造成 xrun。
+"""
+import queue
+import statistics
+import threading
+import time
+import tracemalloc
+import numpy as np
+
+from src.ring_buffer import RingBuffer
+from src.voice_activity import Endpointer
+
+SAMPLE_RATE = 44100
+BLOCK = 1024
+CALLS = 3000
+
+
+def old_callback():
+    audio_queue = queue.Queue()
+    endpointer = Endpointer(SAMPLE_RATE, trailing_silence=1000)
+
+    def callback(indata):
+        block = indata.copy()
+        for kept in endpointer.process(block):
+            audio_queue.put(kept)
+        if audio_queue.qsize() > 64:
+            audio_queue.queue.clear()
+    return callback
+
+
+def ring_callback():
+    ring = RingBuffer(2 * SAMPLE_RATE)
+
+    def callback(indata):
+        ring.write(indata)
+        if ring.free() < BLOCK:
+            ring.advance(ring.available())
+    return callback
+
+
+def blocks():
+    rng = np.random.default_rng(0)
+    return [(rng.standard_normal((BLOCK, 1)) * 8000).astype(np.int16) for _ in range(16)]
+
+
+def timings(callback, data):
+    values = []
+    for i in range(CALLS):
+        start = time.perf_counter()
+        callback(data[i % len(data)])
+        values.append(time.perf_counter() - start)
+    return values
+
+
+def allocated_per_call(callback, data):
+    """每次回調期間新配置的記憶體峰值（位元組，平均）"""
+    for i in range(50):
+        callback(data[i % len(data)])
+    tracemalloc.start()
+    total = 0
+    for i in range(200):
+        current = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        callback(data[i % len(data)])
+        total += tracemalloc.get_traced_memory()[1] - current
+    tracemalloc.stop()
+    return total / 200
+
+
+def busy(stop):
+    """背景負載：純 Python 迴圈，會和回調搶 GIL"""
+    while not stop.is_set():
+        sum(i * i for i in range(20000))
+
+
+def main():
+    data = blocks()
+    print(f"{'':<10}{'p50 µs':>10}{'p99 µs':>10}{'max µs':>10}{'負載下 p99':>12}{'配置 B/次':>12}")
+    for name, factory in (('queue', old_callback), ('ring', ring_callback)):
+        idle = timings(factory(), data)
+
+        stop = threading.Event()
+        load = threading.Thread(target=busy, args=(stop,), daemon=True)
+        load.start()
+        loaded = timings(factory(), data)
+        stop.set()
+        load.join()
+
+        q = statistics.quantiles(idle, n=100)
+        loaded_p99 = statistics.quantiles(loaded, n=100)[98]
+        allocated = allocated_per_call(factory(), data)
+        print(f"{name:<10}{q[49] * 1e6:>10.1f}{q[98] * 1e6:>10.1f}{max(idle) * 1e6:>10.1f}"
+              f"{loaded_p99 * 1e6:>12.1f}{allocated:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
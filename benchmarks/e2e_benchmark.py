@@ -0,0 +1,350 @@
+"""離線端到端基準：以本機 Watson 替身重播 WAV 語料，量測每一回合的延遲分佈與吞吐量
+
+執行: python -m benchmarks.e2e_benchmark
+      python -m benchmarks.e2e_benchmark --repeat 5 --latency stt=0.3:0.08,assistant=0.2:0.05
+      python -m benchmarks.e2e_benchmark --compare benchmarks/results/e2e-舊版.json
+
+錄音經由 ReplayInput 送進真正的 SpeechToText（端點偵測、降頻、編碼、上傳），
+回覆走 WatsonAssistant / TextToSpeech / HardwareControl（模擬驅動）與對話管線。
+替身伺服器依設定的延遲與抖動（固定種子）回應，結果存成 JSON，方便比較不同 commit。
+
+自備語料: --corpus 目錄，內含 manifest.json:
+    [{"wav": "wave.wav", "transcript": "wave to me", "intent": "wave", "speech_end": 1.4}, ...]
+speech_end 是說完話的秒數（省略時以音檔結尾計算）。
+"""
+import argparse
+import contextlib
+import datetime
+import io
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import numpy as np
+import scipy.io.wavfile as wavfile
+
+from src.audio_input import ReplayInput
+from src.audio_utils import encode_wav
+from src.conversation_pipeline import ConversationPipeline, PipelineThread
+from src.hardware_backend import SimulatedBackend
+from src.hardware_control import HardwareControl
+from src.intent_classifier import IntentClassifier
+from src.service_factory import ServiceFactory
+from src.speech_to_text import SpeechToText
+from src.text_to_speech import TextToSpeech
+from src.watson_assistant import WatsonAssistant
+from tests.audio_fixtures import SAMPLE_RATE, concat, silence, speech
+from tests.fake_watson_server import FakeWatsonServer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SKILL_PATH = os.path.join(ROOT, 'materials', 'TJBot Skill Sample.json')
+RESULTS_DIR = os.path.join(ROOT, 'benchmarks', 'results')
+
+# 預設的雲端延遲（秒）：(基本, 抖動)
+DEFAULT_LATENCY = {
+    'stt': (0.30, 0.08),
+    'assistant': (0.18, 0.05),
+    'tts': (0.25, 0.07),
+    'iam': (0.20, 0.05),
+}
+
+# 內建語料：文字、Watson 回覆的意圖
+DEFAULT_UTTERANCES = [
+    ("wave to me", 'wave'),
+    ("raise your arm", 'raise-arm'),
+    ("put your arm down", 'lower-arm'),
+    ("turn the light on", 'shine'),
+    ("hello there", None),
+    ("what is your name", None),
+    ("tell me something interesting", None),
+    ("thank you very much", None),
+]
+
+METRICS = ('stt', 'reply', 'action', 'first_audio', 'turn')
+REGRESSION_THRESHOLD = 0.10  # p50 變慢超過 10% 視為退步
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+def parse_latency(text):
+    """'stt=0.3:0.08,assistant=0.2' -> {'stt': (0.3, 0.08), 'assistant': (0.2, 0.0)}"""
+    latency = dict(DEFAULT_LATENCY)
+    for item in filter(None, (part.strip() for part in (text or '').split(','))):
+        kind, value = item.split('=')
+        base, _, jitter = value.partition(':')
+        latency[kind.strip()] = (float(base), float(jitter or 0))
+    return latency
+
+
+def build_corpus(folder):
+    """合成內建語料：開頭靜音 + 類語音訊號（每個字約 0.3 秒）+ 短暫靜音"""
+    manifest = []
+    for i, (transcript, intent) in enumerate(DEFAULT_UTTERANCES):
+        lead = 0.3
+        duration = 0.3 * len(transcript.split()) + 0.2
+        samples = concat(silence(lead, seed=i), speech(duration, pitch=110 + 15 * i, seed=i + 1), silence(0.1))
+        name = f"utterance_{i:02d}.wav"
+        wavfile.write(os.path.join(folder, name), SAMPLE_RATE, (np.clip(samples, -1, 1) * 32767).astype(np.int16))
+        manifest.append({'wav': name, 'transcript': transcript, 'intent': intent, 'speech_end': lead + duration})
+    with open(os.path.join(folder, 'manifest.json'), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    return folder
+
+
+def load_corpus(folder):
+    with open(os.path.join(folder, 'manifest.json'), encoding='utf-8') as f:
+        manifest = json.load(f)
+    corpus = []
+    for item in manifest:
+        rate, samples = wavfile.read(os.path.join(folder, item['wav']))
+        if samples.ndim > 1:
+            samples = samples[:, 0]
+        corpus.append(dict(item, rate=rate, samples=samples))
+    return corpus
+
+
+class PlaybackClock:
+    """播放輸出：記錄每次開始播放的時間，realtime 時依音訊長度等待（像真的喇叭）"""
+
+    def __init__(self, realtime=True):
+        self.realtime = realtime
+        self.play_times = []
+
+    def play(self, pcm, sample_rate, channels=1):
+        self.play_times.append(time.monotonic())
+        if self.realtime:
+            time.sleep(len(pcm) / channels / sample_rate)
+
+    def finish(self):
+        pass
+
+    def abort(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def build_components(server, args):
+    """和 TJBotRuntime 相同的元件組合，連到替身伺服器"""
+    factory = ServiceFactory(iam_url=server.url)
+    assistant = WatsonAssistant('assistant-key', server.url, 'tjbot', version='2023-04-15', factory=factory)
+    output = PlaybackClock(realtime=not args.fast_playback)
+    tts = TextToSpeech('tts-key', server.url, output=output, factory=factory)
+    stt = SpeechToText('stt-key', server.url, streaming=args.stt == 'streaming', factory=factory,
+                       upload_format=args.upload_format)
+    backend = SimulatedBackend()
+    hardware = HardwareControl(backend=backend)
+    classifier = None if args.no_fast_path else IntentClassifier.from_skill(SKILL_PATH)
+    pipeline = PipelineThread(ConversationPipeline(assistant, tts=tts, hardware=hardware, classifier=classifier))
+    return factory, stt, tts, output, hardware, backend, pipeline
+
+
+def first_after(times, start):
+    return next((t for t in times if t >= start), None)
+
+
+def run_turn(item, server, stt, output, backend, pipeline, speed):
+    """重播一句話並等這一回合做完，回傳各階段相對於說完話的毫秒數"""
+    server.httpd.transcript = item['transcript']
+    if item.get('intent'):
+        server.intents[item['transcript']] = item['intent']
+
+    replay = ReplayInput(item['samples'], item['rate'], speed=speed)
+    stt.audio_input = replay
+    text = stt.listen()
+    transcript_at = time.monotonic()
+
+    # 說完話的時間點：重播開始 + 語音結束的位置（依重播速度換算）
+    speech_end = item.get('speech_end', len(item['samples']) / item['rate'])
+    spoken_at = replay.started_at + speech_end / speed
+
+    turn = pipeline.submit(text or item['transcript'], source='voice').result(30)
+    pipeline.wait_done(turn, 30)
+
+    motion = sorted(t for t, _ in backend.servo_log + backend.frames)
+    first_motion = first_after(motion, spoken_at)
+    first_audio = first_after(output.play_times, transcript_at)
+
+    def ms(t):
+        return None if t is None else (t - spoken_at) * 1000
+
+    return {
+        'transcript': item['transcript'],
+        'recognized': text,
+        'intent': turn.fast_intent or (turn.intents[0]['intent'] if turn.intents else None),
+        'fast_path': turn.fast_intent is not None,
+        'stt': ms(transcript_at),
+        'reply': ms(turn.times.get('replied')),
+        'action': ms(first_motion) if item.get('intent') else None,
+        'first_audio': ms(first_audio),
+        'turn': ms(turn.times['done']),
+    }
+
+
+def run_text_throughput(pipeline, corpus, count):
+    """不經過錄音，連續送入文字，量測管線每秒可以完成幾個回合（不插話，每一回合都完整做完）"""
+    texts = [corpus[i % len(corpus)]['transcript'] for i in range(count)]
+    pipeline.pipeline.barge_in = False
+    started = time.monotonic()
+    turns = [pipeline.submit(text).result(60) for text in texts]
+    for turn in turns:
+        pipeline.wait_done(turn, 120)
+    pipeline.pipeline.barge_in = True
+    return count / (time.monotonic() - started)
+
+
+def summarize(turns):
+    summary = {}
+    for name in METRICS:
+        values = [t[name] for t in turns if t[name] is not None]
+        if not values:
+            continue
+        summary[name] = {
+            'count': len(values),
+            'mean': statistics.fmean(values),
+            'p50': percentile(values, 50),
+            'p95': percentile(values, 95),
+            'p99': percentile(values, 99),
+        }
+    return summary
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, timeout=10).stdout.strip() or None
+    except Exception:
+        return None
+
+
+def print_summary(result):
+    print(f"\n== 延遲（毫秒，從說完話起算；{result['config']['turns']} 回合）==")
+    print(f"{'':<14}{'p50':>10}{'p95':>10}{'p99':>10}{'mean':>10}")
+    for name, row in result['latency'].items():
+        print(f"{name:<14}{row['p50']:>10.0f}{row['p95']:>10.0f}{row['p99']:>10.0f}{row['mean']:>10.0f}")
+    throughput = result['throughput']
+    print(f"\n重播: {throughput['voice_turns_per_minute']:.1f} 回合/分鐘")
+    print(f"文字連續輸入: {throughput['text_turns_per_second']:.2f} 回合/秒")
+    print(f"意圖正確: {result['accuracy']['intent']:.0%}，快速路徑: {result['accuracy']['fast_path']:.0%}")
+
+
+def compare(result, baseline):
+    """和先前的結果比較 p50 / p95，變慢超過門檻的標記為退步"""
+    print(f"\n== 與 {baseline.get('commit') or '基準'} 比較 ==")
+    print(f"{'':<14}{'p50 舊':>10}{'p50 新':>10}{'變化':>10}{'p95 舊':>10}{'p95 新':>10}")
+    regressions = []
+    for name, row in result['latency'].items():
+        old = baseline.get('latency', {}).get(name)
+        if not old:
+            continue
+        change = (row['p50'] - old['p50']) / old['p50'] if old['p50'] else 0.0
+        flag = " ⚠" if change > REGRESSION_THRESHOLD else ""
+        if flag:
+            regressions.append(name)
+        print(f"{name:<14}{old['p50']:>10.0f}{row['p50']:>10.0f}{change:>+10.0%}{old['p95']:>10.0f}{row['p95']:>10.0f}{flag}")
+    old_rate = baseline.get('throughput', {}).get('text_turns_per_second')
+    if old_rate:
+        new_rate = result['throughput']['text_turns_per_second']
+        print(f"{'吞吐量 (回合/秒)':<14}{old_rate:>10.2f}{new_rate:>10.2f}{(new_rate - old_rate) / old_rate:>+10.0%}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="離線端到端延遲基準")
+    parser.add_argument('--corpus', help="含 manifest.json 的語料目錄（預設合成內建語料）")
+    parser.add_argument('--repeat', type=int, default=3, help="語料重播幾輪")
+    parser.add_argument('--latency', help="例如 stt=0.3:0.08,assistant=0.2:0.05,tts=0.25:0.07,iam=0.2")
+    parser.add_argument('--seed', type=int, default=0, help="延遲抖動的亂數種子")
+    parser.add_argument('--speed', type=float, default=1.0, help="錄音重播速度（1 = 實際時間）")
+    parser.add_argument('--stt', choices=('http', 'streaming'), default='streaming')
+    parser.add_argument('--upload-format', default='wav', help="HTTP 識別的上傳格式 (wav / flac / opus)")
+    parser.add_argument('--reply-seconds', type=float, default=1.5, help="替身 TTS 回傳的音訊長度")
+    parser.add_argument('--fast-playback', action='store_true', help="播放不等待實際時間")
+    parser.add_argument('--no-fast-path', action='store_true', help="停用本機意圖快速路徑")
+    parser.add_argument('--throughput-turns', type=int, default=20)
+    parser.add_argument('--output', help="結果 JSON 路徑（預設 benchmarks/results/e2e-<commit>-<時間>.json）")
+    parser.add_argument('--compare', help="和先前的結果 JSON 比較")
+    args = parser.parse_args()
+
+    latency = parse_latency(args.latency)
+    with tempfile.TemporaryDirectory() as folder:
+        corpus = load_corpus(args.corpus or build_corpus(folder))
+
+    with FakeWatsonServer(latency=latency, seed=args.seed, final_after_bytes=10 ** 9) as server:
+        server.httpd.synthesized_audio = encode_wav(
+            np.zeros(int(22050 * args.reply_seconds), dtype=np.int16), 22050)
+        progress = sys.stdout
+        # 元件本身的訊息收起來，只顯示每一回合的結果
+        with contextlib.redirect_stdout(io.StringIO()):
+            factory, stt, tts, output, hardware, backend, pipeline = build_components(server, args)
+
+            turns = []
+            started = time.monotonic()
+            for round_index in range(args.repeat):
+                for item in corpus:
+                    turn = run_turn(item, server, stt, output, backend, pipeline, args.speed)
+                    turns.append(turn)
+                    print(f"[{round_index + 1}/{args.repeat}] {turn['transcript']:<32} "
+                          f"首段語音 {turn['first_audio'] or 0:>6.0f} ms  回合 {turn['turn']:>6.0f} ms", file=progress)
+            voice_seconds = time.monotonic() - started
+            text_rate = run_text_throughput(pipeline, corpus, args.throughput_turns)
+
+            pipeline.stop()
+            hardware.cleanup()
+            tts.close()
+            factory.close()
+
+    expected = {item['transcript']: item.get('intent') for item in corpus}
+    result = {
+        'benchmark': 'e2e',
+        'commit': git_commit(),
+        'timestamp': datetime.datetime.now().isoformat(timespec='seconds'),
+        'config': {
+            'latency': {kind: list(value) for kind, value in latency.items()},
+            'seed': args.seed,
+            'speed': args.speed,
+            'stt': args.stt,
+            'upload_format': args.upload_format,
+            'reply_seconds': args.reply_seconds,
+            'fast_playback': args.fast_playback,
+            'fast_path': not args.no_fast_path,
+            'corpus': args.corpus or 'builtin',
+            'utterances': len(corpus),
+            'turns': len(turns),
+        },
+        'latency': summarize(turns),
+        'throughput': {
+            'voice_turns_per_minute': len(turns) / voice_seconds * 60,
+            'text_turns_per_second': text_rate,
+        },
+        'accuracy': {
+            'intent': sum(t['intent'] == expected[t['transcript']] for t in turns) / len(turns),
+            'fast_path': sum(t['fast_path'] for t in turns) / len(turns),
+        },
+        'turns': turns,
+    }
+    print_summary(result)
+
+    output_path = args.output or os.path.join(
+        RESULTS_DIR, f"e2e-{result['commit'] or 'local'}-{datetime.datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+    print(f"\n結果已儲存: {output_path}")
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            regressions = compare(result, json.load(f))
+        if regressions:
+            print(f"退步的階段: {', '.join(regressions)}")
+
+
+if __name__ == "__main__":
+    main()
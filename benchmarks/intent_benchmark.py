@@ -0,0 +1,101 @@
+"""本機意圖分類的準確率與延遲（以技能範例做留一法交叉驗證）
+
+執行: python -m benchmarks.intent_benchmark
+設定 ASSISTANT_APIKEY / ASSISTANT_URL / ASSISTANT_ID 時會一併量測雲端 message_stateless 的延遲
+"""
+import os
+import statistics
+import time
+from dotenv import load_dotenv
+
+from src.intent_classifier import HARDWARE_INTENTS, IntentClassifier, load_skill_examples
+
+SKILL_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'materials', 'TJBot Skill Sample.json')
+REPEAT = 200
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+def leave_one_out(examples, entities):
+    """每次拿掉一個範例訓練，再用它測試；統計整體準確率與快速路徑的精確率/涵蓋率"""
+    correct = 0
+    total = 0
+    fast_taken = 0
+    fast_correct = 0
+    hardware_total = 0
+    for intent, texts in examples.items():
+        for i, text in enumerate(texts):
+            held_out = dict(examples)
+            held_out[intent] = texts[:i] + texts[i + 1:]
+            classifier = IntentClassifier(held_out, entities)
+            result = classifier.classify(text)
+            total += 1
+            correct += result['intent'] == intent
+            hardware_total += intent in HARDWARE_INTENTS
+            if classifier.fast_path(text):
+                fast_taken += 1
+                fast_correct += result['intent'] == intent
+    return correct, total, fast_taken, fast_correct, hardware_total
+
+
+def time_classifier(classifier, texts):
+    timings = []
+    for _ in range(REPEAT // len(texts) + 1):
+        for text in texts:
+            start = time.perf_counter()
+            classifier.fast_path(text)
+            timings.append(time.perf_counter() - start)
+    return timings
+
+
+def time_cloud(texts):
+    from src.watson_assistant import WatsonAssistant
+
+    assistant = WatsonAssistant(os.getenv('ASSISTANT_APIKEY'), os.getenv('ASSISTANT_URL'),
+                                os.getenv('ASSISTANT_ID'), version='2023-04-15')
+    timings = []
+    for text in texts:
+        start = time.perf_counter()
+        assistant.send_message(text)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def report(name, timings):
+    print(f"{name:<24}{statistics.median(timings) * 1000:>10.3f}{percentile(timings, 95) * 1000:>10.3f}"
+          f"{percentile(timings, 99) * 1000:>10.3f}")
+
+
+def main():
+    load_dotenv()
+    examples, entities = load_skill_examples(SKILL_PATH)
+
+    start = time.perf_counter()
+    classifier = IntentClassifier(examples, entities)
+    fit_time = time.perf_counter() - start
+    print(f"訓練: {sum(map(len, examples.values()))} 個範例, {len(classifier.vocabulary)} 個 n-gram, "
+          f"{fit_time * 1000:.1f} ms")
+
+    correct, total, fast_taken, fast_correct, hardware_total = leave_one_out(examples, entities)
+    print("\n== 留一法準確率 ==")
+    print(f"整體意圖: {correct}/{total} ({correct / total:.1%})")
+    print(f"快速路徑觸發: {fast_taken} 次 (硬體範例共 {hardware_total} 個)")
+    if fast_taken:
+        print(f"快速路徑精確率: {fast_correct}/{fast_taken} ({fast_correct / fast_taken:.1%})")
+
+    texts = [text for intent_texts in examples.values() for text in intent_texts]
+    print(f"\n== 延遲 ==")
+    print(f"{'':<24}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    report("本機分類", time_classifier(classifier, texts))
+    if os.getenv('ASSISTANT_APIKEY'):
+        hardware_texts = [text for intent in HARDWARE_INTENTS for text in examples.get(intent, [])]
+        report("雲端 message_stateless", time_cloud(hardware_texts))
+    else:
+        print("未設定 ASSISTANT_APIKEY，略過雲端延遲")
+
+
+if __name__ == "__main__":
+    main()
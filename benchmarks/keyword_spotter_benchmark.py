@@ -0,0 +1,129 @@
+"""喚醒詞偵測的 CPU 用量、漏報與誤報率，以及上傳到雲端的音訊比例
+
+執行: python -m benchmarks.keyword_spotter_benchmark                 （合成的喚醒詞與其他詞）
+      python -m benchmarks.keyword_spotter_benchmark --corpus DIR     （錄好的音檔）
+DIR 底下放 templates/（樣板）、keyword/（含喚醒詞的錄音）、other/（不含喚醒詞的錄音）三個資料夾的 WAV。
+誤報率以每小時觸發次數表示：把 other/ 的錄音串接成長時間的背景聲音重複送入。
+"""
+import argparse
+import os
+import time
+import wave
+import numpy as np
+
+from src.keyword_spotter import KeywordSpotter
+from tests.audio_fixtures import KEYWORD, OTHER_WORDS, SAMPLE_RATE, concat, silence, speech, word
+
+BLOCK = 1024
+
+
+def read_wav(path):
+    with wave.open(path, 'rb') as f:
+        rate = f.getframerate()
+        data = np.frombuffer(f.readframes(f.getnframes()), dtype=np.int16)
+        return data.reshape(-1, f.getnchannels())[:, 0], rate
+
+
+def read_directory(path):
+    return [read_wav(os.path.join(path, name)) for name in sorted(os.listdir(path)) if name.lower().endswith('.wav')]
+
+
+def to_int16(samples):
+    return (np.clip(samples, -1, 1) * 32767).astype(np.int16)
+
+
+def synthetic_corpus(count):
+    """合成的樣板、喚醒詞句子（前後有其他的話）與不含喚醒詞的背景聲音"""
+    rng = np.random.default_rng(0)
+    templates = [(to_int16(word(KEYWORD, 16000, pitch=p, speed=s, seed=i)), 16000)
+                 for i, (p, s) in enumerate([(110, 1.0), (130, 0.9), (120, 1.1)])]
+    keyword = []
+    other = []
+    for i in range(count):
+        pitch = float(rng.uniform(95, 160))
+        speed = float(rng.uniform(0.8, 1.25))
+        utterance = concat(silence(0.5, seed=i), speech(rng.uniform(0.5, 1.5), pitch=pitch, seed=i), silence(0.3),
+                           word(KEYWORD, pitch=pitch, speed=speed, seed=100 + i), speech(1.0, seed=200 + i), silence(0.5))
+        keyword.append((to_int16(utterance), SAMPLE_RATE))
+
+        syllables = OTHER_WORDS[i % len(OTHER_WORDS)]
+        utterance = concat(silence(0.5, seed=i), word(syllables, pitch=pitch, speed=speed, seed=300 + i),
+                           silence(0.2), speech(rng.uniform(1.0, 3.0), pitch=pitch, seed=400 + i), silence(1.0))
+        other.append((to_int16(utterance), SAMPLE_RATE))
+    return templates, keyword, other
+
+
+def run(spotter, samples):
+    """逐區塊送入，回傳 (觸發次數, 處理秒數)"""
+    spotter.reset()
+    hits = 0
+    started = time.process_time()
+    for i in range(0, len(samples), BLOCK):
+        hits += spotter.process(samples[i:i + BLOCK].reshape(-1, 1))
+    return hits, time.process_time() - started
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--corpus', help="templates/ keyword/ other/ 三個資料夾的 WAV")
+    parser.add_argument('--count', type=int, default=30, help="合成語料的句數")
+    parser.add_argument('--hours', type=float, default=0.25, help="誤報測試的背景聲音長度")
+    parser.add_argument('--threshold', type=float)
+    parser.add_argument('--wakes-per-hour', type=float, default=10, help="估算雲端用量時假設每小時喚醒幾次")
+    args = parser.parse_args()
+
+    if args.corpus:
+        templates = read_directory(os.path.join(args.corpus, 'templates'))
+        keyword = read_directory(os.path.join(args.corpus, 'keyword'))
+        other = read_directory(os.path.join(args.corpus, 'other'))
+    else:
+        templates, keyword, other = synthetic_corpus(args.count)
+    rate = keyword[0][1]
+
+    spotter = KeywordSpotter(rate, threshold=args.threshold)
+    for samples, template_rate in templates:
+        spotter.enroll(samples, template_rate)
+    if spotter.threshold is None:
+        spotter.threshold = spotter.auto_threshold() or 8.0
+
+    # 漏報：每句應該剛好觸發一次
+    detected = 0
+    keyword_seconds = 0.0
+    keyword_cpu = 0.0
+    for samples, _ in keyword:
+        hits, cpu = run(spotter, samples)
+        detected += hits >= 1
+        keyword_seconds += len(samples) / rate
+        keyword_cpu += cpu
+
+    # 誤報：不含喚醒詞的錄音串接成長時間的背景聲音，加上安靜時段
+    background = np.concatenate([samples for samples, _ in other] + [to_int16(silence(5.0, rate))])
+    repeats = max(1, int(args.hours * 3600 / (len(background) / rate)))
+    false_accepts = 0
+    other_cpu = 0.0
+    checks = spotter.checks
+    for _ in range(repeats):
+        hits, cpu = run(spotter, background)
+        false_accepts += hits
+        other_cpu += cpu
+    other_seconds = repeats * len(background) / rate
+    dtw_checks = spotter.checks - checks
+
+    idle_cpu = run(spotter, to_int16(silence(60.0, rate)))[1]
+
+    print(f"== 喚醒詞偵測（{len(templates)} 個樣板，門檻 {spotter.threshold:.2f}，{rate} Hz）==")
+    print(f"偵測率:       {detected}/{len(keyword)} ({detected / len(keyword):.0%})")
+    print(f"誤報:         {false_accepts} 次 / {other_seconds / 3600:.2f} 小時 "
+          f"({false_accepts / (other_seconds / 3600):.1f} 次/小時)")
+    print(f"CPU（說話中）: {other_cpu / other_seconds:.2%} 單核（每秒 {dtw_checks / other_seconds:.1f} 次 DTW）")
+    print(f"CPU（喚醒詞）: {keyword_cpu / keyword_seconds:.2%} 單核")
+    print(f"CPU（安靜）:   {idle_cpu / 60.0:.2%} 單核")
+
+    # 雲端識別只收到喚醒詞之後的一句話（約 3 秒），其餘時間都只在本地處理
+    uploaded = args.wakes_per_hour * 3.0 / 60
+    print(f"上傳到雲端的音訊: 每小時喚醒 {args.wakes_per_hour:.0f} 次約 {uploaded:.1f} 分鐘，"
+          f"整小時都上傳則是 60 分鐘（減少 {60 / uploaded:.0f} 倍）")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""燈光效果的 CPU 用量：查表向量化渲染 vs 逐顆 colorsys，以及背景執行緒實際播放時的 CPU
+
+執行: python -m benchmarks.led_effects_benchmark
+在模擬燈條（SimulatedBackend，經過 LedState）上量 1、12、60、300 顆 LED；
+實體 NeoPixel 的送出時間（每顆約 30 µs）不含在內。
+"""
+import argparse
+import colorsys
+import math
+import time
+
+from src.hardware_backend import SimulatedBackend
+from src.led_effects import EFFECTS, LedEffectRenderer, create_effect
+from src.led_state import LedState
+
+COUNTS = (1, 12, 60, 300)
+
+
+def python_rainbow_breathe(count, t):
+    """原本 tests/new_led_test.py 的做法：每顆每個影格都呼叫 math 與 colorsys"""
+    breath = (math.sin(t * 2 * math.pi / 4.0) + 1) / 2
+    frame = []
+    for i in range(count):
+        r, g, b = colorsys.hsv_to_rgb((t / 5.0 + i / count) % 1.0, 1, breath)
+        frame.append((int(r * 255), int(g * 255), int(b * 255)))
+    return frame
+
+
+def per_frame_us(render, count, frames):
+    started = time.perf_counter()
+    for i in range(frames):
+        render(count, i / 30)
+    return (time.perf_counter() - started) / frames * 1e6
+
+
+def live_cpu(name, count, fps, seconds):
+    """背景執行緒實際播放 seconds 秒，回傳 (整個行程的 CPU 比例, 影格數, 跳過的影格)"""
+    backend = SimulatedBackend(led_count=count)
+    leds = LedState(backend, count)
+    renderer = LedEffectRenderer(leds.show, fps=fps)
+    cpu = time.process_time()
+    renderer.start(create_effect(name, count, (0, 128, 255)))
+    time.sleep(seconds)
+    renderer.stop()
+    used = time.process_time() - cpu
+    leds.close()
+    backend.frames.clear()
+    return used / seconds, renderer.frames, renderer.skipped
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--fps', type=int, default=30)
+    parser.add_argument('--seconds', type=float, default=2.0, help="每種情境實際播放的秒數")
+    parser.add_argument('--budget', type=float, default=5.0, help="CPU 預算（單核百分比）")
+    args = parser.parse_args()
+
+    print("== 每個影格的渲染時間 ==")
+    print(f"{'LED 數':>6} {'colorsys':>10} " + " ".join(f"{name:>12}" for name in EFFECTS))
+    for count in COUNTS:
+        frames = 2000 if count < 100 else 300
+        baseline = per_frame_us(python_rainbow_breathe, count, frames)
+        effects = {name: create_effect(name, count, (0, 128, 255)) for name in EFFECTS}
+        vectorized = [per_frame_us(lambda c, t, e=effect: e.render(t), count, frames) for effect in effects.values()]
+        print(f"{count:6d} {baseline:8.1f}µs " + " ".join(f"{us:10.1f}µs" for us in vectorized))
+
+    print(f"\n== 背景播放 {args.fps} fps（渲染 + LedState + 模擬燈條）==")
+    print(f"{'LED 數':>6} {'效果':>12} {'CPU':>7} {'影格':>6} {'跳過':>5}")
+    worst = 0.0
+    for count in COUNTS:
+        for name in EFFECTS:
+            cpu, frames, skipped = live_cpu(name, count, args.fps, args.seconds)
+            worst = max(worst, cpu)
+            print(f"{count:6d} {name:>12} {cpu:7.2%} {frames:6d} {skipped:5d}")
+    verdict = "符合" if worst * 100 <= args.budget else "超出"
+    print(f"最高 CPU {worst:.2%} 單核，{verdict}預算 {args.budget:.1f}%")
+
+
+if __name__ == "__main__":
+    main()
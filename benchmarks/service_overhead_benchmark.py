@@ -0,0 +1,120 @@
+"""比較每次互動的額外負擔：直接呼叫 TJBotRuntime、經過常駐服務的 HTTP API、以及 Streamlit 重新執行整個 app.py
+
+執行: python -m benchmarks.service_overhead_benchmark
+Watson 使用本機替身伺服器、硬體使用模擬驅動、語音不播放，所以量到的是框架本身的負擔。
+有安裝 streamlit 時會用 streamlit.testing 模擬使用者在聊天框送出訊息（每次都重跑整個腳本）。
+"""
+import contextlib
+import io
+import os
+import statistics
+import time
+from ibm_cloud_sdk_core.authenticators import NoAuthAuthenticator
+
+from src.audio_output import NullOutput
+from src.hardware_backend import SimulatedBackend
+from src.hardware_control import HardwareControl
+from src.text_to_speech import TextToSpeech
+from src.tjbot_runtime import TJBotRuntime
+from src.tjbot_service import TJBotClient, TJBotServer
+from src.watson_assistant import WatsonAssistant
+from tests.fake_watson_server import FakeWatsonServer
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'app.py')
+MESSAGES = 200
+STREAMLIT_MESSAGES = 30
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+def build_runtime(server):
+    """以替身伺服器與模擬硬體建立執行環境，回傳 (runtime, 建立秒數)"""
+    start = time.perf_counter()
+    assistant = WatsonAssistant('key', server.url, 'tjbot', version='2023-04-15')
+    assistant.assistant.authenticator = NoAuthAuthenticator()
+    tts = TextToSpeech('key', server.url, output=NullOutput())
+    tts.text_to_speech.authenticator = NoAuthAuthenticator()
+    runtime = TJBotRuntime(assistant, tts=tts, hardware=HardwareControl(backend=SimulatedBackend()))
+    return runtime, time.perf_counter() - start
+
+
+def time_messages(send, count):
+    timings = []
+    for i in range(count):
+        start = time.perf_counter()
+        send(f"hello {i}")
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def time_streamlit(service_url, count):
+    """以 AppTest 執行 app.py（服務模式），量測聊天框送出訊息到整個腳本重跑完成的時間"""
+    from streamlit.testing.v1 import AppTest
+
+    os.environ['TJBOT_SERVICE_URL'] = service_url
+    app = AppTest.from_file(APP_PATH, default_timeout=30)
+    app.run()
+    app.sidebar.button[0].click().run()  # 初始化系統
+
+    timings = []
+    for i in range(count):
+        start = time.perf_counter()
+        app.chat_input[0].set_value(f"hello {i}").run()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def report(name, timings, baseline=None):
+    p50 = statistics.median(timings) * 1000
+    extra = f"{p50 - baseline * 1000:>+12.2f}" if baseline is not None else f"{'':>12}"
+    print(f"{name:<28}{p50:>10.2f}{percentile(timings, 95) * 1000:>10.2f}"
+          f"{percentile(timings, 99) * 1000:>10.2f}{extra}")
+
+
+def main():
+    with FakeWatsonServer() as server:
+        runtime, build_seconds = build_runtime(server)
+        service = TJBotServer(runtime, port=0).start()
+
+        start = time.perf_counter()
+        client = TJBotClient(service.url)
+        client.status()
+        connect_seconds = time.perf_counter() - start
+
+        print("== 啟動 ==")
+        print(f"建立元件（替身 Watson，實機另需載入硬體與音訊裝置）: {build_seconds * 1000:.1f} ms")
+        print(f"連上已在執行的服務: {connect_seconds * 1000:.1f} ms")
+
+        # 元件每次說話都會印出訊息，量測時先收起來
+        with contextlib.redirect_stdout(io.StringIO()):
+            # 先各自暖身，讓連線池與事件迴圈都準備好
+            time_messages(runtime.message, 10)
+            time_messages(client.message, 10)
+
+            direct = time_messages(runtime.message, MESSAGES)
+            via_service = time_messages(client.message, MESSAGES)
+        baseline = statistics.median(direct)
+
+        print(f"\n== 每次互動（{MESSAGES} 則訊息）==")
+        print(f"{'':<28}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'額外 p50 ms':>12}")
+        report("直接呼叫 TJBotRuntime", direct)
+        report("常駐服務 HTTP API", via_service, baseline)
+
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                streamlit_timings = time_streamlit(service.url, STREAMLIT_MESSAGES)
+        except ImportError:
+            print("未安裝 streamlit，略過 Streamlit 重新執行的量測")
+        else:
+            report("Streamlit 重跑 + HTTP API", streamlit_timings, baseline)
+
+        client.close()
+        service.stop()
+        runtime.close()
+
+
+if __name__ == "__main__":
+    main()
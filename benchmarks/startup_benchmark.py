@@ -0,0 +1,89 @@
+"""冷啟動到「可以對話」的時間：逐一建立與平行建立元件的比較，以及各元件的耗時明細
+
+執行: python -m benchmarks.startup_benchmark          （Watson 替身伺服器、模擬硬體、不播放）
+      python -m benchmarks.startup_benchmark --env    （在 TJBot 上使用 .env 的真實設定）
+每次都在新的 Python 行程裡量測，模組載入的時間也算在內。
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+RUNS = 3
+
+
+def child(mode):
+    """在子行程中載入模組並建立所有元件，把各階段時間以 JSON 輸出"""
+    start = time.perf_counter()
+    from src.tjbot_runtime import TJBotRuntime
+    import_seconds = time.perf_counter() - start
+
+    runtime = TJBotRuntime.from_env(parallel=(mode == 'parallel'))
+    times = dict(runtime.startup_times, imports=import_seconds)
+    times['ready'] = time.perf_counter() - start
+    runtime.close()
+    print("STARTUP " + json.dumps(times))
+
+
+def run(mode, env):
+    result = subprocess.run([sys.executable, '-m', 'benchmarks.startup_benchmark', '--child', mode],
+                            env=env, capture_output=True, text=True, timeout=120)
+    for line in result.stdout.splitlines():
+        if line.startswith("STARTUP "):
+            return json.loads(line[len("STARTUP "):])
+    raise RuntimeError(f"子行程沒有回報啟動時間:\n{result.stdout}\n{result.stderr}")
+
+
+def fake_env(server, cache_dir):
+    env = dict(os.environ)
+    for service in ('ASSISTANT', 'TTS', 'STT'):
+        env[f'{service}_APIKEY'] = 'key'
+        env[f'{service}_URL'] = server.url
+    env.update({
+        'ASSISTANT_ID': 'tjbot',
+        'IAM_URL': server.url,
+        'HARDWARE_BACKEND': 'simulated',
+        'TTS_OUTPUT': 'none',
+        'TTS_PREWARM': 'false',
+        'TTS_CACHE_DIR': cache_dir,
+    })
+    return env
+
+
+def report(results):
+    names = ['imports', 'service_factory', 'watson_sdk', 'assistant', 'tts', 'stt', 'hardware', 'intent_classifier',
+             'pipeline', 'total', 'ready']
+    print(f"{'ms (中位數)':<20}" + "".join(f"{mode:>12}" for mode in results))
+    for name in names:
+        row = f"{name:<20}"
+        for runs in results.values():
+            values = [r[name] for r in runs if name in r]
+            row += f"{statistics.median(values) * 1000:>12.0f}" if values else f"{'-':>12}"
+        print(row)
+
+
+def main():
+    if '--child' in sys.argv:
+        child(sys.argv[sys.argv.index('--child') + 1])
+        return
+
+    modes = ('sequential', 'parallel')
+    if '--env' in sys.argv:
+        env = dict(os.environ)
+        results = {mode: [run(mode, env) for _ in range(RUNS)] for mode in modes}
+    else:
+        from tests.fake_watson_server import FakeWatsonServer
+
+        with FakeWatsonServer() as server, tempfile.TemporaryDirectory() as cache_dir:
+            env = fake_env(server, cache_dir)
+            results = {mode: [run(mode, env) for _ in range(RUNS)] for mode in modes}
+
+    print(f"== 冷啟動（{RUNS} 次）==")
+    report(results)
+
+
+if __name__ == "__main__":
+    main()
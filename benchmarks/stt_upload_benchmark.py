@@ -0,0 +1,60 @@
+"""比較各種上傳格式的傳輸量與每秒音訊的 CPU 成本
+
+執行方式: python -m benchmarks.stt_upload_benchmark
+"""
+import resource
+import time
+import numpy as np
+
+from src.audio_utils import encode_audio, resample
+
+SAMPLE_RATE = 44100  # find_microphone() 常見的 default_samplerate
+TARGET_RATE = 16000
+DURATION = 5  # 秒
+ROUNDS = 5
+
+
+def make_recording():
+    """合成 5 秒類似語音的 int16 錄音"""
+    rng = np.random.default_rng(0)
+    t = np.arange(SAMPLE_RATE * DURATION) / SAMPLE_RATE
+    voiced = sum(np.sin(2 * np.pi * 140 * k * t) / k for k in range(1, 6))
+    envelope = 0.6 + 0.4 * np.abs(np.sin(2 * np.pi * 3 * t))
+    signal = (voiced / 2.3 * envelope + rng.standard_normal(len(t)) * 0.02) * 8000
+    return signal.astype(np.int16)
+
+
+def cpu_time():
+    """本行程加上已結束子行程的 CPU 時間；FLAC / Opus 由 ffmpeg 子行程編碼，只算本行程會顯得幾乎不花 CPU"""
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return time.process_time() + children.ru_utime + children.ru_stime
+
+
+def run_case(recording, target_rate, audio_format):
+    cpu_times = []
+    for _ in range(ROUNDS):
+        start = cpu_time()
+        audio = resample(recording, SAMPLE_RATE, target_rate)
+        payload, content_type = encode_audio(audio, target_rate, audio_format)
+        cpu_times.append(cpu_time() - start)
+    return len(payload), content_type, min(cpu_times) / DURATION
+
+
+def main():
+    recording = make_recording()
+    cases = [
+        ("原始 44.1 kHz WAV", SAMPLE_RATE, 'wav'),
+        ("16 kHz WAV", TARGET_RATE, 'wav'),
+        ("16 kHz FLAC", TARGET_RATE, 'flac'),
+        ("16 kHz Ogg/Opus", TARGET_RATE, 'opus'),
+    ]
+
+    print(f"{DURATION} 秒音訊，CPU 時間（含 ffmpeg 子行程）取 {ROUNDS} 次最小值")
+    print(f"{'格式':<20}{'Content-Type':<26}{'傳輸量 (KB/s)':>14}{'CPU (ms/s)':>12}")
+    for name, rate, audio_format in cases:
+        size, content_type, cpu = run_case(recording, rate, audio_format)
+        print(f"{name:<20}{content_type:<26}{size / 1024 / DURATION:>14.1f}{cpu * 1000:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+import json
+import numpy as np
+
+DEFAULT_TICK_RATE = 50  # 每秒影格數
+
+
+class CompiledGesture:
+    """預先編譯好的動作：每個軌道是一個以固定 tick 取樣的陣列，播放時只需依序讀取"""
+
+    def __init__(self, name, tick_rate, frames, cancel_values=None, start_ticks=None):
+        self.name = name
+        self.tick_rate = tick_rate
+        self.frames = frames  # 軌道名稱 -> ndarray (servo: (n,), led: (n, 3))
+        self.cancel_values = cancel_values or {}
+        # 軌道第一個關鍵影格所在的 tick，陣列從這裡開始
+        self.start_ticks = start_ticks or {track: 0 for track in frames}
+
+        # 只有數值改變的 tick 需要輸出，同樣預先算好
+        self.change_ticks = {}
+        self.change_values = {}
+        for track, frame in frames.items():
+            flat = frame.reshape(len(frame), -1)
+            changed = np.ones(len(frame), dtype=bool)
+            changed[1:] = np.any(flat[1:] != flat[:-1], axis=1)
+            ticks = np.flatnonzero(changed)
+            self.change_ticks[track] = ticks + self.start_ticks[track]
+            self.change_values[track] = [_to_output(frame[i]) for i in ticks]
+
+    @property
+    def tracks(self):
+        return self.frames.keys()
+
+    @property
+    def duration(self):
+        ends = (self.start_ticks[track] + len(frame) - 1 for track, frame in self.frames.items())
+        return max(ends, default=0) / self.tick_rate
+
+    def keyframe_time(self, track, position):
+        return self.change_ticks[track][position] / self.tick_rate
+
+
+def _to_output(value):
+    """numpy 值轉成硬體函式使用的 Python 型別（伺服 float、LED 的 RGB tuple）"""
+    if np.ndim(value) == 0:
+        return float(value)
+    return tuple(int(v) for v in value)
+
+
+def _resolve_value(value, color_map):
+    if isinstance(value, str):
+        if color_map is None or value.lower() not in color_map:
+            raise ValueError(f"未知的顏色: {value}")
+        return color_map[value.lower()]
+    return value
+
+
+def expand_keyframes(track_spec):
+    """展開 repeat / period / then，回傳依時間排序的 (秒, 值) 列表"""
+    if isinstance(track_spec, list):
+        return [tuple(k) for k in track_spec]
+
+    keyframes = [tuple(k) for k in track_spec.get('keyframes', [])]
+    repeat = track_spec.get('repeat', 1)
+    period = track_spec.get('period', 0)
+    expanded = [(t + i * period, v) for i in range(repeat) for t, v in keyframes]
+    expanded += [tuple(k) for k in track_spec.get('then', [])]
+    return sorted(expanded, key=lambda keyframe: keyframe[0])
+
+
+def compile_track(keyframes, tick_rate=DEFAULT_TICK_RATE, interpolation='step', color_map=None):
+    """把關鍵影格內插成固定 tick 的陣列，回傳 (起始 tick, 陣列)"""
+    times = np.array([t for t, _ in keyframes], dtype=np.float64)
+    values = np.array([_resolve_value(v, color_map) for _, v in keyframes], dtype=np.float64)
+    if values.ndim == 1:
+        values = values[:, None]
+
+    start = int(round(times[0] * tick_rate))
+    ticks = np.arange(start, int(round(times[-1] * tick_rate)) + 1) / tick_rate
+    if interpolation == 'linear':
+        frame = np.stack([np.interp(ticks, times, values[:, c]) for c in range(values.shape[1])], axis=1)
+    elif interpolation == 'step':
+        # 每個 tick 取最近一個已經到達的關鍵影格
+        index = np.searchsorted(times, ticks + 1e-9, side='right') - 1
+        frame = values[np.clip(index, 0, None)]
+    else:
+        raise ValueError(f"未知的內插方式: {interpolation}")
+
+    if frame.shape[1] == 1:
+        return start, frame[:, 0]
+    return start, np.clip(np.round(frame), 0, 255).astype(np.uint8)
+
+
+def compile_gesture(name, spec, tick_rate=DEFAULT_TICK_RATE, color_map=None):
+    """編譯一個動作定義（來自 JSON 或 Python 結構）"""
+    frames = {}
+    start_ticks = {}
+    for track, track_spec in spec['tracks'].items():
+        interpolation = 'step' if isinstance(track_spec, list) else track_spec.get('interpolation', 'step')
+        start_ticks[track], frames[track] = compile_track(
+            expand_keyframes(track_spec), tick_rate, interpolation, color_map)
+    cancel_values = {track: _to_output(np.asarray(_resolve_value(v, color_map)))
+                     for track, v in spec.get('cancel', {}).items()}
+    return CompiledGesture(name, tick_rate, frames, cancel_values, start_ticks)
+
+
+def load_gestures(path, color_map=None):
+    """從 JSON 檔載入並編譯所有動作"""
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+    tick_rate = data.get('tick_rate', DEFAULT_TICK_RATE)
+    return {
+        name: compile_gesture(name, spec, tick_rate, color_map)
+        for name, spec in data['gestures'].items()
+    }
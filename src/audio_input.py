@@ -0,0 +1,120 @@
+import threading
+import time
+import numpy as np
+
+
+class SoundDeviceInput:
+    """麥克風輸入：sounddevice 的 InputStream"""
+
+    name = 'sounddevice'
+
+    def __init__(self, device, sample_rate):
+        self.device = device
+        self.sample_rate = sample_rate
+
+    def open(self, callback, blocksize=1024, dtype='float32'):
+        import sounddevice as sd
+
+        return sd.InputStream(
+            samplerate=self.sample_rate,
+            channels=1,
+            dtype=dtype,
+            device=self.device,
+            callback=callback,
+            blocksize=blocksize
+        )
+
+
+class ReplayInput:
+    """以錄好的音訊取代麥克風：依實際時間（或加速）把區塊送進同一個錄音回調
+
+    音訊播完後持續送出靜音，端點偵測會像真的說完話一樣結束這一句。
+    """
+
+    name = 'replay'
+
+    def __init__(self, samples, sample_rate, speed=1.0, noise_level=0.0):
+        samples = np.asarray(samples)
+        if samples.dtype != np.int16:
+            samples = (np.clip(samples, -1, 1) * 32767).astype(np.int16)
+        self.samples = samples.reshape(-1)
+        self.sample_rate = sample_rate
+        self.speed = speed  # 0 表示不等待，盡快送完
+        self.noise_level = noise_level
+        self.started_at = None
+        self.audio_end_at = None  # 最後一個音訊區塊送出的時間 (time.monotonic)
+
+    @property
+    def duration(self):
+        return len(self.samples) / self.sample_rate
+
+    def open(self, callback, blocksize=1024, dtype='float32'):
+        return _ReplayStream(self, callback, blocksize, dtype)
+
+
+class _ReplayStream:
+    """和 sd.InputStream 相同的 start / stop / close 與 with 用法"""
+
+    def __init__(self, source, callback, blocksize, dtype):
+        self.source = source
+        self.callback = callback
+        self.blocksize = blocksize
+        self.dtype = np.dtype(dtype)
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.rng = np.random.default_rng(0)
+
+    def _convert(self, block):
+        if self.dtype == np.int16:
+            return block.reshape(-1, 1)
+        return (block.astype(np.float32) / 32768.0).reshape(-1, 1)
+
+    def _silence(self):
+        if not self.source.noise_level:
+            return np.zeros(self.blocksize, dtype=np.int16)
+        noise = self.rng.standard_normal(self.blocksize) * self.source.noise_level * 32767
+        return noise.astype(np.int16)
+
+    def _run(self):
+        source = self.source
+        interval = self.blocksize / source.sample_rate / source.speed if source.speed else 0
+        next_at = time.monotonic()
+        source.started_at = next_at
+        position = 0
+        while not self.stop_event.is_set():
+            if position < len(source.samples):
+                block = source.samples[position:position + self.blocksize]
+                if len(block) < self.blocksize:
+                    block = np.concatenate((block, np.zeros(self.blocksize - len(block), dtype=np.int16)))
+                position += self.blocksize
+                if position >= len(source.samples):
+                    source.audio_end_at = time.monotonic()
+            else:
+                block = self._silence()
+            self.callback(self._convert(block), self.blocksize, None, None)
+            if interval:
+                next_at += interval
+                self.stop_event.wait(max(next_at - time.monotonic(), 0))
+            elif position >= len(source.samples):
+                # 加速模式下靜音也不必等，但讓出 CPU 給識別執行緒
+                self.stop_event.wait(0.001)
+
+    def start(self):
+        self.thread = threading.Thread(target=self._run, name='replay-input', daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join(timeout=2)
+
+    def close(self):
+        self.stop()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
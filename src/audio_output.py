@@ -0,0 +1,215 @@
+import json
+import os
+import subprocess
+import threading
+import time
+
+AUDIO_DEVICE_CACHE = os.path.expanduser(os.getenv('AUDIO_DEVICE_CACHE', '~/.cache/tjbot/audio_device.json'))
+
+
+def load_cached_device(key):
+    """讀取上次偵測到的音訊設備"""
+    try:
+        with open(AUDIO_DEVICE_CACHE, encoding='utf-8') as f:
+            return json.load(f).get(key)
+    except (OSError, ValueError):
+        return None
+
+
+def save_cached_device(key, value):
+    """記住偵測到的音訊設備，下次啟動不必重新偵測"""
+    try:
+        try:
+            with open(AUDIO_DEVICE_CACHE, encoding='utf-8') as f:
+                cached = json.load(f)
+        except (OSError, ValueError):
+            cached = {}
+        cached[key] = value
+        os.makedirs(os.path.dirname(AUDIO_DEVICE_CACHE), exist_ok=True)
+        with open(AUDIO_DEVICE_CACHE, 'w', encoding='utf-8') as f:
+            json.dump(cached, f)
+    except OSError as e:
+        print(f"無法寫入音訊設備快取: {e}")
+
+
+def forget_cached_device(key):
+    """刪除失效的快取設備，下次重新偵測"""
+    try:
+        with open(AUDIO_DEVICE_CACHE, encoding='utf-8') as f:
+            cached = json.load(f)
+        if cached.pop(key, None) is not None:
+            with open(AUDIO_DEVICE_CACHE, 'w', encoding='utf-8') as f:
+                json.dump(cached, f)
+    except (OSError, ValueError):
+        pass
+
+
+def find_output_device(name="USB Audio Device"):
+    """尋找播放設備 - 參考 audio_device_test.py，優先使用快取的結果"""
+    import sounddevice as sd
+
+    devices = sd.query_devices()
+    cached = load_cached_device('output_device')
+    if cached:
+        for i, device in enumerate(devices):
+            if device['name'] == cached and device['max_output_channels'] > 0:
+                return i
+
+    for i, device in enumerate(devices):
+        if name in device['name'] and device['max_output_channels'] > 0:
+            print(f"已自動選擇播放裝置: {device['name']} (index {i})")
+            save_cached_device('output_device', device['name'])
+            return i
+
+    print("沒有找到 USB 音效卡，使用預設播放裝置")
+    return None
+
+
+class AudioOutput:
+    """常駐的音訊輸出串流：只開啟一次，之後直接寫入 PCM 緩衝區"""
+
+    def __init__(self, device=None, latency='low'):
+        self.device = device
+        self.latency = latency
+        self.stream = None
+        self.format = None
+        self.lock = threading.Lock()
+
+    def _ensure_stream(self, sample_rate, channels):
+        """格式相同就沿用既有串流，不同才重新開啟"""
+        if self.stream is not None and self.format == (sample_rate, channels):
+            return
+        import sounddevice as sd
+
+        self.close()
+        self.stream = sd.OutputStream(
+            samplerate=sample_rate,
+            channels=channels,
+            dtype='int16',
+            device=self.device,
+            latency=self.latency
+        )
+        self.stream.start()
+        self.format = (sample_rate, channels)
+
+    def play(self, pcm, sample_rate, channels=1):
+        """寫入 int16 PCM（阻塞到資料交給音訊緩衝區為止）"""
+        with self.lock:
+            self._ensure_stream(sample_rate, channels)
+            self.stream.write(pcm.reshape(-1, channels))
+
+    def finish(self):
+        """等待緩衝區內的音訊播完；串流保持開啟供下一次使用"""
+        if self.stream is not None:
+            time.sleep(self.stream.latency)
+
+    def abort(self):
+        """立即停止並丟掉還沒播放的音訊，下次播放時重新開啟串流"""
+        with self.lock:
+            if self.stream is not None:
+                try:
+                    self.stream.abort()
+                except Exception:
+                    pass
+            self.close()
+
+    def close(self):
+        if self.stream is not None:
+            try:
+                self.stream.stop()
+                self.stream.close()
+            except Exception:
+                pass
+        self.stream = None
+        self.format = None
+
+
+class AplayOutput:
+    """以 aplay 子程序播放（舊做法，保留作為備援）"""
+
+    def __init__(self, device):
+        self.device = device
+        self.process = None
+        self.format = None
+
+    def play(self, pcm, sample_rate, channels=1):
+        if self.process is None or self.format != (sample_rate, channels):
+            self.finish()
+            self.process = subprocess.Popen(
+                ['aplay', '-q', '-D', self.device, '-t', 'raw', '-f', 'S16_LE',
+                 '-r', str(sample_rate), '-c', str(channels)],
+                stdin=subprocess.PIPE
+            )
+            self.format = (sample_rate, channels)
+        # 同一段話持續寫入同一個 aplay，句子之間不會有空隙
+        self.process.stdin.write(memoryview(pcm).cast('B'))
+
+    def finish(self):
+        """關閉 stdin 並等待 aplay 播完"""
+        if self.process is None:
+            return
+        try:
+            self.process.stdin.close()
+        except OSError:
+            pass
+        self.process.wait()
+        self.process = None
+        self.format = None
+
+    def abort(self):
+        """結束 aplay，不等緩衝區播完"""
+        if self.process is None:
+            return
+        self.process.kill()
+        self.process.wait()
+        self.process = None
+        self.format = None
+
+    def close(self):
+        self.finish()
+
+
+class NullOutput:
+    """丟棄音訊（沒有喇叭的無頭環境或量測時使用），記錄寫入的樣本數"""
+
+    def __init__(self):
+        self.samples = 0
+
+    def play(self, pcm, sample_rate, channels=1):
+        self.samples += len(pcm) // channels
+
+    def finish(self):
+        pass
+
+    def abort(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class MonitoredOutput:
+    """包住另一個輸出，播放的同時把音訊交給監聽者（例如插話偵測的回音參考訊號）"""
+
+    def __init__(self, output, on_play, on_abort=None):
+        self.output = output
+        self.on_play = on_play  # on_play(pcm, sample_rate, channels)
+        self.on_abort = on_abort
+
+    def play(self, pcm, sample_rate, channels=1):
+        try:
+            self.on_play(pcm, sample_rate, channels)
+        except Exception as e:
+            print(f"播放監聽錯誤: {e}")
+        self.output.play(pcm, sample_rate, channels)
+
+    def finish(self):
+        self.output.finish()
+
+    def abort(self):
+        self.output.abort()
+        if self.on_abort is not None:
+            self.on_abort()
+
+    def close(self):
+        self.output.close()
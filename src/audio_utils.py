@@ -0,0 +1,147 @@
+import io
+import math
+import struct
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+def encode_wav(samples, sample_rate):
+    """把 int16 音訊編碼成記憶體中的 WAV 位元組"""
+    # scipy 載入要一秒多，用到時才匯入，啟動時不必等
+    import scipy.io.wavfile as wavfile
+
+    buffer = io.BytesIO()
+    wavfile.write(buffer, sample_rate, samples)
+    return buffer.getvalue()
+
+
+def decode_wav(data):
+    """解析 WAV 位元組，回傳 (採樣率, 聲道數, 音訊)；音訊是原始緩衝區的零複製視圖"""
+    view = memoryview(data)
+    if bytes(view[0:4]) != b'RIFF' or bytes(view[8:12]) != b'WAVE':
+        raise ValueError("不是 WAV 格式")
+
+    sample_rate = channels = bits = None
+    offset = 12
+    while offset + 8 <= len(view):
+        chunk_id = bytes(view[offset:offset + 4])
+        chunk_size = struct.unpack('<I', view[offset + 4:offset + 8])[0]
+        body = offset + 8
+        if chunk_id == b'fmt ':
+            _, channels, sample_rate, _, _, bits = struct.unpack('<HHIIHH', view[body:body + 16])
+        elif chunk_id == b'data':
+            # 串流產生的 WAV 長度欄位可能是 0xFFFFFFFF，以實際剩餘長度為準
+            end = min(body + chunk_size, len(view))
+            end -= (end - body) % (bits // 8 * channels)
+            dtype = {8: np.uint8, 16: np.int16, 32: np.int32}[bits]
+            samples = np.frombuffer(view[body:end], dtype=dtype)
+            if channels > 1:
+                samples = samples.reshape(-1, channels)
+            return sample_rate, channels, samples
+        offset = body + chunk_size + (chunk_size & 1)
+
+    raise ValueError("WAV 缺少 data 區塊")
+
+
+# 上傳格式對應的 Content-Type
+UPLOAD_CONTENT_TYPES = {
+    'wav': 'audio/wav',
+    'flac': 'audio/flac',
+    'opus': 'audio/ogg;codecs=opus',
+}
+
+
+class PolyphaseResampler:
+    """向量化的多相 FIR 重新取樣器，可逐區塊串流處理"""
+
+    def __init__(self, orig_rate, target_rate):
+        from scipy import signal
+
+        divisor = math.gcd(int(orig_rate), int(target_rate))
+        self.up = int(target_rate) // divisor
+        self.down = int(orig_rate) // divisor
+        self.orig_rate = orig_rate
+        self.target_rate = target_rate
+
+        # 與 scipy.signal.resample_poly 相同的低通濾波器設計
+        max_rate = max(self.up, self.down)
+        self.half_len = 10 * max_rate
+        taps = signal.firwin(2 * self.half_len + 1, 1.0 / max_rate, window=('kaiser', 5.0)) * self.up
+
+        # 拆成 up 個子濾波器，每個相位一列，並預先反轉以便直接和輸入視窗相乘
+        self.taps_per_phase = -(-len(taps) // self.up)
+        padded = np.zeros(self.taps_per_phase * self.up)
+        padded[:len(taps)] = taps
+        self.phase_filters = padded.reshape(self.taps_per_phase, self.up).T[:, ::-1].copy()
+        self.reset()
+
+    def reset(self):
+        self.history = np.zeros(self.taps_per_phase - 1)
+        self.consumed = 0
+        self.next_output = 0
+
+    def process(self, block):
+        """處理一個區塊，回傳目前可以計算出的輸出樣本 (float64)"""
+        block = np.asarray(block, dtype=np.float64).reshape(-1)
+        extended = np.concatenate((self.history, block))
+        total = self.consumed + len(block)
+
+        end = (total * self.up + self.down - 1) // self.down
+        outputs = np.arange(self.next_output, end)
+        positions = outputs * self.down
+        bases = positions // self.up
+        phases = positions % self.up
+
+        windows = sliding_window_view(extended, self.taps_per_phase)
+        result = np.einsum('ij,ij->i', windows[bases - self.consumed], self.phase_filters[phases])
+
+        self.history = extended[len(extended) - (self.taps_per_phase - 1):]
+        self.consumed = total
+        self.next_output = end
+        return result
+
+
+def resample(samples, orig_rate, target_rate):
+    """把整段 int16 音訊重新取樣（補償濾波器延遲，長度與 resample_poly 相同）"""
+    if orig_rate == target_rate:
+        return samples
+
+    resampler = PolyphaseResampler(orig_rate, target_rate)
+    delay = resampler.half_len // resampler.down
+    output_length = -(-len(samples) * resampler.up // resampler.down)
+
+    # 補一段零讓濾波器吐出尾端，再去掉開頭的群延遲
+    output = np.concatenate((
+        resampler.process(samples),
+        resampler.process(np.zeros(resampler.taps_per_phase))
+    ))[delay:delay + output_length]
+    return np.clip(np.round(output), -32768, 32767).astype(np.int16)
+
+
+def encode_audio(samples, sample_rate, audio_format='wav'):
+    """把 int16 音訊編碼成上傳格式，回傳 (位元組, Content-Type)
+
+    FLAC / Opus 透過 pydub (ffmpeg) 編碼，失敗時退回 WAV。
+    """
+    if audio_format != 'wav':
+        try:
+            from pydub import AudioSegment
+
+            segment = AudioSegment(
+                data=np.ascontiguousarray(samples, dtype=np.int16).tobytes(),
+                sample_width=2,
+                frame_rate=sample_rate,
+                channels=1
+            )
+            buffer = io.BytesIO()
+            if audio_format == 'flac':
+                segment.export(buffer, format='flac')
+            elif audio_format == 'opus':
+                segment.export(buffer, format='ogg', codec='libopus')
+            else:
+                raise ValueError(f"不支援的格式: {audio_format}")
+            return buffer.getvalue(), UPLOAD_CONTENT_TYPES[audio_format]
+        except Exception as e:
+            print(f"{audio_format} 編碼失敗，改用 WAV: {e}")
+
+    return encode_wav(samples, sample_rate), UPLOAD_CONTENT_TYPES['wav']
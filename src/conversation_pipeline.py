@@ -0,0 +1,299 @@
+import asyncio
+import functools
+import itertools
+import threading
+import time
+
+from src.tracing import current_turn, now, tracer
+
+_turn_ids = itertools.count(1)
+
+
+class Turn:
+    """一次對話回合：使用者輸入、Assistant 回覆與各階段時間"""
+
+    def __init__(self, text, source='text'):
+        self.id = next(_turn_ids)
+        self.text = text
+        self.source = source  # 'voice' 或 'text'
+        self.replies = []
+        self.intents = []
+        self.entities = []
+        self.fast_intent = None
+        self.interrupted = False
+        self.stop_event = threading.Event()  # 中斷這一回合的語音播放
+        self.barge_in_onset = None  # 使用者開始插話的時間 (tracing.now)
+        self.barge_in_latency = None  # 從開始插話到播放停止的秒數
+        self.times = {'received': time.monotonic()}
+        self.trace_start = now()
+        loop = asyncio.get_running_loop()
+        self.replied = loop.create_future()  # 拿到 Assistant 回覆時完成
+        self.done = loop.create_future()  # 說完話、動作也做完時完成
+
+    def mark(self, name):
+        self.times[name] = time.monotonic()
+
+
+class ConversationPipeline:
+    """asyncio 對話管線：聆聽、理解、回應三個階段各自是 coroutine，以有界 queue 串接
+
+    聆聽下一句話時可以同時播放上一句的回覆，硬體動作與語音播放平行進行；
+    回覆播放中收到新的輸入時會中斷目前的回覆 (barge-in)，排在後面還沒播的回覆也一併取消。
+    有 barge_in_detector 時播放中麥克風也持續聆聽，扣掉回音後聽到使用者說話就立即停止播放。
+    阻塞的 SDK / 音訊呼叫都在 asyncio.to_thread 中執行。
+    """
+
+    def __init__(self, assistant, tts=None, hardware=None, stt=None, classifier=None,
+                 queue_size=2, barge_in=True, on_event=None, barge_in_detector=None):
+        self.assistant = assistant
+        self.tts = tts
+        self.hardware = hardware
+        self.stt = stt  # 有 stt 時會持續聆聽麥克風
+        self.classifier = classifier  # 本機意圖快速路徑
+        self.barge_in = barge_in
+        self.barge_in_detector = barge_in_detector  # BargeInDetector，播放時也聽得出人聲
+        self.on_event = on_event  # on_event(事件名稱, Turn)
+        self.queue_size = queue_size
+        self.utterances = None
+        self.responses = None
+        self.current = None  # 正在回應的 (Turn, Task)
+        self.pending = []  # 已送入、還沒回應完的回合
+        self.tasks = []
+        self.running = False
+        self.loop = None
+        self.listen_stop = threading.Event()
+
+    def _emit(self, name, turn):
+        if self.on_event is None:
+            return
+        try:
+            self.on_event(name, turn)
+        except Exception as e:
+            print(f"對話事件處理錯誤 ({name}): {e}")
+
+    async def start(self):
+        """啟動各階段的 coroutine"""
+        self.utterances = asyncio.Queue(self.queue_size)
+        self.responses = asyncio.Queue(self.queue_size)
+        self.running = True
+        self.loop = asyncio.get_running_loop()
+        self.listen_stop.clear()
+        self.tasks = [
+            asyncio.create_task(self._understand_stage(), name='understand'),
+            asyncio.create_task(self._respond_stage(), name='respond'),
+        ]
+        if self.stt is not None:
+            self.tasks.append(asyncio.create_task(self._listen_stage(), name='listen'))
+
+    async def run(self):
+        """啟動並執行到 stop() 為止"""
+        await self.start()
+        try:
+            await asyncio.gather(*self.tasks)
+        except asyncio.CancelledError:
+            pass
+
+    async def submit(self, text, source='text'):
+        """送入一句使用者輸入，回傳 Turn（可 await turn.replied / turn.done）"""
+        turn = Turn(text, source)
+        if self.barge_in:
+            self.interrupt()
+        self.pending.append(turn)
+        await self.utterances.put(turn)
+        self._emit('utterance', turn)
+        return turn
+
+    def interrupt(self):
+        """中斷目前的回覆：停止播放並取消動作；還在排隊的回合仍會送給 Assistant（保持上下文），但不再播放"""
+        for turn in self.pending:
+            turn.interrupted = True
+            turn.stop_event.set()
+        if self.current is not None:
+            self.current[1].cancel()
+
+    def _finished(self, turn):
+        if turn in self.pending:
+            self.pending.remove(turn)
+
+    async def stop(self):
+        self.running = False
+        self.listen_stop.set()
+        self.interrupt()
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+
+    async def _listen_stage(self):
+        """持續聆聽麥克風，說完一句就送入管線"""
+        listen = self.stt.listen
+        if self.barge_in_detector is not None:
+            listen = functools.partial(self.stt.listen_for_barge_in, self.barge_in_detector,
+                                       stop_event=self.listen_stop, on_trigger=self._on_speech_start)
+        while self.running:
+            try:
+                text = await asyncio.to_thread(listen)
+            except Exception as e:
+                print(f"聆聽錯誤: {e}")
+                await asyncio.sleep(0.5)
+                continue
+            if text and text.strip():
+                await self.submit(text.strip(), source='voice')
+
+    def _on_speech_start(self, detector):
+        """（錄音執行緒）偵測到使用者開始說話：交給事件迴圈立即中斷播放"""
+        if detector.during_playback:
+            self.loop.call_soon_threadsafe(self._voice_barge_in, detector.onset_time)
+
+    def _voice_barge_in(self, onset):
+        if self.current is None:
+            return
+        turn = self.current[0]
+        turn.barge_in_onset = onset
+        self.interrupt()
+        self._emit('barge_in', turn)
+        asyncio.create_task(self._report_barge_in(turn, onset))
+
+    async def _report_barge_in(self, turn, onset):
+        """等播放真的停下來，記錄從開始說話到安靜下來的時間"""
+        deadline = time.monotonic() + 2
+        while getattr(self.tts, 'playing', False) and time.monotonic() < deadline:
+            await asyncio.sleep(0.005)
+        stopped = getattr(self.tts, 'stopped_at', None) or now()
+        turn.barge_in_latency = max(stopped - onset, 0.0)
+        tracer.record('turn.barge_in', onset, onset + turn.barge_in_latency, turn=turn.id)
+        print(f"插話：從開始說話到停止播放 {turn.barge_in_latency * 1000:.0f} ms")
+
+    async def _understand_stage(self):
+        """本機快速路徑先動作，再向 Assistant 取得回覆"""
+        while True:
+            turn = await self.utterances.get()
+            # 這一回合在各執行緒裡的追蹤紀錄都會帶著回合編號
+            token = current_turn.set(turn.id)
+            try:
+                if self.classifier is not None and self.hardware is not None:
+                    fast = self.classifier.fast_path(turn.text)
+                    if fast:
+                        turn.fast_intent = fast['intent']
+                        self.hardware.perform(fast['intent'], fast['entities'])
+                        self._emit('action', turn)
+
+                response = await asyncio.to_thread(self.assistant.send_message, turn.text)
+                turn.mark('replied')
+                tracer.record('turn.reply', turn.trace_start, now(), source=turn.source)
+                if response:
+                    output = response.get('output', {})
+                    turn.intents = output.get('intents', [])
+                    turn.entities = output.get('entities', [])
+                    turn.replies = [g['text'] for g in output.get('generic', []) if g.get('response_type') == 'text']
+                if not turn.replied.done():
+                    turn.replied.set_result(turn)
+                self._emit('reply', turn)
+                await self.responses.put(turn)
+            except Exception as e:
+                print(f"理解階段錯誤: {e}")
+                self._finished(turn)
+                for future in (turn.replied, turn.done):
+                    if not future.done():
+                        future.set_exception(e)
+            finally:
+                current_turn.reset(token)
+
+    async def _respond_stage(self):
+        """語音播放與硬體動作平行進行"""
+        while True:
+            turn = await self.responses.get()
+            if turn.interrupted:
+                self._finished(turn)
+                self._emit('interrupted', turn)
+                turn.done.set_result(turn)
+                continue
+            task = asyncio.create_task(self._respond(turn))
+            self.current = (turn, task)
+            try:
+                await task
+            except asyncio.CancelledError:
+                if not self.running:
+                    raise
+                turn.interrupted = True
+                self._emit('interrupted', turn)
+            except Exception as e:
+                print(f"回應階段錯誤: {e}")
+            finally:
+                self.current = None
+                self._finished(turn)
+                turn.mark('done')
+                tracer.record('turn.total', turn.trace_start, now(), turn=turn.id, interrupted=turn.interrupted)
+                if not turn.done.done():
+                    turn.done.set_result(turn)
+
+    async def _respond(self, turn):
+        current_turn.set(turn.id)  # 只影響這個 task 的 context
+        jobs = []
+        if self.tts is not None and turn.replies:
+            jobs.append(asyncio.to_thread(self.tts.speak_many, turn.replies, turn.stop_event))
+
+        gesture = None
+        if self.hardware is not None and turn.intents and turn.intents[0]['intent'] != turn.fast_intent:
+            gesture = self.hardware.perform(turn.intents[0]['intent'], turn.entities)
+            if gesture is not None:
+                self._emit('action', turn)
+                jobs.append(asyncio.wrap_future(gesture))
+
+        try:
+            # 動作被其他指令搶佔時會以 CancelledError 結束，不算這一回合被中斷
+            results = await asyncio.gather(*jobs, return_exceptions=True)
+        except asyncio.CancelledError:
+            # 插話：動作一併取消（MotionScheduler 會送出停止信號）
+            if gesture is not None:
+                gesture.cancel()
+            raise
+        for result in results:
+            if isinstance(result, Exception):
+                print(f"回應錯誤: {result}")
+        turn.mark('spoken')
+        self._emit('done', turn)
+
+
+class PipelineThread:
+    """在背景執行緒跑 asyncio 事件迴圈，讓 Streamlit 等同步程式也能使用管線"""
+
+    def __init__(self, pipeline):
+        self.pipeline = pipeline
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self._run, name='conversation-pipeline', daemon=True)
+        self.ready = threading.Event()
+        self.thread.start()
+        self.ready.wait(timeout=5)
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_until_complete(self.pipeline.start())
+        self.ready.set()
+        self.loop.run_forever()
+
+    def submit(self, text, source='text'):
+        """送入輸入，回傳 concurrent.futures.Future，結果為 Turn"""
+        return asyncio.run_coroutine_threadsafe(self.pipeline.submit(text, source), self.loop)
+
+    def ask(self, text, timeout=30):
+        """送入輸入並等到拿到回覆（不等說完話），回傳 Turn"""
+        turn = self.submit(text).result(timeout)
+        asyncio.run_coroutine_threadsafe(_wait(turn.replied), self.loop).result(timeout)
+        return turn
+
+    def wait_done(self, turn, timeout=30):
+        """等到這一回合說完話、動作也做完"""
+        return asyncio.run_coroutine_threadsafe(_wait(turn.done), self.loop).result(timeout)
+
+    def interrupt(self):
+        self.loop.call_soon_threadsafe(self.pipeline.interrupt)
+
+    def stop(self):
+        asyncio.run_coroutine_threadsafe(self.pipeline.stop(), self.loop).result(timeout=5)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(timeout=5)
+
+
+async def _wait(future):
+    return await future
@@ -0,0 +1,261 @@
+import collections
+import numpy as np
+
+from src.tracing import now
+
+
+class BargeInDetector:
+    """播放中也能聽出使用者說話：以播放的音訊作為參考訊號抑制回音，剩下的能量判斷是否有人插話
+
+    - 回音延遲：參考訊號與麥克風以 GCC-PHAT 互相關估計（喇叭、音效卡緩衝與空氣傳播的總延遲）
+    - 回音能量：每個頻帶估計回音增益，麥克風功率扣掉「增益 × 參考功率」（含殘響衰減）
+    - 插話：剩餘能量明顯高於預期回音與背景噪音的頻率點夠多，且持續 min_speech 秒
+    沒有播放時等同一般的能量式語音偵測；設定 idle_trigger（例如 KeywordSpotter）時改由它決定。
+
+    和 KeywordSpotter 一樣以 process(block) 回傳 True 觸發，可交給 SpeechToText.listen_for_barge_in()。
+    參考訊號以 add_reference() 送入（MonitoredOutput 在播放時呼叫）。
+    """
+
+    def __init__(self, sample_rate, idle_trigger=None, max_delay=0.3, min_speech=0.12, margin_db=10.0,
+                 speech_fraction=0.12, threshold_db=-50.0, reverb_decay=0.4, history=4.0):
+        self.sample_rate = sample_rate
+        self.idle_trigger = idle_trigger
+        self.max_delay = int(max_delay * sample_rate)
+        self.min_delay = -int(0.05 * sample_rate)  # 時鐘對齊的誤差，參考訊號可能稍晚
+        self.min_speech = min_speech
+        self.margin = 10.0 ** (margin_db / 10)
+        self.speech_fraction = speech_fraction  # 有多少比例的頻率點超出預期才算說話
+        self.threshold_db = threshold_db
+        self.reverb_decay = reverb_decay  # 參考功率每幀的殘響衰減
+
+        # 約 23 ms 的分析幀；只看 4 kHz 以下，語音的能量大多在這裡
+        self.frame = 1 << int(np.ceil(np.log2(0.023 * sample_rate)))
+        self.window = np.hanning(self.frame).astype(np.float32)
+        self.scale = 2.0 / (self.frame * float(np.sum(self.window ** 2)))
+        self.bins = int(min(4000.0, sample_rate / 2) * self.frame / sample_rate)
+        self.bands = np.minimum(np.arange(self.bins) * 16 // self.bins, 15)  # 每個頻率點所屬的頻帶
+
+        # 以絕對樣本位置索引的參考與麥克風歷史
+        self.history = int(history * sample_rate)
+        self.reference = np.zeros(self.history, dtype=np.float32)
+        self.reference_end = 0  # 參考訊號寫到哪裡（之後視為靜音）
+        self.microphone = np.zeros(self.history, dtype=np.float32)
+        self.mic_index = 0
+        self.origin = None  # 麥克風第 0 個樣本對應的時間 (tracing.now)
+
+        self.delay = None  # 回音延遲（樣本數）
+        self.delays = collections.deque(maxlen=5)
+        self.delay_window = int(0.25 * sample_rate)
+        self.last_delay_at = None
+        self.gains = None  # 每個頻帶的回音增益
+        self.warmup_frames = 0
+        self.recent = collections.deque()  # 最近的原始區塊 (起始位置, 區塊)，觸發時補上開頭的語音
+        self.onset_audio = []
+        self.onset_time = None
+        self.during_playback = False
+        self.detections = 0
+        self.reset()
+
+    def reset(self):
+        """清掉語音偵測的狀態，準備下一次；回音延遲與增益保留"""
+        self.pending = np.zeros(0, dtype=np.float32)
+        self.frame_index = self.mic_index  # pending 第一個樣本的位置
+        self.echo_power = np.zeros(self.bins, dtype=np.float32)
+        self.noise = None
+        self.speech_frames = 0
+        self.gap_frames = 0
+        self.onset_index = None
+        self.noise_floor_db = None
+        if self.idle_trigger is not None:
+            self.idle_trigger.reset()
+
+    # ---- 參考訊號 ----
+
+    def _index_at(self, when):
+        if self.origin is None:
+            self.origin = when - self.mic_index / self.sample_rate
+        return int(round((when - self.origin) * self.sample_rate))
+
+    def add_reference(self, pcm, sample_rate, channels=1, at_index=None):
+        """記錄正在播放的 int16 PCM；at_index 省略時依目前時間排在上一段之後"""
+        samples = np.asarray(pcm).reshape(-1, channels)[:, 0].astype(np.float32) / 32768.0
+        if sample_rate != self.sample_rate and len(samples):
+            positions = np.arange(int(len(samples) * self.sample_rate / sample_rate)) * (sample_rate / self.sample_rate)
+            samples = np.interp(positions, np.arange(len(samples)), samples).astype(np.float32)
+        if at_index is None:
+            at_index = max(self._index_at(now()), self.reference_end)
+        self._write(self.reference, at_index, samples, self.reference_end)
+        self.reference_end = max(self.reference_end, at_index + len(samples))
+
+    def stop_reference(self):
+        """播放被中斷：還沒播出的參考訊號作廢"""
+        self.reference_end = min(self.reference_end, self._index_at(now()))
+
+    def _write(self, buffer, start, samples, written_end):
+        if start > written_end:
+            # 中間沒有播放的部分補上靜音
+            gap = np.arange(written_end, start) % self.history
+            buffer[gap] = 0.0
+        buffer[np.arange(start, start + len(samples)) % self.history] = samples
+
+    def _read(self, buffer, start, stop, valid_end):
+        index = np.arange(start, stop)
+        values = buffer[index % self.history]
+        values[(index >= valid_end) | (index < valid_end - self.history) | (index < 0)] = 0.0
+        return values
+
+    def playing(self, start, stop):
+        """start～stop 之間（含回音延遲）是否有參考訊號"""
+        return self.reference_end > start - self.max_delay and self.reference_end > 0 and \
+            np.any(self._read(self.reference, start - self.max_delay, stop, self.reference_end))
+
+    # ---- 回音延遲 ----
+
+    def _estimate_delay(self, end):
+        """以 GCC-PHAT 估計麥克風相對參考訊號的延遲"""
+        start = end - self.delay_window
+        if start - self.max_delay < 0:
+            return
+        mic = self._read(self.microphone, start, end, self.mic_index)
+        ref = self._read(self.reference, start - self.max_delay, end - self.min_delay, self.reference_end)
+        if np.count_nonzero(ref) < len(ref) // 2 or np.sum(mic * mic) < 1e-8 * len(mic):
+            return  # 參考訊號大多是靜音，或麥克風沒有聲音
+        n = 1 << int(np.ceil(np.log2(len(mic) + len(ref))))
+        cross = np.fft.rfft(mic, n) * np.conj(np.fft.rfft(ref, n))
+        correlation = np.fft.irfft(cross / (np.abs(cross) + 1e-12), n)
+        # ref 從 start - max_delay 開始，延遲 d 的峰值落在 (d - max_delay) mod n
+        delays = np.arange(self.min_delay, self.max_delay + 1)
+        values = correlation[(delays - self.max_delay) % n]
+        best = int(np.argmax(values))
+        if values[best] < 5 * np.std(values):
+            return  # 峰值不明顯（可能有人在說話），不更新
+        self.delays.append(int(delays[best]))
+        self.delay = int(np.median(self.delays))
+
+    # ---- 語音偵測 ----
+
+    def _power(self, frames):
+        spectrum = np.fft.rfft(frames * self.window, axis=-1)[..., :self.bins]
+        return (spectrum.real ** 2 + spectrum.imag ** 2) * self.scale
+
+    def process(self, block):
+        """送入一個錄音區塊，判斷是否有人開始說話（播放中會先扣掉回音）"""
+        raw = np.asarray(block)
+        samples = raw.reshape(len(raw), -1)[:, 0]
+        if samples.dtype.kind in 'iu':
+            samples = samples.astype(np.float32) / 32768.0
+        start = self.mic_index
+        when = now()
+        candidate = when - (start + len(samples)) / self.sample_rate
+        # 以處理時間校正麥克風時鐘：取最小延遲，並慢慢放寬以跟上時脈漂移；
+        # 中間有一段沒有收到音訊（暫停聆聽）時重新對齊
+        if self.origin is None or candidate > self.origin + 0.1:
+            self.origin = candidate
+        else:
+            self.origin = min(candidate, self.origin + 1e-5)
+        self._write(self.microphone, start, samples.astype(np.float32, copy=False), self.mic_index)
+        self.mic_index += len(samples)
+
+        self.recent.append((start, raw.copy()))
+        while self.recent and self.recent[0][0] < self.mic_index - int(0.6 * self.sample_rate):
+            self.recent.popleft()
+
+        playing = self.playing(start, self.mic_index)
+        if self.idle_trigger is not None and not playing:
+            # 沒有播放時交給喚醒詞之類的觸發方式
+            self.pending = self.pending[:0]
+            self.frame_index = self.mic_index
+            if self.idle_trigger.process(block):
+                return self._trigger(None, False)
+            return False
+
+        if playing and (self.last_delay_at is None or self.mic_index - self.last_delay_at >= self.delay_window):
+            self.last_delay_at = self.mic_index
+            self._estimate_delay(self.mic_index)
+
+        self.pending = np.concatenate((self.pending, samples.astype(np.float32, copy=False)))
+        count = len(self.pending) // self.frame
+        if count == 0:
+            return False
+        frames = self.pending[:count * self.frame].reshape(count, self.frame)
+        first = self.frame_index
+        self.pending = self.pending[count * self.frame:]
+        self.frame_index += count * self.frame
+
+        if playing and self.delay is None:
+            # 還不知道回音延遲，分不出是回音還是人聲，先不判斷
+            self.speech_frames = 0
+            self.onset_index = None
+            return False
+
+        mic_power = self._power(frames)
+        ref_power = None
+        if playing and self.delay is not None:
+            ref = self._read(self.reference, first - self.delay, first - self.delay + count * self.frame,
+                             self.reference_end)
+            ref_power = self._power(ref.reshape(count, self.frame))
+
+        for i in range(count):
+            if self._frame(mic_power[i], None if ref_power is None else ref_power[i], first + i * self.frame):
+                return self._trigger(self.onset_index, playing)
+        return False
+
+    def _frame(self, mic, ref, index):
+        """處理一個分析幀，持續說話超過 min_speech 秒時回傳 True"""
+        if ref is not None:
+            self.echo_power = np.maximum(ref, self.echo_power * self.reverb_decay)
+        else:
+            self.echo_power *= self.reverb_decay
+        active = float(self.echo_power.sum()) > 1e-9
+        if self.noise is None:
+            self.noise = mic.copy()
+
+        if active and (self.gains is None or self.warmup_frames < 6):
+            # 播放剛開始：先學回音增益，不判斷插話
+            ratio = np.bincount(self.bands, mic, 16) / (np.bincount(self.bands, self.echo_power, 16) + 1e-12)
+            ratio = np.clip(ratio, 0.0, 100.0)
+            self.gains = ratio if self.gains is None else 0.5 * self.gains + 0.5 * ratio
+            self.warmup_frames += 1
+            return False
+
+        echo = self.gains[self.bands] * self.echo_power if active else 0.0
+        expected = echo + self.noise
+        loud = mic > self.margin * expected
+        residual_db = 10.0 * np.log10(float(np.sum(np.maximum(mic - echo, 0.0))) + 1e-12)
+        speech = loud.mean() > self.speech_fraction and residual_db > self.threshold_db
+
+        if not speech:
+            # 只有回音與噪音時更新估計：噪音取較小值並慢慢上升，回音增益平滑追蹤
+            self.noise = np.minimum(self.noise * 1.05, np.maximum(mic - echo, 1e-12))
+            self.noise_floor_db = 10.0 * np.log10(float(np.sum(self.noise)) + 1e-12)
+            if active:
+                ratio = np.bincount(self.bands, mic, 16) / (np.bincount(self.bands, self.echo_power, 16) + 1e-12)
+                self.gains = 0.9 * self.gains + 0.1 * np.clip(ratio, 0.0, 100.0)
+            if self.speech_frames and self.gap_frames < 1:
+                self.gap_frames += 1  # 容許一幀的空隙
+                return False
+            self.speech_frames = 0
+            self.gap_frames = 0
+            self.onset_index = None
+            return False
+
+        if self.speech_frames == 0:
+            self.onset_index = index
+        self.speech_frames += 1
+        self.gap_frames = 0
+        return self.speech_frames * self.frame >= self.min_speech * self.sample_rate
+
+    def _trigger(self, onset_index, during_playback):
+        self.detections += 1
+        self.during_playback = during_playback
+        if onset_index is None:
+            self.onset_audio = []
+            self.onset_time = now()
+        else:
+            # 從開始說話的位置起的原始音訊，觸發後接著送去識別
+            self.onset_audio = [block[max(onset_index - start, 0):] for start, block in self.recent
+                                if start + len(block) > onset_index]
+            self.onset_time = self.origin + onset_index / self.sample_rate
+        self.speech_frames = 0
+        self.onset_index = None
+        return True
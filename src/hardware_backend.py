@@ -0,0 +1,116 @@
+import os
+import threading
+import time
+
+SERVO_PWM_FREQUENCY = 50  # 50Hz
+
+
+def _import_drivers():
+    """載入樹莓派的驅動模組；不在樹莓派上（沒有安裝或平台不支援）時丟出 ImportError"""
+    try:
+        import RPi.GPIO as GPIO
+        import board
+        import neopixel
+    except (RuntimeError, NotImplementedError) as e:
+        # RPi.GPIO 與 Blinka 在其他平台上 import 時就會丟出這些錯誤
+        raise ImportError(str(e)) from e
+    return GPIO, board, neopixel
+
+
+class RealBackend:
+    """樹莓派上的實體驅動：RPi.GPIO 控制伺服馬達、NeoPixel 控制 LED"""
+
+    name = 'real'
+
+    def __init__(self, servo_pin=7, led_count=1, led_pin=18):
+        # 只有在真的要驅動硬體時才載入，非樹莓派環境也能 import 本模組
+        GPIO, board, neopixel = _import_drivers()
+
+        self.GPIO = GPIO
+        GPIO.setwarnings(False)
+        GPIO.cleanup()
+        GPIO.setmode(GPIO.BCM)  # 使用 BCM 引腳編號模式
+
+        # 初始化伺服馬達引腳
+        GPIO.setup(servo_pin, GPIO.OUT)
+        self.servo = GPIO.PWM(servo_pin, SERVO_PWM_FREQUENCY)
+        self.servo.start(0)
+
+        # 初始化 Neopixel LED
+        self.led_count = led_count
+        self.pixels = neopixel.NeoPixel(getattr(board, f'D{led_pin}'), led_count, brightness=1.0,
+                                        auto_write=False, pixel_order=neopixel.RGB)
+
+    def set_servo_duty(self, duty):
+        self.servo.ChangeDutyCycle(duty)
+
+    def fill(self, color):
+        self.pixels.fill(color)
+        self.pixels.show()
+
+    def show(self, colors):
+        """逐顆設定顏色後一次送出"""
+        for i, color in enumerate(colors):
+            self.pixels[i] = color
+        self.pixels.show()
+
+    def cleanup(self):
+        self.servo.stop()
+        self.GPIO.cleanup()
+
+
+class SimulatedBackend:
+    """模擬驅動：不接任何硬體，記錄每次輸出的時間、伺服占空比與 LED 畫面"""
+
+    name = 'simulated'
+
+    def __init__(self, servo_pin=7, led_count=1, led_pin=18, clock=time.monotonic):
+        self.led_count = led_count
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.servo_log = []  # [(時間, 占空比)]
+        self.frames = []  # [(時間, (每顆 LED 的 RGB, ...))]
+        self.duty = 0
+        self.pixels = [(0, 0, 0)] * led_count
+        self.closed = False
+
+    def set_servo_duty(self, duty):
+        with self.lock:
+            self.duty = duty
+            self.servo_log.append((self.clock(), duty))
+
+    def fill(self, color):
+        self.show([tuple(color)] * self.led_count)
+
+    def show(self, colors):
+        with self.lock:
+            self.pixels = [tuple(color) for color in colors]
+            self.frames.append((self.clock(), tuple(self.pixels)))
+
+    def cleanup(self):
+        self.closed = True
+
+
+BACKENDS = {
+    'real': RealBackend,
+    'simulated': SimulatedBackend,
+}
+
+
+def create_backend(name=None, **kwargs):
+    """依設定 (HARDWARE_BACKEND=real/simulated/auto) 建立硬體驅動
+
+    auto 只在沒有樹莓派驅動模組時改用模擬；在樹莓派上初始化失敗（例如權限不足）時直接丟出錯誤，
+    不會悄悄改用模擬、讓手臂和燈都沒有反應。
+    """
+    name = (name or os.getenv('HARDWARE_BACKEND', 'auto')).lower()
+    if name == 'auto':
+        try:
+            _import_drivers()
+            name = 'real'
+        except ImportError as e:
+            print(f"不是樹莓派環境，改用模擬驅動: {e}")
+            name = 'simulated'
+    if name not in BACKENDS:
+        raise ValueError(f"未知的硬體驅動: {name}")
+    return BACKENDS[name](**kwargs)
@@ -1,108 +1,157 @@
-import RPi.GPIO as GPIO
-from rpi_ws281x import PixelStrip, Color
-import math
-import board
-import neopixel
-import colorsys
 import time
+import os
+from concurrent.futures import Future
 
-class HardwareControl:
-    def __init__(self, led_count=1, led_pin=18):
-        GPIO.setmode(GPIO.BCM)  # 使用 BCM 引腳編號模式
+from src.animation import compile_gesture, load_gestures
+from src.hardware_backend import create_backend
+from src.led_effects import LedEffectRenderer, create_effect
+from src.led_state import LedState
+from src.motion_scheduler import MotionScheduler
+from src.servo_model import DEFAULT_SERVO_SPEED, ServoModel
+from src.tracing import current_turn, now, tracer
+
+# 顏色名稱對應的 RGB
+COLOR_MAP = {
+    "red": (255, 0, 0),
+    "green": (0, 255, 0),
+    "blue": (0, 0, 255),
+    "white": (255, 255, 255),
+    "yellow": (255, 255, 0),
+    "purple": (255, 0, 255),
+    "orange": (255, 165, 0),
+    "off": (0, 0, 0)
+}
+
+# 動作定義檔：揮手、舉手、放下、跳舞都以關鍵影格描述
+GESTURES_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'materials', 'gestures.json')
+
+
+def color_rgb(color_name):
+    """把顏色名稱轉為 RGB，未知顏色預設白色"""
+    return COLOR_MAP.get(color_name.lower(), (255, 255, 255))
+
+
+def shine_gesture(color_name):
+    return compile_gesture('shine', {'tracks': {'led': [[0.0, color_rgb(color_name)]]}})
 
-        # 初始化伺服馬達引腳
-        self.servo_pin = 7
-        GPIO.setup(self.servo_pin, GPIO.OUT)
-        self.servo = GPIO.PWM(self.servo_pin, 50)  # 50Hz
-        self.servo.start(0)
 
-        # 初始化 Neopixel LED (按照第一段代碼的方式)
+class HardwareControl:
+    def __init__(self, led_count=1, led_pin=18, backend=None, clock=time.monotonic, sleep=None, servo=None):
+        # 硬體驅動：實體 GPIO / NeoPixel 或模擬驅動，由 HARDWARE_BACKEND 決定
+        self.backend = backend or create_backend(led_count=led_count, led_pin=led_pin)
         self.led_count = led_count
-        self.pixels = neopixel.NeoPixel(board.D18, led_count, brightness=1.0, auto_write=False, pixel_order=neopixel.RGB)
+        # LED 只在畫面改變時寫入，同一個顯示 tick 內的多個指令合併成一次
+        self.leds = LedState(self.backend, led_count, clock=clock)
+        # 燈光效果（呼吸、彩虹等）在背景執行緒以固定影格率渲染整條燈條
+        self.effects = LedEffectRenderer(self.leds.show, fps=int(os.getenv('LED_EFFECT_FPS', '30')))
+
+        # 啟動時一次編譯所有動作，播放時只走訪陣列
+        self.gestures = load_gestures(GESTURES_PATH, COLOR_MAP)
+        self.shine_gestures = {name: shine_gesture(name) for name in COLOR_MAP}
+
+        # 伺服馬達位置模型：移動時間依轉動角度計算，已經到位的移動略過
+        self.servo = servo or ServoModel(
+            speed=float(os.getenv('SERVO_SPEED', DEFAULT_SERVO_SPEED)),
+            smooth=os.getenv('SERVO_SMOOTH', 'false').lower() == 'true',
+            tick_rate=self.gestures['wave'].tick_rate
+        )
+
+        # 動作排程器：所有動作都在專用執行緒上依關鍵影格執行，不阻塞呼叫端
+        self.scheduler = MotionScheduler({
+            'servo': self._set_servo,
+            'led': self.leds.fill,
+        }, clock=clock, sleep=sleep)
+
+    def _set_servo(self, duty):
+        self.servo.commanded(duty)
+        self.backend.set_servo_duty(duty)
+
+    def _servo_move(self, name):
+        """依手臂目前的位置重新排定動作的時間；完全不必動時直接回傳已完成的 Future"""
+        gesture = self.gestures[name]
+        authored = [(float(gesture.keyframe_time('servo', i)), duty)
+                    for i, duty in enumerate(gesture.change_values['servo'])]
+        keyframes = self.servo.plan(authored)
+        if not keyframes:
+            future = Future()
+            future.set_result(name)
+            return future
+        spec = {'tracks': {'servo': keyframes}, 'cancel': gesture.cancel_values}
+        return self._submit(compile_gesture(name, spec, gesture.tick_rate))
+
+    def _submit(self, gesture):
+        """交給排程器執行；追蹤開啟時記錄從送出到做完（或被取消）的時間"""
+        future = self.scheduler.submit(gesture)
+        if tracer.enabled:
+            start = now()
+            args = {'turn': current_turn.get()} if current_turn.get() is not None else {}
+            future.add_done_callback(lambda f: tracer.record(
+                f'gesture.{gesture.name}', start, now(), cancelled=f.cancelled(), **args))
+        return future
 
     def stop_servo_signal(self):
         """停止伺服馬達的PWM信號以避免抖動"""
-        self.servo.ChangeDutyCycle(0)
+        return self._servo_move('stop')
 
     def wave(self):
-        """讓伺服馬達揮手"""
+        """讓伺服馬達揮手（回傳 Future）"""
         print("Waving...")
-        self.servo.ChangeDutyCycle(7.5)  # 中間位置
-        time.sleep(0.2)
-        self.servo.ChangeDutyCycle(2.5)  # 左邊位置
-        time.sleep(0.2)
-        self.servo.ChangeDutyCycle(12.5)  # 右邊位置
-        time.sleep(0.2)
-        self.servo.ChangeDutyCycle(2.5)  # 左邊位置
-        time.sleep(0.2)
-        self.servo.ChangeDutyCycle(12.5)  # 右邊位置
-        time.sleep(0.2)
-        self.servo.ChangeDutyCycle(7.5)  # 回到中間位置
-        time.sleep(0.2)
-        self.stop_servo_signal()
-
+        return self._servo_move('wave')
 
     def lower_arm(self):
-        """將伺服馬達移至下臂位置"""
+        """將伺服馬達移至下臂位置（回傳 Future）"""
         print("Lowering arm...")
-        self.servo.ChangeDutyCycle(2.5)
-        time.sleep(1)
-        self.stop_servo_signal()
-
+        return self._servo_move('lower_arm')
 
     def raise_arm(self):
-        """將伺服馬達移至上臂位置"""
+        """將伺服馬達移至上臂位置（回傳 Future）"""
         print("Raising arm...")
-        self.servo.ChangeDutyCycle(12.5)
-        time.sleep(1)
-        self.stop_servo_signal()
-
+        return self._servo_move('raise_arm')
 
     def shine(self, color_name):
-        """改變 Neopixel LED 顏色 (使用neopixel的方式)"""
+        """改變 Neopixel LED 顏色，會中斷正在進行的燈光動作（回傳 Future）"""
         print(f"Shining {color_name} light...")
-        color_map = {
-            "red": (255, 0, 0),
-            "green": (0, 255, 0),
-            "blue": (0, 0, 255),
-            "white": (255, 255, 255),
-            "yellow": (255, 255, 0),
-            "purple": (255, 0, 255),
-            "orange": (255, 165, 0),
-            "off": (0, 0, 0)
-        }
-        color = color_map.get(color_name.lower(), (255, 255, 255))  # 默認白色
-        self.pixels.fill(color)
-        self.pixels.show()
+        self.effects.stop()
+        gesture = self.shine_gestures.get(color_name.lower()) or shine_gesture(color_name)
+        return self._submit(gesture)
 
+    def effect(self, name, color_name='white', **options):
+        """播放燈光效果 (breathe / rainbow / chase / color_wheel)，直到下一個燈光指令；options 為效果的參數"""
+        print(f"Playing {name} light effect...")
+        effect = create_effect(name, self.led_count, color_rgb(color_name), **options)
+        self.scheduler.cancel('led')
+        self.effects.start(effect)
 
     def dance(self):
-        """跳舞"""
+        """跳舞（回傳 Future）"""
         print("Dancing...")
-        colors = ["red", "green", "blue", "white", "yellow", "purple", "orange"]
-        
-        for i in range(7):
-            # 揮手動作
-            self.servo.ChangeDutyCycle(7.5)  # 中間
-            time.sleep(0.2)
-            self.servo.ChangeDutyCycle(2.5)  # 左
-            self.shine(colors[i % len(colors)])
-            time.sleep(0.2)
-            self.servo.ChangeDutyCycle(12.5)  # 右
-            time.sleep(0.2)
-            self.servo.ChangeDutyCycle(7.5)  # 中間
-            time.sleep(0.2)
-        
-        # 結束動作
-        self.servo.ChangeDutyCycle(7.5)  # 回到中間
-        time.sleep(0.5)
-        self.stop_servo_signal()  # 停止PWM信號
-        self.shine("off")  # 關閉燈光
-
-
+        self.effects.stop()
+        return self._submit(self.gestures['dance'])
+
+    def perform(self, intent, entities=None):
+        """依 Watson（或本機分類器）的意圖執行動作，非硬體意圖回傳 None"""
+        if intent == 'wave':
+            return self.wave()
+        if intent == 'lower-arm':
+            return self.lower_arm()
+        if intent == 'raise-arm':
+            return self.raise_arm()
+        if intent == 'shine':
+            # 從 entities 提取顏色
+            color = next((e['value'] for e in entities or [] if e['entity'] == 'color'), 'white')
+            return self.shine(color)
+        return None
+
+    def cancel_motion(self, track=None):
+        """取消正在進行的動作 ('servo' / 'led' / 全部)"""
+        self.scheduler.cancel(track)
 
     def cleanup(self):
-        """清理 GPIO 引腳"""
+        """停止動作並清理硬體"""
         print("Cleaning up GPIO...")
-        self.servo.stop()
-        GPIO.cleanup()
+        self.effects.stop()
+        self.scheduler.shutdown()
+        self.leds.close()
+        stats = self.leds.stats()
+        print(f"LED 寫入 {stats['writes']} 次，略過重複 {stats['redundant']} 次，合併 {stats['coalesced']} 次")
+        self.backend.cleanup()
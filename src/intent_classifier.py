@@ -0,0 +1,128 @@
+import json
+import re
+import numpy as np
+
+# 可以直接在本機執行、不必等雲端回覆的硬體意圖
+HARDWARE_INTENTS = ('wave', 'raise-arm', 'lower-arm', 'shine')
+
+# 意圖需要的實體：句子裡沒有提到時不走快速路徑，由雲端的回覆決定動作（例如沒說顏色的 shine）
+REQUIRED_ENTITIES = {'shine': ('color',)}
+
+
+def char_ngrams(text, ngram_range=(2, 4)):
+    """以空白補在詞的前後，取字元 n-gram"""
+    text = ' ' + ' '.join(re.findall(r"[a-z0-9']+", text.lower())) + ' '
+    low, high = ngram_range
+    return [text[i:i + n] for n in range(low, high + 1) for i in range(len(text) - n + 1)]
+
+
+def load_skill_examples(skill_path):
+    """從技能 JSON 取出意圖範例 {intent: [text]} 與實體值 {entity: {value: [synonyms]}}"""
+    with open(skill_path, encoding='utf-8') as f:
+        skill = json.load(f)
+
+    examples = {
+        intent['intent']: [e['text'] for e in intent.get('examples', [])]
+        for intent in skill.get('intents', [])
+    }
+    entities = {
+        entity['entity']: {v['value']: v.get('synonyms', []) for v in entity.get('values', [])}
+        for entity in skill.get('entities', [])
+    }
+    return examples, entities
+
+
+class IntentClassifier:
+    """本機意圖分類：字元 n-gram TF-IDF，啟動時預先算好範例矩陣，查詢只需一次矩陣乘法"""
+
+    def __init__(self, examples, entities=None, threshold=0.55, margin=0.1, ngram_range=(2, 4)):
+        self.threshold = threshold  # 最高分低於此值就交給雲端
+        self.margin = margin  # 與第二名意圖的最小差距
+        self.ngram_range = ngram_range
+        self.entities = entities or {}
+
+        texts = []
+        labels = []
+        for intent, intent_examples in examples.items():
+            texts.extend(intent_examples)
+            labels.extend([intent] * len(intent_examples))
+        self.intents = sorted(examples)
+        intent_index = {intent: i for i, intent in enumerate(self.intents)}
+        self.labels = np.array([intent_index[label] for label in labels])
+
+        # 詞彙表與 IDF
+        grams = [char_ngrams(text, ngram_range) for text in texts]
+        self.vocabulary = {}
+        for text_grams in grams:
+            for gram in text_grams:
+                self.vocabulary.setdefault(gram, len(self.vocabulary))
+        counts = np.zeros((len(texts), len(self.vocabulary)), dtype=np.float32)
+        for row, text_grams in enumerate(grams):
+            for gram in text_grams:
+                counts[row, self.vocabulary[gram]] += 1
+        document_frequency = np.count_nonzero(counts, axis=0)
+        self.idf = (np.log((1 + len(texts)) / (1 + document_frequency)) + 1).astype(np.float32)
+        self.matrix = self._normalize(counts * self.idf)
+
+        # 實體值（含同義詞）-> 正規化後的值
+        self.entity_patterns = []
+        for entity, values in self.entities.items():
+            for value, synonyms in values.items():
+                for word in [value] + list(synonyms):
+                    pattern = re.compile(r'\b' + re.escape(word.lower()) + r'\b')
+                    self.entity_patterns.append((pattern, entity, value))
+
+    @classmethod
+    def from_skill(cls, skill_path, **kwargs):
+        examples, entities = load_skill_examples(skill_path)
+        return cls(examples, entities, **kwargs)
+
+    @staticmethod
+    def _normalize(matrix):
+        norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+        return matrix / np.where(norms == 0, 1, norms)
+
+    def _vectorize(self, text):
+        vector = np.zeros(len(self.vocabulary), dtype=np.float32)
+        for gram in char_ngrams(text, self.ngram_range):
+            index = self.vocabulary.get(gram)
+            if index is not None:
+                vector[index] += 1
+        return self._normalize(vector * self.idf)
+
+    def extract_entities(self, text):
+        """以整詞比對實體值，格式與 Watson 回應的 entities 相同"""
+        text = text.lower()
+        found = []
+        for pattern, entity, value in self.entity_patterns:
+            match = pattern.search(text)
+            if match:
+                found.append((match.start(), {'entity': entity, 'value': value}))
+        return [entity for _, entity in sorted(found, key=lambda item: item[0])]
+
+    def classify(self, text):
+        """回傳 {'intent', 'confidence', 'margin', 'entities'}"""
+        scores = self.matrix @ self._vectorize(text)
+        # 每個意圖取最相似範例的分數
+        per_intent = np.zeros(len(self.intents), dtype=np.float32)
+        np.maximum.at(per_intent, self.labels, scores)
+        order = np.argsort(per_intent)[::-1]
+        best = float(per_intent[order[0]])
+        second = float(per_intent[order[1]]) if len(order) > 1 else 0.0
+        return {
+            'intent': self.intents[order[0]],
+            'confidence': best,
+            'margin': best - second,
+            'entities': self.extract_entities(text),
+        }
+
+    def fast_path(self, text):
+        """高信心、參數齊全的硬體指令回傳分類結果，否則回傳 None 交給雲端"""
+        result = self.classify(text)
+        found = {entity['entity'] for entity in result['entities']}
+        if (result['intent'] in HARDWARE_INTENTS
+                and result['confidence'] >= self.threshold
+                and result['margin'] >= self.margin
+                and all(name in found for name in REQUIRED_ENTITIES.get(result['intent'], ()))):
+            return result
+        return None
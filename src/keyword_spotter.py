@@ -0,0 +1,238 @@
+import time
+import numpy as np
+
+
+def _hz_to_mel(hz):
+    return 2595.0 * np.log10(1.0 + np.asarray(hz) / 700.0)
+
+
+def _mel_to_hz(mel):
+    return 700.0 * (10.0 ** (np.asarray(mel) / 2595.0) - 1.0)
+
+
+class MfccExtractor:
+    """以 numpy 計算 MFCC（25 ms 幀、10 ms 位移），濾波器組與 DCT 矩陣只算一次"""
+
+    def __init__(self, sample_rate, n_mfcc=13, n_mels=26, frame_ms=25, hop_ms=10, fmin=100.0, fmax=8000.0):
+        self.sample_rate = sample_rate
+        self.frame_length = int(sample_rate * frame_ms / 1000)
+        self.hop = int(sample_rate * hop_ms / 1000)
+        self.n_fft = 1 << (self.frame_length - 1).bit_length()
+        self.window = np.hamming(self.frame_length).astype(np.float32)
+
+        # 三角形 mel 濾波器組，上限不超過 Nyquist
+        fmax = min(fmax, sample_rate / 2)
+        edges = _mel_to_hz(np.linspace(_hz_to_mel(fmin), _hz_to_mel(fmax), n_mels + 2))
+        bins = np.fft.rfftfreq(self.n_fft, 1.0 / sample_rate)
+        filters = np.zeros((n_mels, len(bins)), dtype=np.float32)
+        for m in range(n_mels):
+            low, center, high = edges[m], edges[m + 1], edges[m + 2]
+            rising = (bins - low) / (center - low)
+            falling = (high - bins) / (high - center)
+            filters[m] = np.maximum(0.0, np.minimum(rising, falling))
+        self.filters = filters.T
+
+        # DCT-II（正交），去掉 c0：音量由能量門檻另外處理
+        n = np.arange(n_mels)
+        k = np.arange(1, n_mfcc + 1)[:, None]
+        self.dct = (np.cos(np.pi * k * (2 * n + 1) / (2 * n_mels)) * np.sqrt(2.0 / n_mels)).T.astype(np.float32)
+
+    def compute(self, samples):
+        """回傳 (MFCC (幀數, n_mfcc), 每幀能量 dBFS)；samples 為 -1～1 的浮點數"""
+        samples = np.asarray(samples, dtype=np.float32).reshape(-1)
+        if len(samples) < self.frame_length:
+            return np.zeros((0, self.dct.shape[1]), dtype=np.float32), np.zeros(0, dtype=np.float32)
+
+        count = 1 + (len(samples) - self.frame_length) // self.hop
+        frames = np.lib.stride_tricks.sliding_window_view(samples, self.frame_length)[::self.hop][:count]
+        power = np.abs(np.fft.rfft(frames * self.window, self.n_fft)) ** 2
+        energy_db = 10.0 * np.log10(np.mean(frames * frames, axis=1) + 1e-12)
+        mel = np.log(power @ self.filters + 1e-10)
+        return (mel @ self.dct).astype(np.float32), energy_db.astype(np.float32)
+
+
+def subsequence_dtw(template, window):
+    """樣板對窗口的子序列 DTW：樣板每幀前進一步，窗口可以停留、前進一格或兩格（語速 0.5～2 倍）
+
+    窗口的起點與終點不限，回傳平均每個樣板幀的最小累積距離。
+    逐列以向量運算更新，不需要 Python 內層迴圈。
+    """
+    if len(template) == 0 or len(window) == 0:
+        return np.inf
+    cost = np.sqrt(np.maximum(
+        (template * template).sum(1)[:, None] + (window * window).sum(1)[None, :] - 2.0 * template @ window.T, 0.0))
+    stay_penalty = float(np.median(cost))  # 停在同一個窗口幀需要額外代價，避免整段樣板對到一兩幀
+    total = cost[0].copy()
+    best = np.empty_like(total)
+    for row in cost[1:]:
+        best[:] = total + stay_penalty
+        np.minimum(best[1:], total[:-1], out=best[1:])
+        np.minimum(best[2:], total[:-2], out=best[2:])
+        total = row + best
+    return float(total.min()) / len(template)
+
+
+class KeywordSpotter:
+    """本地喚醒詞偵測：MFCC 加 DTW，和事先錄好的樣板（例如說幾次 "TJBot"）比對
+
+    process() 接收錄音區塊（int16 或 -1～1 浮點數），偵測到喚醒詞時回傳 True。
+    沒有聲音時只計算能量，不做 DTW，常駐時幾乎不佔 CPU。
+    """
+
+    def __init__(self, sample_rate, threshold=None, check_interval=0.1, energy_threshold_db=-45.0,
+                 refractory=1.0):
+        self.sample_rate = sample_rate
+        self.extractor = MfccExtractor(sample_rate)
+        self.templates = []
+        self.threshold = threshold  # None：依樣板之間的距離自動決定
+        self.check_interval = check_interval  # 每隔幾秒比對一次
+        self.energy_threshold_db = energy_threshold_db  # 最近一段的最大能量低於此值就不比對
+        self.refractory = refractory  # 觸發後幾秒內不再觸發
+        self.max_template_frames = 0
+        self.checks = 0  # 實際做了幾次 DTW 比對（效能統計）
+        self.last_score = None
+        self.reset()
+
+    def reset(self):
+        """清掉串流狀態，準備偵測下一次"""
+        self.pending = np.zeros(0, dtype=np.float32)
+        self.features = np.zeros((0, self.extractor.dct.shape[1]), dtype=np.float32)
+        self.energies = np.zeros(0, dtype=np.float32)
+        self.frames_since_check = 0
+        self.frames_since_trigger = None
+        self.noise_floor_db = None  # 觸發時最近一段的最小能量，交給之後的端點偵測
+
+    def enroll(self, samples, sample_rate=None):
+        """加入一段喚醒詞錄音作為樣板，只保留有聲音的部分"""
+        samples = self._to_float(samples)
+        rate = sample_rate or self.sample_rate
+        extractor = self.extractor if rate == self.sample_rate else MfccExtractor(rate)
+        features, energies = extractor.compute(samples)
+        voiced = np.flatnonzero(energies > max(energies.max() - 30.0, self.energy_threshold_db))
+        if len(voiced) < 5:
+            raise ValueError("樣板太短或太小聲")
+        # 不做倒頻譜平均正規化：常駐聆聽的窗口前後混著其他的話，平均值會偏移；
+        # 樣板與聆聽用的是同一支麥克風，通道差異不大
+        template = features[voiced[0]:voiced[-1] + 1]
+        self.templates.append(template)
+        self.max_template_frames = max(self.max_template_frames, len(template))
+        return len(template)
+
+    def enroll_directory(self, path):
+        """讀取資料夾裡所有 WAV 作為樣板，回傳樣板數"""
+        import os
+        import wave
+
+        for name in sorted(os.listdir(path)):
+            if not name.lower().endswith('.wav'):
+                continue
+            with wave.open(os.path.join(path, name), 'rb') as f:
+                rate = f.getframerate()
+                data = np.frombuffer(f.readframes(f.getnframes()), dtype=np.int16)
+                data = data.reshape(-1, f.getnchannels())[:, 0]
+            self.enroll(data, rate)
+        return len(self.templates)
+
+    def auto_threshold(self, margin=1.3):
+        """樣板兩兩之間的 DTW 距離（同一個詞的變化範圍）乘上 margin 作為門檻"""
+        scores = [subsequence_dtw(a, b) for i, a in enumerate(self.templates)
+                  for j, b in enumerate(self.templates) if i != j]
+        if not scores:
+            return None
+        return margin * float(np.max(scores))
+
+    @staticmethod
+    def _to_float(block):
+        block = np.asarray(block).reshape(-1)
+        if block.dtype.kind in 'iu':
+            return block.astype(np.float32) / 32768.0
+        return block.astype(np.float32, copy=False)
+
+    def score(self, features):
+        """窗口與所有樣板比對，回傳最小距離"""
+        return min(subsequence_dtw(template, features) for template in self.templates)
+
+    def process(self, block):
+        """送入一個錄音區塊，偵測到喚醒詞時回傳 True"""
+        if not self.templates:
+            return False
+        if self.threshold is None:
+            self.threshold = self.auto_threshold() or 8.0
+
+        samples = np.concatenate((self.pending, self._to_float(block)))
+        features, energies = self.extractor.compute(samples)
+        consumed = len(features) * self.extractor.hop
+        self.pending = samples[consumed:]
+        if not len(features):
+            return False
+
+        # 只保留比對需要的最近幾幀（最長樣板的兩倍）
+        keep = 2 * self.max_template_frames
+        self.features = np.concatenate((self.features, features))[-keep:]
+        self.energies = np.concatenate((self.energies, energies))[-keep:]
+        self.frames_since_check += len(features)
+        if self.frames_since_trigger is not None:
+            self.frames_since_trigger += len(features)
+            if self.frames_since_trigger * self.extractor.hop < self.refractory * self.sample_rate:
+                return False
+            self.frames_since_trigger = None
+
+        if self.frames_since_check * self.extractor.hop < self.check_interval * self.sample_rate:
+            return False
+        self.frames_since_check = 0
+
+        # 能量門檻：最近一個樣板長度內沒有聲音就不必比對
+        recent = self.energies[-self.max_template_frames:]
+        if recent.max() < self.energy_threshold_db or len(self.features) < self.max_template_frames // 2:
+            return False
+
+        self.checks += 1
+        self.last_score = self.score(self.features)
+        if self.last_score > self.threshold:
+            return False
+
+        # 觸發後清掉歷史，同一個詞不會重複觸發
+        self.noise_floor_db = float(self.energies.min())
+        self.features = self.features[:0]
+        self.energies = self.energies[:0]
+        self.frames_since_trigger = 0
+        return True
+
+
+def main():
+    """錄製喚醒詞樣板: python -m src.keyword_spotter [資料夾] [次數]"""
+    import os
+    import sys
+    import wave
+    import sounddevice as sd
+
+    path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(
+        os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'materials', 'wake_word')
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    rate = 16000
+    os.makedirs(path, exist_ok=True)
+
+    spotter = KeywordSpotter(rate)
+    for i in range(count):
+        input(f"({i + 1}/{count}) 按 Enter 後在 2 秒內說一次喚醒詞...")
+        recording = sd.rec(2 * rate, samplerate=rate, channels=1, dtype='int16')
+        sd.wait()
+        try:
+            spotter.enroll(recording, rate)
+        except ValueError as e:
+            print(f"{e}，請再錄一次")
+            continue
+        filename = os.path.join(path, f"wake_{int(time.time() * 1000)}.wav")
+        with wave.open(filename, 'wb') as f:
+            f.setnchannels(1)
+            f.setsampwidth(2)
+            f.setframerate(rate)
+            f.writeframes(recording.tobytes())
+        print(f"已儲存 {filename}")
+
+    if len(spotter.templates) > 1:
+        print(f"建議門檻: {spotter.auto_threshold():.2f}")
+
+
+if __name__ == "__main__":
+    main()
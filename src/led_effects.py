@@ -0,0 +1,231 @@
+import abc
+import colorsys
+import threading
+import time
+import numpy as np
+
+LUT_SIZE = 256  # 色相與亮度查表的大小（一圈 / 一個週期）
+
+
+def _hue_wheel(size):
+    """飽和度、亮度都是 1 的 HSV 色相環，(size, 3) uint8"""
+    h = np.arange(size) * 6.0 / size
+    sector = h.astype(int) % 6
+    f = h - np.floor(h)
+    up = f
+    down = 1.0 - f
+    one = np.ones(size)
+    zero = np.zeros(size)
+    r = np.choose(sector, [one, down, zero, zero, up, one])
+    g = np.choose(sector, [up, one, one, down, zero, zero])
+    b = np.choose(sector, [zero, zero, up, one, one, down])
+    return np.round(np.stack([r, g, b], axis=1) * 255).astype(np.uint8)
+
+
+def _breath(size, gamma=2.2):
+    """一個呼吸週期的亮度 0～256（正弦波加 gamma，暗的時候變化較慢，看起來比較平順）"""
+    wave = (1.0 - np.cos(2.0 * np.pi * np.arange(size) / size)) / 2.0
+    return np.round(wave ** gamma * 256).astype(np.uint16)
+
+
+# 啟動時算一次，渲染時只查表
+HUE_WHEEL = _hue_wheel(LUT_SIZE)
+HUE_WHEEL_16 = HUE_WHEEL.astype(np.uint16)  # 乘上亮度時不會溢位
+BREATH = _breath(LUT_SIZE)
+
+
+def _phase(t, period, size=LUT_SIZE):
+    """時間 t 在週期中的查表位置"""
+    return int(t / period * size) % size
+
+
+class Effect(abc.ABC):
+    """燈光效果：render(t) 回傳 t 秒時整條燈條的畫面 (led_count, 3) uint8
+
+    輸出陣列預先配置並重複使用，呼叫端要保留畫面時需自行複製。
+    """
+
+    def __init__(self, led_count, color=(255, 255, 255)):
+        self.led_count = led_count
+        self.color = np.array(color, dtype=np.uint16)
+        self.frame = np.zeros((led_count, 3), dtype=np.uint8)
+        self.pixels = np.arange(led_count)
+
+    @abc.abstractmethod
+    def render(self, t):
+        """t 秒時的畫面"""
+
+
+class Breathe(Effect):
+    """整條以同一個顏色呼吸"""
+
+    def __init__(self, led_count, color=(255, 255, 255), period=4.0):
+        super().__init__(led_count, color)
+        self.period = period
+        # 每個亮度的顏色也查表，渲染時只要填入一列
+        self.table = ((self.color[None, :] * BREATH[:, None]) >> 8).astype(np.uint8)
+
+    def render(self, t):
+        self.frame[:] = self.table[_phase(t, self.period)]
+        return self.frame
+
+
+class Rainbow(Effect):
+    """彩虹沿著燈條流動；只有一顆 LED 時就是色相隨時間循環，breathe=True 時再加上呼吸"""
+
+    def __init__(self, led_count, color=None, period=5.0, breathe=False, breathe_period=4.0):
+        super().__init__(led_count)
+        self.period = period
+        self.breathe = breathe
+        self.breathe_period = breathe_period
+        self.offsets = (self.pixels * LUT_SIZE // max(led_count, 1)).astype(np.intp)
+        self.index = np.empty(led_count, dtype=np.intp)
+        self.scaled = np.empty((led_count, 3), dtype=np.uint16)
+
+    def render(self, t):
+        np.add(self.offsets, _phase(t, self.period), out=self.index)
+        np.bitwise_and(self.index, LUT_SIZE - 1, out=self.index)
+        if not self.breathe:
+            np.take(HUE_WHEEL, self.index, axis=0, out=self.frame)
+            return self.frame
+        np.take(HUE_WHEEL_16, self.index, axis=0, out=self.scaled)
+        np.multiply(self.scaled, BREATH[_phase(t, self.breathe_period)], out=self.scaled)
+        np.right_shift(self.scaled, 8, out=self.scaled)
+        self.frame[:] = self.scaled
+        return self.frame
+
+
+class Chase(Effect):
+    """一個亮點帶著漸暗的尾巴沿燈條跑動"""
+
+    def __init__(self, led_count, color=(255, 255, 255), speed=10.0, tail=4):
+        super().__init__(led_count, color)
+        self.speed = speed  # 每秒前進幾顆
+        # 和亮點距離 d 的亮度，距離超過尾巴長度就是暗的
+        distance = np.arange(led_count)
+        levels = np.clip(1.0 - distance / (tail + 1), 0, 1) ** 2
+        self.table = ((self.color[None, :] * np.round(levels * 256).astype(np.uint16)[:, None]) >> 8).astype(np.uint8)
+        self.index = np.empty(led_count, dtype=np.intp)
+
+    def render(self, t):
+        head = int(t * self.speed) % self.led_count
+        np.subtract(head, self.pixels, out=self.index)
+        np.remainder(self.index, self.led_count, out=self.index)
+        np.take(self.table, self.index, axis=0, out=self.frame)
+        return self.frame
+
+
+class ColorWheel(Effect):
+    """以指定顏色為中心，在色相環上鄰近的顏色之間流動；白色等沒有色相的顏色走完整個色相環"""
+
+    def __init__(self, led_count, color=(255, 255, 255), spread=0.25, period=6.0):
+        super().__init__(led_count, color)
+        hue, saturation, _ = colorsys.rgb_to_hsv(*(c / 255.0 for c in color))
+        self.period = period
+        self.base = int(round(hue * LUT_SIZE))
+        self.span = LUT_SIZE if saturation < 0.1 else max(2, int(spread * LUT_SIZE))
+        # 在 span 內先往前再往回（三角波），顏色不會從一端跳到另一端
+        sweep = np.concatenate((np.arange(self.span), np.arange(self.span - 1, -1, -1))) - self.span // 2
+        self.sweep = sweep.astype(np.intp)
+        self.offsets = (self.pixels * self.span // max(led_count, 1)).astype(np.intp)
+        self.index = np.empty(led_count, dtype=np.intp)
+
+    def render(self, t):
+        step = _phase(t, self.period, len(self.sweep))
+        np.add(self.offsets, step, out=self.index)
+        np.remainder(self.index, len(self.sweep), out=self.index)
+        np.take(self.sweep, self.index, out=self.index)
+        np.add(self.index, self.base, out=self.index)
+        np.bitwise_and(self.index, LUT_SIZE - 1, out=self.index)
+        np.take(HUE_WHEEL, self.index, axis=0, out=self.frame)
+        return self.frame
+
+
+EFFECTS = {
+    'breathe': Breathe,
+    'rainbow': Rainbow,
+    'chase': Chase,
+    'color_wheel': ColorWheel,
+}
+
+
+def create_effect(name, led_count, color=(255, 255, 255), **kwargs):
+    if name not in EFFECTS:
+        raise ValueError(f"未知的燈光效果: {name}")
+    return EFFECTS[name](led_count, color=color, **kwargs)
+
+
+class LedEffectRenderer:
+    """在背景執行緒以固定的最高影格率渲染燈光效果，畫面交給 output（例如 LedState.show）
+
+    來不及時跳過落後的影格，不會為了追進度連續渲染。
+    """
+
+    def __init__(self, output, fps=30, clock=time.monotonic):
+        self.output = output
+        self.interval = 1.0 / fps
+        self.clock = clock
+        self.effect = None
+        self.thread = None
+        self.stop_event = threading.Event()
+        self.lock = threading.Lock()
+
+        # 統計
+        self.frames = 0
+        self.skipped = 0  # 落後而跳過的影格
+        self.render_seconds = 0.0  # 渲染與輸出花費的 CPU 時間
+
+    def start(self, effect):
+        """開始播放效果（取代正在播放的效果）"""
+        with self.lock:
+            self._stop()
+            self.effect = effect
+            self.stop_event = threading.Event()
+            self.thread = threading.Thread(target=self._run, args=(effect, self.stop_event),
+                                           name='led-effects', daemon=True)
+            self.thread.start()
+
+    def _run(self, effect, stop_event):
+        started = self.clock()
+        due = started
+        while not stop_event.is_set():
+            cpu = time.thread_time()
+            try:
+                self.output(effect.render(self.clock() - started))
+            except Exception as e:
+                print(f"燈光效果錯誤: {e}")
+                return
+            self.render_seconds += time.thread_time() - cpu
+            self.frames += 1
+
+            due += self.interval
+            delay = due - self.clock()
+            if delay < 0:
+                missed = int(-delay / self.interval) + 1
+                self.skipped += missed
+                due += missed * self.interval
+                delay += missed * self.interval
+            stop_event.wait(delay)
+
+    @property
+    def running(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    def _stop(self):
+        self.stop_event.set()
+        if self.thread is not None and threading.current_thread() is not self.thread:
+            self.thread.join(timeout=2)
+        self.thread = None
+        self.effect = None
+
+    def stop(self):
+        """停止播放，燈條保持最後的畫面"""
+        with self.lock:
+            self._stop()
+
+    def stats(self):
+        return {
+            'frames': self.frames,
+            'skipped': self.skipped,
+            'cpu_per_frame_ms': self.render_seconds / self.frames * 1000 if self.frames else 0.0,
+        }
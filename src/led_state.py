@@ -0,0 +1,119 @@
+import threading
+import time
+
+from src.animation import DEFAULT_TICK_RATE
+
+
+class LedState:
+    """LED 畫面狀態：記住燈條目前的畫面，只在畫面改變時寫入，並把一連串指令合併成每個顯示 tick 最多一次寫入
+
+    - 和燈條上已經顯示的畫面相同的指令直接略過（redundant），不會再對匯流排送一次 show()
+    - 距離上次寫入還不到一個 tick 時先記下來，由寫入執行緒在 tick 到時寫出最新的畫面；
+      期間又被新指令取代的畫面不會送出（coalesced）
+    - 距離上次寫入超過一個 tick 時立刻在呼叫端寫入，單一指令沒有額外延遲
+    """
+
+    def __init__(self, backend, led_count=1, tick_rate=DEFAULT_TICK_RATE, clock=time.monotonic):
+        self.backend = backend
+        self.led_count = led_count
+        self.interval = 1.0 / tick_rate
+        self.clock = clock
+        self.cond = threading.Condition()
+        self.shown = None  # 燈條上的畫面（每顆 LED 的 RGB tuple）；None 表示還沒寫過
+        self.pending = None  # 等待下一個 tick 寫出的畫面
+        self.next_write = None  # 下一次可以寫入的時間
+        self.running = True
+
+        # 統計
+        self.requests = 0
+        self.writes = 0
+        self.redundant = 0  # 和燈條上相同而略過
+        self.coalesced = 0  # 還沒寫出就被新畫面取代
+
+        self.thread = threading.Thread(target=self._run, name='led-writer', daemon=True)
+        self.thread.start()
+
+    def fill(self, color):
+        """整條設成同一個顏色"""
+        self.show((tuple(color),) * self.led_count)
+
+    def set_pixel(self, index, color):
+        """只改一顆 LED，其他保持目前的畫面"""
+        with self.cond:
+            frame = list(self.pending or self.shown or ((0, 0, 0),) * self.led_count)
+        frame[index] = tuple(color)
+        self.show(frame)
+
+    def show(self, colors):
+        """設定整條燈條的畫面（RGB 列表或 (led_count, 3) 陣列）"""
+        if hasattr(colors, 'tolist'):
+            frame = tuple(map(tuple, colors.tolist()))
+        else:
+            frame = tuple(tuple(int(c) for c in color) for color in colors)
+        with self.cond:
+            self.requests += 1
+            if self.pending is not None:
+                # 還沒寫出的畫面被取代；新畫面和燈條上一樣時就不必再寫
+                self.coalesced += 1
+                self.pending = None if frame == self.shown else frame
+                return
+            if frame == self.shown:
+                self.redundant += 1
+                return
+            if self.next_write is not None and self.clock() < self.next_write:
+                self.pending = frame
+                self.cond.notify()
+                return
+            self._write(frame)
+
+    def _write(self, frame):
+        """（持有鎖）送出畫面；整條同色時用 fill，驅動可以一次設定"""
+        try:
+            if len(set(frame)) == 1:
+                self.backend.fill(frame[0])
+            else:
+                self.backend.show(frame)
+        except Exception as e:
+            print(f"LED 輸出錯誤: {e}")
+        self.shown = frame
+        self.writes += 1
+        self.next_write = self.clock() + self.interval
+
+    def _run(self):
+        with self.cond:
+            while self.running:
+                if self.pending is None:
+                    self.cond.wait()
+                    continue
+                delay = self.next_write - self.clock()
+                if delay > 0:
+                    # 模擬時鐘不會自己前進，最多等一個 tick 再檢查
+                    self.cond.wait(min(delay, self.interval))
+                    continue
+                frame, self.pending = self.pending, None
+                self._write(frame)
+
+    def flush(self):
+        """立刻寫出還在等待的畫面"""
+        with self.cond:
+            if self.pending is not None:
+                frame, self.pending = self.pending, None
+                self._write(frame)
+
+    def stats(self):
+        with self.cond:
+            return {
+                'requests': self.requests,
+                'writes': self.writes,
+                'redundant': self.redundant,
+                'coalesced': self.coalesced,
+            }
+
+    def close(self):
+        """寫出最後的畫面並停止寫入執行緒"""
+        self.flush()
+        with self.cond:
+            self.running = False
+            self.cond.notify()
+        if threading.current_thread() is not self.thread:
+            self.thread.join(timeout=2)
@@ -0,0 +1,145 @@
+import heapq
+import itertools
+import threading
+import time
+from concurrent.futures import Future
+
+
+class _Job:
+    def __init__(self, gesture, start):
+        self.gesture = gesture
+        self.start = start
+        self.future = Future()
+        self.pending = 0  # 還有關鍵影格沒播完的軌道數
+        self.revoked = set()
+
+
+class MotionScheduler:
+    """專用的動作執行緒：依時間走訪預先編譯的動作陣列，呼叫端拿到 Future，可取消與搶佔"""
+
+    def __init__(self, outputs, clock=time.monotonic, sleep=None):
+        self.outputs = outputs  # 軌道名稱 -> 輸出函式，例如 {'servo': set_duty, 'led': fill}
+        self.clock = clock
+        self.sleep = sleep  # 模擬時鐘使用；預設以條件變數等待，新指令可提早喚醒
+        self.events = []
+        self.active = {}
+        self.counter = itertools.count()
+        self.cond = threading.Condition()
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name='motion-scheduler', daemon=True)
+        self.thread.start()
+
+    def submit(self, gesture, preempt=True):
+        """排入 CompiledGesture，回傳 Future；preempt 時會中斷同軌道上正在進行的動作"""
+        with self.cond:
+            job = _Job(gesture, self.clock())
+            for track in gesture.tracks:
+                if track not in self.outputs:
+                    raise ValueError(f"未知的軌道: {track}")
+            for track in gesture.tracks:
+                current = self.active.get(track)
+                if current is not None and preempt:
+                    self._revoke(current, track)
+                self.active[track] = job
+                # 每個軌道在佇列中只放下一個要輸出的位置，播完再放下一個
+                self._push(job, track, 0)
+
+            if job.pending == 0:
+                job.future.set_result(gesture.name)
+            else:
+                job.future.add_done_callback(lambda future: self._job_done(job))
+            self.cond.notify()
+        return job.future
+
+    def _push(self, job, track, position):
+        if position >= len(job.gesture.change_ticks[track]):
+            return False
+        due = job.start + job.gesture.keyframe_time(track, position)
+        heapq.heappush(self.events, (due, next(self.counter), job, track, position))
+        if position == 0:
+            job.pending += 1
+        return True
+
+    def _job_done(self, job):
+        """呼叫端自行 cancel() 時，立刻送出取消值並釋放軌道"""
+        if not job.future.cancelled():
+            return
+        with self.cond:
+            for track in job.gesture.tracks:
+                self._revoke(job, track)
+            self.cond.notify()
+
+    def cancel(self, track=None):
+        """取消指定軌道（或全部）上正在進行的動作"""
+        with self.cond:
+            for name, job in list(self.active.items()):
+                if track is None or name == track:
+                    self._revoke(job, name)
+            self.cond.notify()
+
+    def _revoke(self, job, track):
+        """收回動作的某個軌道；所有軌道都被收回時取消整個 Future"""
+        if track in job.revoked:
+            return
+        job.revoked.add(track)
+        if self.active.get(track) is job:
+            del self.active[track]
+        self._apply_cancel_value(job, track)
+        if job.revoked >= set(job.gesture.tracks):
+            job.future.cancel()
+
+    def _apply_cancel_value(self, job, track):
+        if track in job.gesture.cancel_values:
+            self._output(track, job.gesture.cancel_values[track])
+
+    def _output(self, track, value):
+        try:
+            self.outputs[track](value)
+        except Exception as e:
+            print(f"動作輸出錯誤 ({track}): {e}")
+
+    def _run(self):
+        while True:
+            with self.cond:
+                while self.running and not self.events:
+                    self.cond.wait()
+                if not self.running:
+                    return
+
+                due, _, job, track, position = self.events[0]
+                delay = due - self.clock()
+                if delay <= 0:
+                    heapq.heappop(self.events)
+                    if track in job.revoked or job.future.cancelled():
+                        # 被搶佔的軌道不再往下走
+                        job.pending -= 1
+                    else:
+                        # 在鎖內輸出，避免被搶佔後還送出舊的值
+                        self._output(track, job.gesture.change_values[track][position])
+                        if not self._push(job, track, position + 1):
+                            job.pending -= 1
+                    if job.pending == 0:
+                        self._finish(job)
+                    continue
+                if self.sleep is None:
+                    self.cond.wait(delay)
+                    continue
+
+            self.sleep(delay)
+
+    def _finish(self, job):
+        for name in list(job.gesture.tracks):
+            if self.active.get(name) is job:
+                del self.active[name]
+        if not job.future.done():
+            job.future.set_result(job.gesture.name)
+
+    def shutdown(self):
+        """取消所有動作並停止執行緒"""
+        self.cancel()
+        with self.cond:
+            self.running = False
+            self.events.clear()
+            self.cond.notify()
+        if threading.current_thread() is not self.thread:
+            self.thread.join(timeout=2)
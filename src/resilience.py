@@ -0,0 +1,237 @@
+import collections
+import contextvars
+import os
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import requests
+from ibm_cloud_sdk_core import ApiException
+
+# 服務端暫時性的錯誤，重試可能成功
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+class DeadlineExceeded(Exception):
+    """呼叫（含重試）超過期限"""
+
+
+class CircuitOpenError(Exception):
+    """斷路器開啟中：服務連續失敗，暫時不呼叫直接失敗"""
+
+
+class _AttemptTimeout(Exception):
+    """單次嘗試超過 timeout；期限還沒到時可以重試"""
+
+
+def is_retryable(error):
+    """5xx / 429、連線錯誤與逾時可以重試；4xx 等用戶端錯誤重試也沒用"""
+    if isinstance(error, ApiException):
+        return error.status_code in RETRYABLE_STATUS
+    return isinstance(error, (_AttemptTimeout, requests.exceptions.ConnectionError, requests.exceptions.Timeout))
+
+
+class CircuitBreaker:
+    """連續失敗 failure_threshold 次就開啟，reset_timeout 秒內直接拒絕；之後放行一次試探，成功才恢復"""
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.state = 'closed'  # closed / open / half_open
+        self.failures = 0
+        self.opened_at = None
+        self.trial = False  # half_open 時是否已經放行試探的呼叫
+
+    def allow(self):
+        with self.lock:
+            if self.state == 'open':
+                if self.clock() - self.opened_at < self.reset_timeout:
+                    return False
+                self.state = 'half_open'
+                self.trial = True
+                return True
+            if self.state == 'half_open':
+                return False  # 試探的呼叫還沒有結果
+            return True
+
+    def record_success(self):
+        with self.lock:
+            self.state = 'closed'
+            self.failures = 0
+            self.trial = False
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.state == 'half_open' or self.failures >= self.failure_threshold:
+                if self.state != 'open':
+                    print(f"斷路器開啟：連續失敗 {self.failures} 次，{self.reset_timeout:.0f} 秒內暫停呼叫")
+                self.state = 'open'
+                self.opened_at = self.clock()
+                self.trial = False
+
+
+class ResiliencePolicy:
+    """Watson 呼叫共用的韌性策略：逾時與期限、指數退避重試、斷路器，以及選用的對沖請求
+
+    - timeout：單次嘗試最多等多久；deadline：含重試的整個呼叫最多多久
+    - 可重試的錯誤（5xx、429、連線錯誤、單次逾時）以 full jitter 指數退避重試 retries 次，只限冪等的呼叫
+    - hedge=True 時，嘗試超過最近成功延遲的 p95 還沒回來，就再送一個相同的請求，先回來的為準；
+      對沖次數最多佔呼叫數的 hedge_budget，避免服務變慢時流量加倍
+    逾時的請求在背景執行緒上跑完後丟棄，呼叫端不必等它。
+    """
+
+    def __init__(self, name, timeout=10.0, deadline=None, retries=2, backoff=0.2, max_backoff=2.0,
+                 hedge=False, hedge_min_samples=20, hedge_budget=0.1, failure_threshold=5, reset_timeout=30.0,
+                 clock=time.monotonic, sleep=time.sleep, seed=None):
+        self.name = name
+        self.timeout = timeout
+        self.deadline = deadline or timeout * (retries + 1)
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.hedge = hedge
+        self.hedge_min_samples = hedge_min_samples
+        self.hedge_budget = hedge_budget
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout, clock)
+        self.sleep = sleep
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.latencies = collections.deque(maxlen=100)  # 最近成功嘗試的秒數
+        self.executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix=f'{name}-call')
+
+        # 統計
+        self.calls = 0
+        self.retried = 0
+        self.timeouts = 0
+        self.failures = 0
+        self.rejected = 0  # 斷路器開啟而直接失敗
+        self.hedges = 0
+        self.hedge_wins = 0  # 對沖的請求比原本的先回來
+
+    @classmethod
+    def from_env(cls, name, timeout):
+        """依環境變數建立：WATSON_TIMEOUT_SCALE（逾時倍率）、WATSON_RETRIES、WATSON_HEDGE"""
+        return cls(
+            name,
+            timeout=timeout * float(os.getenv('WATSON_TIMEOUT_SCALE', '1')),
+            retries=int(os.getenv('WATSON_RETRIES', '2')),
+            hedge=os.getenv('WATSON_HEDGE', 'false').lower() == 'true',
+        )
+
+    def hedge_delay(self):
+        """最近成功延遲的 p95；樣本不夠時回傳 None（不對沖）"""
+        with self.lock:
+            if len(self.latencies) < self.hedge_min_samples:
+                return None
+            ordered = sorted(self.latencies)
+        return ordered[int(0.95 * (len(ordered) - 1))]
+
+    def call(self, fn, idempotent=True):
+        """以策略執行 fn()；失敗時丟出最後的錯誤、DeadlineExceeded 或 CircuitOpenError"""
+        with self.lock:
+            self.calls += 1
+        deadline = time.monotonic() + self.deadline
+        attempts = self.retries + 1 if idempotent else 1
+        for attempt in range(attempts):
+            if not self.breaker.allow():
+                with self.lock:
+                    self.rejected += 1
+                raise CircuitOpenError(f"{self.name} 暫停呼叫（連續失敗）")
+            try:
+                result = self._attempt(fn, deadline, idempotent and self.hedge)
+            except Exception as e:
+                retryable = is_retryable(e)
+                if retryable:
+                    self.breaker.record_failure()
+                else:
+                    # 用戶端錯誤不是服務的問題，不計入斷路器
+                    self.breaker.record_success()
+                remaining = deadline - time.monotonic()
+                pause = self.rng.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+                if not retryable or attempt == attempts - 1 or remaining <= pause:
+                    with self.lock:
+                        self.failures += 1
+                    if isinstance(e, _AttemptTimeout) or (retryable and remaining <= pause):
+                        raise DeadlineExceeded(f"{self.name} 超過期限 {self.deadline:.1f} 秒: {e}") from e
+                    raise
+                print(f"{self.name} 呼叫失敗，{pause * 1000:.0f} ms 後重試 ({attempt + 1}/{self.retries}): {e}")
+                with self.lock:
+                    self.retried += 1
+                self.sleep(pause)
+                continue
+            self.breaker.record_success()
+            return result
+
+    def _submit(self, fn):
+        # 帶著呼叫端的 context，追蹤紀錄才對得到對話回合
+        return self.executor.submit(contextvars.copy_context().run, self._timed, fn)
+
+    @staticmethod
+    def _timed(fn):
+        start = time.monotonic()
+        result = fn()
+        return result, time.monotonic() - start
+
+    def _take_hedge(self):
+        with self.lock:
+            if self.hedges + 1 > self.hedge_budget * self.calls + 1:
+                return False
+            self.hedges += 1
+            return True
+
+    def _attempt(self, fn, deadline, hedge):
+        started = time.monotonic()
+        limit = min(started + self.timeout, deadline)
+        delay = self.hedge_delay() if hedge else None
+        hedge_at = started + delay if delay is not None else None
+        futures = [self._submit(fn)]
+        while True:
+            for future in futures:
+                if future.done() and future.exception() is None:
+                    result, seconds = future.result()
+                    with self.lock:
+                        self.latencies.append(seconds)
+                        if future is not futures[0]:
+                            self.hedge_wins += 1
+                    return result
+            pending = [future for future in futures if not future.done()]
+            if not pending:
+                raise futures[-1].exception()
+
+            now = time.monotonic()
+            if now >= limit:
+                with self.lock:
+                    self.timeouts += 1
+                    # 逾時的嘗試也算進延遲分布，p95 才不會因為只看到快的而偏低
+                    self.latencies.append(self.timeout)
+                raise _AttemptTimeout(f"{self.name} 單次嘗試超過 {limit - started:.2f} 秒")
+            wake = limit
+            if hedge_at is not None and len(futures) == 1:
+                if now >= hedge_at:
+                    if self._take_hedge():
+                        futures.append(self._submit(fn))
+                        continue
+                    hedge_at = None
+                else:
+                    wake = min(wake, hedge_at)
+            wait(pending, timeout=wake - now, return_when=FIRST_COMPLETED)
+
+    def stats(self):
+        with self.lock:
+            return {
+                'calls': self.calls,
+                'retries': self.retried,
+                'timeouts': self.timeouts,
+                'failures': self.failures,
+                'rejected': self.rejected,
+                'hedges': self.hedges,
+                'hedge_wins': self.hedge_wins,
+                'breaker': self.breaker.state,
+            }
+
+    def close(self):
+        self.executor.shutdown(wait=False)
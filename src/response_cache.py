@@ -0,0 +1,123 @@
+import collections
+import copy
+import hashlib
+import json
+import re
+import threading
+import time
+
+
+def normalize_text(text):
+    """小寫、合併空白、去掉頭尾標點，讓 "Wave!" 與 "wave" 使用同一個快取"""
+    text = re.sub(r'\s+', ' ', text.lower()).strip()
+    return text.strip('.!?,;: ')
+
+
+def user_defined_context(context):
+    """取出各技能的 user_defined 變數；system.state 每回合都會變，不納入快取鍵"""
+    skills = (context or {}).get('skills', {})
+    return {name: skill['user_defined'] for name, skill in sorted(skills.items()) if skill.get('user_defined')}
+
+
+def context_digest(context):
+    content = json.dumps(user_defined_context(context), sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()[:16]
+
+
+def context_dependent_nodes(skill_path):
+    """找出回覆會依上下文而不同的對話節點（子節點、slot、設定或讀取 context、跳轉）"""
+    with open(skill_path, encoding='utf-8') as f:
+        skill = json.load(f)
+
+    nodes = set()
+    for node in skill.get('dialog_nodes', []):
+        if (node.get('parent') or node.get('context') or node.get('next_step')
+                or node.get('type') in ('frame', 'slot', 'event_handler')
+                or '$' in (node.get('conditions') or '')
+                or '$' in json.dumps(node.get('output') or {})):
+            nodes.add(node['dialog_node'])
+            if node.get('title'):
+                nodes.add(node['title'])
+    return nodes
+
+
+class ResponseCache:
+    """Assistant 無狀態回覆的快取：以正規化文字與上下文摘要為鍵，有 TTL 與 LRU 淘汰"""
+
+    def __init__(self, ttl=300, max_items=128, bypass_nodes=(), clock=time.monotonic):
+        self.ttl = ttl
+        self.max_items = max_items
+        self.bypass_nodes = set(bypass_nodes)
+        self.clock = clock
+        self.entries = collections.OrderedDict()  # 鍵 -> (到期時間, 回覆)
+        self.lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.expirations = 0
+        self.evictions = 0
+        self.bypasses = 0
+
+    @staticmethod
+    def make_key(text, context):
+        return (normalize_text(text), context_digest(context))
+
+    def get(self, text, context):
+        """回傳快取的回覆（複本），沒有或過期時回傳 None"""
+        key = self.make_key(text, context)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires, response = entry
+            if self.clock() >= expires:
+                del self.entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+        return copy.deepcopy(response)
+
+    def is_cacheable(self, response, context):
+        """經過依上下文回覆的節點、或這回合改了 context 變數的回覆不快取"""
+        output = response.get('output', {})
+        visited = output.get('debug', {}).get('nodes_visited', [])
+        for node in visited:
+            if node.get('dialog_node') in self.bypass_nodes or node.get('title') in self.bypass_nodes:
+                return False
+        return user_defined_context(response.get('context')) == user_defined_context(context)
+
+    def put(self, text, context, response):
+        """寫入可快取的回覆，回傳是否有寫入"""
+        if not self.is_cacheable(response, context):
+            with self.lock:
+                self.bypasses += 1
+            return False
+
+        key = self.make_key(text, context)
+        with self.lock:
+            self.entries[key] = (self.clock() + self.ttl, copy.deepcopy(response))
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_items:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+        return True
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self):
+        """回傳命中、過期、淘汰與略過的統計"""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'expirations': self.expirations,
+            'evictions': self.evictions,
+            'bypasses': self.bypasses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'items': len(self.entries),
+        }
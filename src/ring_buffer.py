@@ -0,0 +1,89 @@
+import numpy as np
+
+
+class RingBuffer:
+    """單一生產者／單一消費者的環形音訊緩衝區
+
+    記憶體在建立時一次配置好，寫入只做一次複製，不再配置新的陣列，適合放在即時錄音回調裡。
+    生產者只更新 write_index，消費者只更新 read_index；兩者都是持續遞增的整數，
+    在 GIL 下指定整數是原子操作，所以不需要鎖。先複製資料再更新索引，消費者看到的
+    資料一定已經寫好。
+
+    緩衝區滿了還要寫入時，放不下的部分會被丟掉並記一次 overrun（xrun），
+    已經寫入、還沒讀取的資料不會被覆蓋。
+    """
+
+    def __init__(self, capacity, channels=1, dtype=np.int16):
+        self.capacity = int(capacity)
+        self.channels = channels
+        self.dtype = np.dtype(dtype)
+        self.data = np.zeros((self.capacity, channels), dtype=self.dtype)
+        self.write_index = 0  # 只有生產者修改
+        self.read_index = 0  # 只有消費者修改
+        self.overruns = 0  # 寫入時放不下的次數
+        self.dropped_frames = 0
+
+    def available(self):
+        """可以讀取的幀數"""
+        return self.write_index - self.read_index
+
+    def free(self):
+        """還可以寫入的幀數"""
+        return self.capacity - (self.write_index - self.read_index)
+
+    def write(self, block):
+        """（生產者）寫入一個 (幀數, 聲道) 區塊，回傳實際寫入的幀數"""
+        frames = len(block)
+        write_index = self.write_index
+        free = self.capacity - (write_index - self.read_index)
+        if frames > free:
+            self.overruns += 1
+            self.dropped_frames += frames - free
+            frames = free
+        if frames <= 0:
+            return 0
+
+        start = write_index % self.capacity
+        first = min(frames, self.capacity - start)
+        self.data[start:start + first] = block[:first]
+        if frames > first:
+            self.data[:frames - first] = block[first:frames]
+        self.write_index = write_index + frames
+        return frames
+
+    def peek(self, max_frames=None):
+        """（消費者）取得可讀資料的檢視，不複製
+
+        回傳 0～2 個陣列檢視（跨過緩衝區尾端時分成兩段）。檢視直接指向緩衝區，
+        處理完再呼叫 advance()；advance 之後生產者就可能覆寫這些位置。
+        """
+        read_index = self.read_index
+        frames = self.write_index - read_index
+        if max_frames is not None:
+            frames = min(frames, max_frames)
+        if frames <= 0:
+            return ()
+
+        start = read_index % self.capacity
+        first = min(frames, self.capacity - start)
+        if frames == first:
+            return (self.data[start:start + frames],)
+        return (self.data[start:], self.data[:frames - first])
+
+    def advance(self, frames):
+        """（消費者）標記已經讀完 frames 幀，釋出空間給生產者"""
+        self.read_index += min(frames, self.write_index - self.read_index)
+
+    def read(self, max_frames=None):
+        """（消費者）取出資料的複本並前進讀取位置"""
+        views = self.peek(max_frames)
+        if not views:
+            return np.zeros((0, self.channels), dtype=self.dtype)
+        data = np.concatenate(views, axis=0) if len(views) > 1 else views[0].copy()
+        self.advance(len(data))
+        return data
+
+    def reset(self):
+        """清空緩衝區（只能在生產者停止時呼叫）；overrun 計數保留"""
+        self.write_index = 0
+        self.read_index = 0
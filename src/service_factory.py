@@ -0,0 +1,216 @@
+import collections
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from ibm_cloud_sdk_core import ApiException
+from ibm_cloud_sdk_core.authenticators import IAMAuthenticator
+from ibm_cloud_sdk_core.token_managers.iam_token_manager import IAMTokenManager
+
+
+class ConnectionStats:
+    """記錄每次呼叫的總時間與建立連線（TCP + TLS）花費的時間"""
+
+    def __init__(self, history=256):
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.calls = 0
+        self.new_connections = 0
+        self.connect_seconds = 0.0
+        self.recent = collections.deque(maxlen=history)  # (方法, 主機, 總秒數, 建立連線秒數)
+
+    def begin_call(self):
+        self.local.setup = 0.0
+
+    def record_connect(self, seconds):
+        # 連線在呼叫端的執行緒上建立，所以用 thread-local 對應到目前這次呼叫
+        self.local.setup = getattr(self.local, 'setup', 0.0) + seconds
+        with self.lock:
+            self.new_connections += 1
+            self.connect_seconds += seconds
+
+    def end_call(self, method, host, seconds):
+        setup = getattr(self.local, 'setup', 0.0)
+        with self.lock:
+            self.calls += 1
+            self.recent.append((method, host, seconds, setup))
+        return setup
+
+    def summary(self):
+        with self.lock:
+            return {
+                'calls': self.calls,
+                'new_connections': self.new_connections,
+                'reused_connections': max(self.calls - self.new_connections, 0),
+                'connect_seconds': self.connect_seconds,
+            }
+
+
+def _timed_pool(pool_cls, connection_cls, stats):
+    """建立會回報 connect() 時間的連線池類別"""
+
+    class TimedConnection(connection_cls):
+        def connect(self):
+            start = time.perf_counter()
+            super().connect()
+            stats.record_connect(time.perf_counter() - start)
+
+    return type(pool_cls.__name__, (pool_cls,), {'ConnectionCls': TimedConnection})
+
+
+class InstrumentedAdapter(HTTPAdapter):
+    """keep-alive 連線池，並在 response.connection_setup 標出這次呼叫建立連線的時間"""
+
+    def __init__(self, stats, **kwargs):
+        self.stats = stats
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, connections, maxsize, block=False, **pool_kwargs):
+        super().init_poolmanager(connections, maxsize, block=block, **pool_kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': _timed_pool(HTTPConnectionPool, HTTPConnection, self.stats),
+            'https': _timed_pool(HTTPSConnectionPool, HTTPSConnection, self.stats),
+        }
+
+    def send(self, request, **kwargs):
+        self.stats.begin_call()
+        start = time.perf_counter()
+        try:
+            response = super().send(request, **kwargs)
+        finally:
+            setup = self.stats.end_call(request.method, requests.utils.urlparse(request.url).netloc,
+                                        time.perf_counter() - start)
+        response.connection_setup = setup
+        return response
+
+
+class PooledIAMTokenManager(IAMTokenManager):
+    """IAM token 也走共用的連線池"""
+
+    def __init__(self, apikey, session, url=None):
+        super().__init__(apikey, url=url)
+        self.session = session
+        self.fetches = 0
+
+    def request_token(self):
+        self.fetches += 1
+        return super().request_token()
+
+    def _request(self, method, url, *, headers=None, params=None, data=None, auth_tuple=None, **kwargs):
+        kwargs = dict({"timeout": 60}, **kwargs)
+        kwargs = dict(kwargs, **self.http_config)
+        if self.disable_ssl_verification:
+            kwargs['verify'] = False
+
+        response = self.session.request(
+            method=method, url=url, headers=headers, params=params, data=data, auth=auth_tuple, **kwargs
+        )
+        if 200 <= response.status_code <= 299:
+            return response.json()
+        raise ApiException(response.status_code, http_response=response)
+
+    def refresh_due(self):
+        """SDK 會在 refresh_time 或到期前 IAM_EXPIRATION_WINDOW 秒同步取 token，取兩者較早者"""
+        return min(self.refresh_time, self.expire_time - self.IAM_EXPIRATION_WINDOW)
+
+    def refresh(self):
+        """在背景取得新 token，前景呼叫不會遇到過期而同步等待"""
+        token_response = self.request_token()
+        with self.lock:
+            self._save_token_info(token_response)
+
+
+class ServiceFactory:
+    """共用的 Watson 客戶端工廠：一個 keep-alive 連線池、相同 API key 共用一個 IAM token"""
+
+    def __init__(self, pool_connections=4, pool_maxsize=8, iam_url=None, refresh_ahead=60,
+                 background_refresh=True, poll_interval=30):
+        self.stats = ConnectionStats()
+        self.session = requests.Session()
+        adapter = InstrumentedAdapter(self.stats, pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        self.iam_url = iam_url
+        self.refresh_ahead = refresh_ahead  # 在 SDK 的更新時間之前多少秒先在背景更新
+        self.authenticators = {}  # API key -> IAMAuthenticator
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.refresher = None
+        self.background_refresh = background_refresh
+        self.poll_interval = poll_interval  # 背景執行緒最長多久檢查一次 token
+
+    def authenticator(self, apikey):
+        """相同 API key 回傳同一個 authenticator，token 只取一次"""
+        with self.lock:
+            authenticator = self.authenticators.get(apikey)
+            if authenticator is None:
+                authenticator = IAMAuthenticator(apikey, url=self.iam_url)
+                authenticator.token_manager = PooledIAMTokenManager(apikey, self.session, url=self.iam_url)
+                self.authenticators[apikey] = authenticator
+                if self.background_refresh and self.refresher is None:
+                    self.refresher = threading.Thread(target=self._refresh_loop, name='iam-refresh', daemon=True)
+                    self.refresher.start()
+            return authenticator
+
+    def create(self, service_cls, apikey, url, **kwargs):
+        """建立使用共用連線池與 token 的 SDK 客戶端"""
+        service = service_cls(authenticator=self.authenticator(apikey), **kwargs)
+        service.set_service_url(url)
+        service.set_http_client(self.session)
+        return service
+
+    def token_fetches(self):
+        with self.lock:
+            return sum(a.token_manager.fetches for a in self.authenticators.values())
+
+    def prefetch_tokens(self):
+        """啟動時先取好所有 token"""
+        with self.lock:
+            managers = [a.token_manager for a in self.authenticators.values()]
+        for manager in managers:
+            try:
+                manager.get_token()
+            except Exception as e:
+                print(f"IAM token 取得失敗: {e}")
+
+    def _refresh_loop(self):
+        while not self.stop_event.is_set():
+            with self.lock:
+                managers = [a.token_manager for a in self.authenticators.values()]
+
+            now = time.time()
+            next_wake = now + self.poll_interval
+            for manager in managers:
+                if not manager.access_token:
+                    continue  # 還沒有人用過，第一次由前景取得
+                due = manager.refresh_due() - self.refresh_ahead
+                if now >= due:
+                    try:
+                        manager.refresh()
+                    except Exception as e:
+                        print(f"IAM token 背景更新失敗: {e}")
+                        due = now + 5
+                    else:
+                        # token 壽命很短時，避免連續更新
+                        due = max(manager.refresh_due() - self.refresh_ahead, now + 1)
+                next_wake = min(next_wake, due)
+
+            self.stop_event.wait(min(max(next_wake - time.time(), 0.1), self.poll_interval))
+
+    def close(self):
+        self.stop_event.set()
+        if self.refresher is not None:
+            self.refresher.join(timeout=2)
+        self.session.close()
+
+
+def create_service(service_cls, apikey, url, factory=None, **kwargs):
+    """有工廠就用共用的連線池與 token，否則照舊各自建立"""
+    if factory is not None:
+        return factory.create(service_cls, apikey, url, **kwargs)
+    service = service_cls(authenticator=IAMAuthenticator(apikey), **kwargs)
+    service.set_service_url(url)
+    return service
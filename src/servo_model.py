@@ -0,0 +1,94 @@
+import math
+
+from src.animation import DEFAULT_TICK_RATE
+
+# 一般微型伺服馬達（SG90 類）在 5V 時約 0.1 秒轉 60 度
+DEFAULT_SERVO_SPEED = 600.0  # 度/秒
+
+
+def smoothstep(x):
+    """S 曲線：起點與終點速度為 0，中間最快"""
+    return x * x * (3.0 - 2.0 * x)
+
+
+class ServoModel:
+    """伺服馬達的位置模型：記住最後下達的位置，依轉動角度與速度排定每一步移動的時間
+
+    - 占空比 min_duty～max_duty 對應 0～degrees 度；占空比 0 表示停止 PWM（放開），不是位置
+    - 已經在目標位置的移動直接略過，不再空等
+    - 動作定義中每一步的時間是上限：轉得比定義快就提早做下一步，定義給的時間不夠轉到時照定義的時間換下一步
+    - smooth=True 時把一次移動拆成每個 tick 一小步、依 S 曲線加減速，減少抖動與衝擊
+    """
+
+    def __init__(self, speed=DEFAULT_SERVO_SPEED, settle=0.1, smooth=False, min_duty=2.5, max_duty=12.5,
+                 degrees=180.0, tick_rate=DEFAULT_TICK_RATE):
+        self.speed = speed
+        self.settle = settle  # 最後一步到位後，再等多久才停止 PWM
+        self.smooth = smooth
+        self.min_duty = min_duty
+        self.max_duty = max_duty
+        self.degrees = degrees
+        self.tick_rate = tick_rate
+        self.position = None  # 最後下達的占空比；None 表示不知道手臂在哪裡
+        self.active = False  # PWM 是否正在輸出
+        self.skipped = 0  # 略過的移動次數
+
+    def angle(self, duty):
+        return (duty - self.min_duty) / (self.max_duty - self.min_duty) * self.degrees
+
+    def move_time(self, start, target):
+        """從 start 轉到 target 需要的時間，進位到整數 tick；位置不明時以最遠的一端估計"""
+        angle = self.angle(target)
+        distance = max(angle, self.degrees - angle) if start is None else abs(angle - self.angle(start))
+        return math.ceil(distance / self.speed * self.tick_rate - 1e-9) / self.tick_rate
+
+    def commanded(self, duty):
+        """排程器實際輸出占空比時呼叫，更新模型的位置"""
+        if duty:
+            self.position = duty
+            self.active = True
+        else:
+            self.active = False
+
+    def plan(self, authored):
+        """把動作定義的 [(秒, 占空比)]（0 為放開）依手臂位置重新排成 [(秒, 占空比)] 關鍵影格；沒有事要做時回傳空列表"""
+        keyframes = []
+        elapsed = 0.0
+        position = self.position
+        active = self.active
+        tick = 1.0 / self.tick_rate
+        settle = self.settle
+        for i, (at, target) in enumerate(authored):
+            # 定義中到下一步的時間；最後一步沒有上限
+            budget = authored[i + 1][0] - at if i + 1 < len(authored) else None
+            if not target:
+                if active:
+                    # 有移動時等到位並穩定後才放開；只剩放開時立刻放開
+                    if keyframes:
+                        elapsed += settle
+                    keyframes.append((round(elapsed, 6), 0))
+                    active = False
+                continue
+            if target == position:
+                # 已經在位置上（放開後手臂也停在原處）
+                self.skipped += 1
+                continue
+
+            duration = self.move_time(position, target)
+            if budget is not None:
+                duration = min(duration, budget)
+                # 接著放開時，穩定的時間也要放進這一步的時間內
+                settle = min(self.settle, max(budget - duration, 0.0))
+            else:
+                settle = self.settle
+            steps = int(round(duration * self.tick_rate))
+            if self.smooth and position is not None and steps > 1:
+                for k in range(1, steps + 1):
+                    value = position + (target - position) * smoothstep(k / steps)
+                    keyframes.append((round(elapsed + k * tick, 6), round(value, 3)))
+            else:
+                keyframes.append((round(elapsed, 6), target))
+            elapsed += duration
+            position = target
+            active = True
+        return keyframes
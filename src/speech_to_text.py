@@ -1,28 +1,123 @@
-import sounddevice as sd
-import scipy.io.wavfile as wavfile
 import numpy as np
-from ibm_watson import SpeechToTextV1
-from ibm_cloud_sdk_core.authenticators import IAMAuthenticator
-import os
+from src.resilience import ResiliencePolicy
+from src.service_factory import create_service
 import threading
 import time
 import queue
+from src.voice_activity import Endpointer
+from src.audio_utils import PolyphaseResampler, encode_audio, resample
+from src.audio_input import SoundDeviceInput
+from src.ring_buffer import RingBuffer
+from src.tracing import now, tracer
+
+
+class _CaptureStream:
+    """包住錄音串流：開始時啟動消費執行緒，停止時先停錄音再把緩衝區剩下的音訊處理完
+
+    和 sd.InputStream 一樣有 start / stop / close 與 with 用法。
+    """
+
+    def __init__(self, stream, stt):
+        self.stream = stream
+        self.stt = stt
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.xruns_at_start = stt.xruns
+
+    def _run(self):
+        while not self.stop_event.is_set():
+            if not self.stt._process_pending():
+                self.stop_event.wait(0.01)
+        self.stt._process_pending()
+
+    def start(self):
+        self.thread = threading.Thread(target=self._run, name='stt-capture', daemon=True)
+        self.thread.start()
+        self.stream.start()
+
+    def stop(self):
+        if self.stop_event.is_set():
+            return
+        try:
+            self.stream.stop()
+        finally:
+            self.stop_event.set()
+            if self.thread is not None:
+                self.thread.join(timeout=2)
+        xruns = self.stt.xruns - self.xruns_at_start
+        if xruns:
+            print(f"錄音狀態警告: 發生 {xruns} 次 xrun（音訊遺失）")
+
+    def close(self):
+        self.stop()
+        self.stream.close()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
 
 class SpeechToText:
-    def __init__(self, apikey, url):
-        authenticator = IAMAuthenticator(apikey)
-        self.speech_to_text = SpeechToTextV1(authenticator=authenticator)
-        self.speech_to_text.set_service_url(url)
+    def __init__(self, apikey, url, streaming=False, vad=True, trailing_silence=0.6,
+                 target_rate=16000, upload_format='wav', factory=None, audio_input=None, policy=None):
+        # SDK 與 sounddevice 用到時才匯入，import 本模組不必載入
+        from ibm_watson import SpeechToTextV1
+
+        self.speech_to_text = create_service(SpeechToTextV1, apikey, url, factory)
+
+        # 整段上傳的識別加上逾時、重試與斷路器（串流識別是長連線，由自己的逾時處理）
+        self.policy = policy or ResiliencePolicy.from_env('stt', timeout=15.0)
+        self.speech_to_text.set_http_config({'timeout': self.policy.timeout})
         
         # 新增狀態管理
         self.is_recording = False
-        self.audio_queue = queue.Queue()
+        self.audio_queue = queue.Queue()  # 串流模式送給識別服務的 PCM 位元組
+        self.audio_chunks = []  # 一般模式錄到的音訊區塊
         self.recording_thread = None
         self.input_device_index = None
         self.sample_rate = 44100  # 預設採樣率
+
+        # 串流識別模式：邊錄音邊上傳
+        self.streaming = streaming
+        self.stream_to_recognizer = False
+
+        # 語音端點偵測：只保留說話的部分
+        self.vad = vad
+        self.trailing_silence = trailing_silence
+        self.endpointer = None
+        self.utterance_done = threading.Event()
+
+        # 上傳前降頻到識別模型需要的採樣率，並可選擇壓縮格式 (wav / flac / opus)
+        self.target_rate = target_rate
+        self.upload_format = upload_format
+        self.stream_resampler = None
+
+        # 錄音來源：預設是 USB 麥克風，也可以換成 ReplayInput 重播錄好的音檔
+        self.audio_input = audio_input
+
+        # 錄音回調只寫入預先配置的環形緩衝區；端點偵測、降頻與送出由消費執行緒處理
+        self.ring_seconds = 2.0  # 緩衝區長度，消費端最多可以落後這麼久
+        self.ring = None
+        self.xruns = 0  # 裝置回報溢位或緩衝區放不下的次數
+
+        # 常駐聆聽：錄音一直開著，聽到喚醒詞之前音訊只交給本地的 KeywordSpotter
+        self.always_on_stream = None
+        self.wake_spotter = None  # 目前的觸發器（KeywordSpotter / BargeInDetector）
+        self.wake_event = threading.Event()
+        self.trigger_callback = None
         
     def find_microphone(self):
         """尋找並設定麥克風設備 - 參考 audio_device_test.py 實現"""
+        if self.audio_input is not None:
+            self.sample_rate = self.audio_input.sample_rate
+            return True
+
+        import sounddevice as sd
+
         devices = sd.query_devices()
         print("錄音裝置列表:")
         
@@ -49,12 +144,95 @@ class SpeechToText:
         
         return True
 
+    def _open_input(self, dtype='float32'):
+        """開啟錄音串流：回呼 audio_callback 寫入環形緩衝區，消費執行緒隨串流啟動與停止"""
+        capacity = int(self.ring_seconds * self.sample_rate)
+        if self.ring is None or self.ring.capacity != capacity or self.ring.dtype != np.dtype(dtype):
+            self.ring = RingBuffer(capacity, dtype=dtype)
+        else:
+            self.ring.reset()
+        source = self.audio_input or SoundDeviceInput(self.input_device_index, self.sample_rate)
+        return _CaptureStream(source.open(self.audio_callback, blocksize=1024, dtype=dtype), self)
+
     def audio_callback(self, indata, frames, time, status):
-        """音訊回調函數，用於即時錄音"""
+        """音訊回調函數：只把區塊複製進環形緩衝區，不配置記憶體、不做其他處理"""
         if status:
-            print(f"錄音狀態警告: {status}")
-        if self.is_recording:
-            self.audio_queue.put(indata.copy())
+            self.xruns += 1
+        if not self.is_recording:
+            return
+        if self.ring.write(indata) < len(indata):
+            self.xruns += 1
+
+    def _process_pending(self):
+        """消費端：以零複製檢視取出緩衝區內的音訊處理，回傳處理的幀數"""
+        views = self.ring.peek()
+        frames = 0
+        for view in views:
+            self._process_block(view)
+            frames += len(view)
+        # 端點偵測器保留的前置音訊也是檢視；只有最近 pre_roll 秒，
+        # 遠小於緩衝區長度，在生產者繞回覆寫前就會被送出或丟棄
+        self.ring.advance(frames)
+        return frames
+
+    def _process_block(self, block):
+        """端點偵測後把音訊送往識別服務（串流）或收進錄音（一般模式）"""
+        trigger = self.wake_spotter
+        if trigger is not None:
+            # 常駐模式：還沒觸發（喚醒詞或插話），音訊只在本地判斷，不送出
+            if trigger.process(block):
+                self._on_trigger(trigger)
+            return
+
+        if self.endpointer is not None:
+            # 丟棄開頭靜音，尾端靜音超過設定時間即結束這一句
+            blocks = self.endpointer.process(block)
+        else:
+            blocks = [block]
+
+        for block in blocks:
+            if self.stream_to_recognizer:
+                # 串流模式直接送出降頻後的 int16 PCM 位元組
+                self.audio_queue.put(self._stream_bytes(block))
+            else:
+                self.audio_chunks.append(block.copy())
+
+        # 這一句的音訊都送出後才通知說完話
+        if self.endpointer is not None and self.endpointer.ended:
+            self.utterance_done.set()
+
+    def _on_trigger(self, trigger):
+        """觸發後改為端點偵測並送出音訊；觸發前已經開始說的話一併送出"""
+        tracer.instant('stt.trigger', trigger=type(trigger).__name__)
+        self.wake_spotter = None
+        self._start_endpointing()
+        floor = getattr(trigger, 'noise_floor_db', None)
+        if self.endpointer is not None and floor is not None:
+            # 觸發時多半已經在說話，背景噪音以觸發前的估計為準
+            self.endpointer.noise_floor_db = floor
+        if self.trigger_callback is not None:
+            try:
+                self.trigger_callback(trigger)
+            except Exception as e:
+                print(f"觸發處理錯誤: {e}")
+        self.wake_event.set()
+        for block in getattr(trigger, 'onset_audio', ()):
+            self._process_block(block)
+
+    def _stream_bytes(self, block):
+        """串流模式下把區塊降頻成 target_rate 的 int16 位元組"""
+        if self.stream_resampler is None:
+            return block.tobytes()
+        resampled = self.stream_resampler.process(block)
+        return np.clip(np.round(resampled), -32768, 32767).astype(np.int16).tobytes()
+
+    def _start_endpointing(self):
+        """依設定建立新的端點偵測器"""
+        self.utterance_done.clear()
+        if self.vad:
+            self.endpointer = Endpointer(self.sample_rate, trailing_silence=self.trailing_silence)
+        else:
+            self.endpointer = None
 
     def start_recording(self):
         """開始錄音（非阻塞）"""
@@ -62,17 +240,12 @@ class SpeechToText:
             return False
             
         self.is_recording = True
-        self.audio_queue = queue.Queue()
+        self.audio_chunks = []
+        self._start_endpointing()
         
         try:
             # 使用 InputStream 進行即時錄音
-            self.stream = sd.InputStream(
-                samplerate=self.sample_rate,
-                channels=1,
-                device=self.input_device_index,
-                callback=self.audio_callback,
-                blocksize=1024
-            )
+            self.stream = self._open_input()
             self.stream.start()
             print("開始錄音...")
             return True
@@ -97,10 +270,9 @@ class SpeechToText:
         
         print("錄音結束，處理音訊...")
         
-        # 從 queue 收集所有音訊數據
-        audio_chunks = []
-        while not self.audio_queue.empty():
-            audio_chunks.append(self.audio_queue.get())
+        # 收集消費執行緒整理好的音訊數據
+        audio_chunks = self.audio_chunks
+        self.audio_chunks = []
         
         if not audio_chunks:
             print("沒有錄到音訊")
@@ -112,48 +284,53 @@ class SpeechToText:
         # 轉換為 int16
         audio_data = (audio_data * 32767).astype(np.int16)
         
-        # 儲存為臨時檔案
-        filename = "temp_recording.wav"
-        wavfile.write(filename, self.sample_rate, audio_data)
-        
-        # 檢查檔案
-        file_size = os.path.getsize(filename)
-        print(f"錄音檔案大小: {file_size} bytes")
-        
-        if file_size < 1000:
-            print("警告：錄音檔案太小，可能沒有錄到聲音")
-            return ""
-        
-        # 進行語音識別
+        # 在記憶體中編碼並識別，不寫入暫存檔
         try:
-            with open(filename, 'rb') as audio_file:
-                result = self.speech_to_text.recognize(
-                    audio=audio_file,
-                    content_type='audio/wav',
-                    model='en-US_BroadbandModel',
-                ).get_result()
-            
-            # 清理臨時檔案
-            os.remove(filename)
-            
-            # 提取文字
-            if 'results' in result and len(result['results']) > 0:
-                transcript = result['results'][0]['alternatives'][0]['transcript']
-                print(f"識別結果: {transcript}")
-                return transcript
-            else:
-                print("沒有識別到語音")
-                return ""
-                
+            return self._recognize_recording(audio_data)
         except Exception as e:
             print(f"語音識別錯誤: {e}")
             return ""
 
+    def prepare_upload(self, recording):
+        """把 int16 錄音降頻並編碼成上傳格式，回傳 (位元組, Content-Type)"""
+        rate = self.target_rate or self.sample_rate
+        audio = resample(recording.reshape(-1), self.sample_rate, rate)
+        return encode_audio(audio, rate, self.upload_format)
+
+    def _recognize_recording(self, recording):
+        """把 int16 錄音在記憶體中降頻、編碼並送出識別"""
+        if len(recording) < 0.05 * self.sample_rate:
+            print("警告：錄音太短，可能沒有錄到聲音")
+            return ""
+
+        with tracer.span('stt.encode', format=self.upload_format) as span:
+            audio_bytes, content_type = self.prepare_upload(recording)
+            span.set(bytes=len(audio_bytes))
+        print(f"錄音大小: {len(audio_bytes)} bytes ({content_type})")
+
+        with tracer.span('stt.request', bytes=len(audio_bytes)):
+            result = self.policy.call(lambda: self.speech_to_text.recognize(
+                audio=audio_bytes,
+                content_type=content_type,
+                model='en-US_BroadbandModel',
+            ).get_result())
+
+        # 提取文字（服務回傳的結果結尾帶有空白）
+        if 'results' in result and len(result['results']) > 0:
+            transcript = result['results'][0]['alternatives'][0]['transcript'].strip()
+            print(f"識別結果: {transcript}")
+            return transcript
+        else:
+            print("沒有識別到語音")
+            return ""
+
     def listen(self):
         """簡化的錄音方法 - 參考 audio_device_test.py 的直接錄音方式"""
+        if self.streaming:
+            return self.listen_streaming()
+
         # 參數設定
-        duration = 5  # 錄音秒數
-        filename = "temp_recording.wav"
+        duration = 5  # 最長錄音秒數
         
         # 尋找麥克風設備
         if not self.find_microphone():
@@ -161,65 +338,215 @@ class SpeechToText:
         
         print("開始錄音")
         try:
-            # 直接錄音 - 參考 audio_device_test.py 的方式
-            recording = sd.rec(
-                int(duration * self.sample_rate), 
-                samplerate=self.sample_rate, 
-                channels=1, 
-                dtype='int16', 
-                device=self.input_device_index
-            )
-            sd.wait()
+            # 偵測到說完話就結束，最多錄 duration 秒
+            with tracer.span('stt.capture'):
+                recording = self._capture_utterance(duration)
             print("錄音結束")
-            
-            # 儲存成 wav
-            wavfile.write(filename, self.sample_rate, recording)
-            print(f"錄音已儲存為 {filename}")
-            
-            # 檢查檔案大小
-            file_size = os.path.getsize(filename)
-            print(f"錄音檔案大小: {file_size} bytes")
-            
-            if file_size < 1000:
-                print("警告：錄音檔案太小，可能沒有錄到聲音")
+
+            if recording is None:
+                print("沒有偵測到語音")
                 return ""
             
-            # 進行語音識別
-            with open(filename, 'rb') as audio_file:
-                result = self.speech_to_text.recognize(
-                    audio=audio_file,
-                    content_type='audio/wav',
-                    model='en-US_BroadbandModel',
-                ).get_result()
-            
-            # 清理臨時檔案
-            os.remove(filename)
-            
-            # 提取文字
-            if 'results' in result and len(result['results']) > 0:
-                transcript = result['results'][0]['alternatives'][0]['transcript']
-                print(f"識別結果: {transcript}")
-                return transcript
-            else:
-                print("沒有識別到語音")
-                return ""
+            return self._recognize_recording(recording)
                 
         except Exception as e:
             print(f"錄音或識別錯誤: {e}")
             return ""
 
+    def _capture_utterance(self, max_duration):
+        """以 InputStream 錄下一句話（int16），沒有錄到音訊時回傳 None"""
+        self.audio_chunks = []
+        self._start_endpointing()
+        self.is_recording = True
+        try:
+            with self._open_input(dtype='int16'):
+                self.utterance_done.wait(max_duration)
+        finally:
+            self.is_recording = False
+
+        audio_chunks = self.audio_chunks
+        self.audio_chunks = []
+
+        if not audio_chunks:
+            return None
+        return np.concatenate(audio_chunks, axis=0)
+
+    def listen_streaming(self, max_duration=5, on_interim=None):
+        """串流錄音：音訊一邊錄一邊送到識別服務，說完話即回傳最終結果"""
+        from src.streaming_recognizer import StreamingRecognizer
+
+        if not self.find_microphone():
+            return ""
+
+        self.audio_queue = queue.Queue()
+        self._start_endpointing()
+        recognizer = StreamingRecognizer(self.speech_to_text, on_interim=on_interim)
+
+        stream_rate = self.target_rate or self.sample_rate
+        if stream_rate != self.sample_rate:
+            self.stream_resampler = PolyphaseResampler(self.sample_rate, stream_rate)
+        else:
+            self.stream_resampler = None
+
+        self.stream_to_recognizer = True
+        self.is_recording = True
+        stream = None
+        capture_start = None
+        try:
+            stream = self._open_input(dtype='int16')
+            recognizer.start(self.audio_queue, stream_rate)
+            stream.start()
+            capture_start = now()
+            print("開始串流錄音...")
+
+            self._wait_for_utterance(recognizer, max_duration)
+        except Exception as e:
+            print(f"串流錄音錯誤: {e}")
+        finally:
+            self.is_recording = False
+            self.stream_to_recognizer = False
+            if stream is not None:
+                try:
+                    stream.stop()
+                    stream.close()
+                except:
+                    pass
+            capture_end = now()
+            recognizer.close()
+            if capture_start is not None:
+                # 識別與錄音同時進行，request 只算停止錄音後等待最終結果的時間
+                tracer.record('stt.capture', capture_start, capture_end, streaming=True)
+                tracer.record('stt.request', capture_end, now(), streaming=True)
+
+        transcript = recognizer.transcript
+        if transcript:
+            print(f"識別結果: {transcript}")
+        else:
+            print("沒有識別到語音")
+        return transcript
+
+    def _wait_for_utterance(self, recognizer, max_duration):
+        """收到第一個最終結果或偵測到說完話就停止錄音，最多錄 max_duration 秒"""
+        deadline = time.monotonic() + max_duration
+        while time.monotonic() < deadline and not recognizer.final_event.is_set():
+            if self.utterance_done.wait(0.05):
+                # 說完了：送出 stop 讓服務立即回傳最後結果
+                recognizer.finish_audio()
+                break
+
+    def listen_for_keyword(self, spotter, stop_event=None, max_duration=5, on_interim=None):
+        """常駐聆聽：本地偵測到喚醒詞後，才把接下來說的話送去識別並回傳文字
+
+        等待喚醒詞時音訊不會上傳。錄音串流在多次呼叫之間保持開啟，由 stop_always_on() 關閉；
+        stop_event 被設定時回傳空字串。
+        """
+        return self._listen_after_trigger(spotter, stop_event, max_duration, on_interim, None, "聽到喚醒詞")
+
+    def listen_for_barge_in(self, detector, stop_event=None, max_duration=5, on_interim=None, on_trigger=None):
+        """播放回覆時也持續聆聽：BargeInDetector 扣掉回音後聽到有人說話，就識別這句話並回傳文字
+
+        on_trigger(detector) 在偵測到說話的當下（錄音執行緒中）呼叫，用來立即停止播放；
+        開始說話到觸發之間的音訊也會送去識別。
+        """
+        return self._listen_after_trigger(detector, stop_event, max_duration, on_interim, on_trigger, "偵測到說話")
+
+    def _listen_after_trigger(self, trigger, stop_event, max_duration, on_interim, on_trigger, message):
+        if self.always_on_stream is None:
+            if not self.find_microphone():
+                return ""
+            stream_rate = self.target_rate or self.sample_rate
+            if self.streaming and stream_rate != self.sample_rate:
+                self.stream_resampler = PolyphaseResampler(self.sample_rate, stream_rate)
+            else:
+                self.stream_resampler = None
+            try:
+                self.always_on_stream = self._open_input(dtype='int16')
+                self.always_on_stream.start()
+            except Exception as e:
+                print(f"常駐錄音錯誤: {e}")
+                self.always_on_stream = None
+                return ""
+            print("常駐聆聽中...")
+
+        # 先準備好觸發之後音訊的去處，再開始接收音訊
+        self.audio_queue = queue.Queue()
+        self.audio_chunks = []
+        self.stream_to_recognizer = self.streaming
+        self.trigger_callback = on_trigger
+        self.wake_event.clear()
+        trigger.reset()
+        self.wake_spotter = trigger
+        self.is_recording = True
+
+        while not self.wake_event.wait(0.1):
+            if stop_event is not None and stop_event.is_set():
+                self.is_recording = False
+                self.wake_spotter = None
+                return ""
+
+        print(message)
+        capture_start = now()
+        recognizer = None
+        try:
+            if self.streaming:
+                from src.streaming_recognizer import StreamingRecognizer
+
+                recognizer = StreamingRecognizer(self.speech_to_text, on_interim=on_interim)
+                recognizer.start(self.audio_queue, self.target_rate or self.sample_rate)
+                self._wait_for_utterance(recognizer, max_duration)
+            else:
+                self.utterance_done.wait(max_duration)
+        finally:
+            self.is_recording = False
+            self.stream_to_recognizer = False
+        capture_end = now()
+        tracer.record('stt.capture', capture_start, capture_end, wake_word=True)
+
+        try:
+            if recognizer is not None:
+                recognizer.close()
+                tracer.record('stt.request', capture_end, now(), streaming=True)
+                transcript = recognizer.transcript
+                print(f"識別結果: {transcript}" if transcript else "沒有識別到語音")
+                return transcript
+
+            audio_chunks = self.audio_chunks
+            self.audio_chunks = []
+            if not audio_chunks:
+                print("沒有偵測到語音")
+                return ""
+            return self._recognize_recording(np.concatenate(audio_chunks, axis=0))
+        except Exception as e:
+            print(f"語音識別錯誤: {e}")
+            return ""
+
+    def stop_always_on(self):
+        """關閉常駐聆聽的錄音串流"""
+        self.wake_spotter = None
+        self.is_recording = False
+        stream, self.always_on_stream = self.always_on_stream, None
+        if stream is not None:
+            try:
+                stream.close()
+            except Exception:
+                pass
+
     def start_microphone(self):
         """檢查麥克風是否準備好"""
         return self.find_microphone()
+
+    def stop_microphone(self):
+        """關閉錄音（包含常駐聆聽）"""
+        self.stop_always_on()
         
     def recognize_audio(self, audio_data, content_type='audio/webm'):
         """識別音訊檔案"""
         try:
-            result = self.speech_to_text.recognize(
+            result = self.policy.call(lambda: self.speech_to_text.recognize(
                 audio=audio_data,
                 content_type=content_type,
                 model='en-US_BroadbandModel',
-            ).get_result()
+            ).get_result())
 
             if 'results' in result and len(result['results']) > 0:
                 transcript = result['results'][0]['alternatives'][0]['transcript']
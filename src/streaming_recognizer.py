@@ -0,0 +1,140 @@
+import threading
+import time
+from urllib.parse import urlencode
+from ibm_watson.websocket import AudioSource, RecognizeCallback, RecognizeListener
+
+
+class _StreamingCallback(RecognizeCallback):
+    """把 websocket 事件轉交給 StreamingRecognizer"""
+
+    def __init__(self, recognizer):
+        RecognizeCallback.__init__(self)
+        self.recognizer = recognizer
+
+    def on_data(self, data):
+        results = data.get('results') or []
+        if not results:
+            return
+        alternatives = results[0].get('alternatives') or []
+        if not alternatives:
+            return
+        transcript = alternatives[0].get('transcript', '').strip()
+        if results[0].get('final'):
+            self.recognizer._handle_final(transcript)
+        else:
+            self.recognizer._handle_interim(transcript)
+
+    def on_error(self, error):
+        print(f"串流識別錯誤: {error}")
+        self.recognizer._finish()
+
+    def on_inactivity_timeout(self, error):
+        print(f"串流識別逾時: {error}")
+        self.recognizer._finish()
+
+    def on_close(self):
+        self.recognizer._finish()
+
+
+class StreamingRecognizer:
+    """邊錄音邊上傳的串流語音識別（Watson websocket 介面）"""
+
+    def __init__(self, speech_to_text, model='en-US_BroadbandModel',
+                 end_of_phrase_silence_time=0.4, inactivity_timeout=10,
+                 on_interim=None, on_final=None):
+        self.speech_to_text = speech_to_text
+        self.model = model
+        self.end_of_phrase_silence_time = end_of_phrase_silence_time
+        self.inactivity_timeout = inactivity_timeout
+        self.on_interim = on_interim
+        self.on_final = on_final
+
+        self.audio_source = None
+        self.thread = None
+        self.interim_transcripts = []
+        self.final_transcripts = []
+        self.first_final_at = None
+        self.final_event = threading.Event()
+        self.closed_event = threading.Event()
+
+    def start(self, audio_queue, sample_rate):
+        """開始從 audio_queue 讀取 int16 PCM 位元組並串流到識別服務（非阻塞）"""
+        self.audio_source = AudioSource(audio_queue, is_recording=True, is_buffer=True)
+        self.interim_transcripts = []
+        self.final_transcripts = []
+        self.first_final_at = None
+        self.final_event.clear()
+        self.closed_event.clear()
+
+        content_type = f'audio/l16; rate={sample_rate}; channels=1'
+        self.thread = threading.Thread(
+            target=self._run,
+            args=(content_type,),
+            daemon=True
+        )
+        self.thread.start()
+
+    def _run(self, content_type):
+        # SDK 的 recognize_using_websocket 不會送出 interim_results，這裡自行組出請求
+        client = self.speech_to_text
+        request = {'headers': dict(client.default_headers or {})}
+        options = {
+            'content_type': content_type,
+            'interim_results': True,
+            'end_of_phrase_silence_time': self.end_of_phrase_silence_time,
+            'inactivity_timeout': self.inactivity_timeout,
+        }
+        try:
+            if client.authenticator:
+                client.authenticator.authenticate(request)
+            url = client.service_url.replace('https:', 'wss:').replace('http:', 'ws:')
+            url += '/v1/recognize?{0}'.format(urlencode({'model': self.model}))
+
+            RecognizeListener(
+                self.audio_source,
+                options,
+                _StreamingCallback(self),
+                url,
+                request['headers'],
+                verify=True if client.disable_ssl_verification else None
+            )
+        except Exception as e:
+            print(f"串流識別錯誤: {e}")
+        finally:
+            self._finish()
+
+    def _handle_interim(self, transcript):
+        self.interim_transcripts.append(transcript)
+        if self.on_interim:
+            self.on_interim(transcript)
+
+    def _handle_final(self, transcript):
+        if self.first_final_at is None:
+            self.first_final_at = time.monotonic()
+        self.final_transcripts.append(transcript)
+        self.final_event.set()
+        if self.on_final:
+            self.on_final(transcript)
+
+    def _finish(self):
+        self.final_event.set()
+        self.closed_event.set()
+
+    def finish_audio(self):
+        """通知已經沒有更多音訊，送出 stop 讓服務回傳最後結果"""
+        if self.audio_source:
+            self.audio_source.completed_recording()
+
+    def wait_for_final(self, timeout=None):
+        """等待第一個最終結果，回傳文字（逾時回傳空字串）"""
+        self.final_event.wait(timeout)
+        return self.transcript
+
+    def close(self, timeout=2):
+        """結束串流並等待連線關閉"""
+        self.finish_audio()
+        self.closed_event.wait(timeout)
+
+    @property
+    def transcript(self):
+        return " ".join(t for t in self.final_transcripts if t)
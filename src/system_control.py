@@ -1,13 +1,9 @@
 import streamlit as st
 import os
 from dotenv import load_dotenv
-import time
-import RPi.GPIO as GPIO
 
-from src.watson_assistant import WatsonAssistant
-from src.text_to_speech import TextToSpeech
-from src.speech_to_text import SpeechToText
-from src.hardware_control import HardwareControl
+from src.tjbot_service import TJBotClient
+from src.tracing import tracer
 
 
 load_dotenv()
@@ -17,31 +13,18 @@ class SystemControl:
     def initialize_system():
         """初始化系統"""
         try:
-
-            GPIO.setwarnings(False)
-            GPIO.cleanup()
-
-            # Watson Assistant
-            st.session_state.assistant = WatsonAssistant(
-                os.getenv('ASSISTANT_APIKEY'),
-                os.getenv('ASSISTANT_URL'),
-                os.getenv('ASSISTANT_ID'),
-                version='2023-04-15'
-            )
-            
-            # Text to Speech
-            st.session_state.tts = TextToSpeech(
-                os.getenv('TTS_APIKEY'),
-                os.getenv('TTS_URL')
-            )
-            
-            # 測試 Speech to Text
-            st.session_state.stt = SpeechToText(
-                os.getenv('STT_APIKEY'),
-                os.getenv('STT_URL')
-            )
-            
-            st.session_state.hardware = HardwareControl()
+            service_url = os.getenv('TJBOT_SERVICE_URL')
+            if service_url:
+                # 常駐服務已擁有所有元件，這裡只建立客戶端
+                client = TJBotClient(service_url)
+                # UI 這一側的追蹤跟著服務的設定
+                tracer.configure(enabled=client.status().get('tracing', False))
+                st.session_state.tjbot = client
+            else:
+                # 本機模式：元件跟著 Streamlit 行程（Watson SDK、scipy 等到這時才載入）
+                from src.tjbot_runtime import TJBotRuntime
+
+                st.session_state.tjbot = TJBotRuntime.from_env()
 
             if 'chat_history' not in st.session_state:
                 st.session_state.chat_history = []
@@ -54,26 +37,12 @@ class SystemControl:
         
 
     def shutdown_system():
-        """關閉系統和清理資源"""
-        if st.session_state.hardware:
-            # 關閉 LED
-            st.session_state.hardware.shine("off")
-            # 放下手臂
-            st.session_state.hardware.lower_arm()
-            # 清理資源
-            st.session_state.hardware.cleanup()
-        
-        if st.session_state.stt:
-            try:
-                st.session_state.stt.stop_microphone()
-            except:
-                pass
-        
-        # 重置狀態
-        st.session_state.assistant = None
-        st.session_state.tts = None
-        st.session_state.stt = None
-        st.session_state.hardware = None
+        """關閉系統和清理資源（服務模式只中斷連線，服務繼續執行）"""
+        if st.session_state.get('tjbot'):
+            st.session_state.tjbot.close()
 
+        # 重置狀態
+        st.session_state.tjbot = None
+        st.session_state.wake_word_enabled = False
 
-        return True
\ No newline at end of file
+        return True
@@ -1,17 +1,89 @@
+import contextvars
 import os
+import re
 import subprocess
-from ibm_watson import TextToSpeechV1
-from ibm_cloud_sdk_core.authenticators import IAMAuthenticator
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from src.resilience import ResiliencePolicy
+from src.service_factory import create_service
+from src.audio_utils import decode_wav
+from src.tracing import now, tracer
+from src.audio_output import AplayOutput, AudioOutput, NullOutput, find_output_device, forget_cached_device, load_cached_device, save_cached_device
+
+
+def split_sentences(text, min_length=20):
+    """把文字切成句子，太短的片段併入下一句以免請求過多"""
+    parts = [p.strip() for p in re.split(r'(?<=[.!?。！？])\s+', text.strip()) if p.strip()]
+    sentences = []
+    pending = ""
+    for part in parts:
+        pending = f"{pending} {part}".strip()
+        if len(pending) >= min_length:
+            sentences.append(pending)
+            pending = ""
+    if pending:
+        if sentences and len(pending) < min_length:
+            sentences[-1] = f"{sentences[-1]} {pending}"
+        else:
+            sentences.append(pending)
+    return sentences
+
 
 class TextToSpeech:
-    def __init__(self, apikey, url):
-        self.authenticator = IAMAuthenticator(apikey)
-        self.text_to_speech = TextToSpeechV1(authenticator=self.authenticator)
-        self.text_to_speech.set_service_url(url)
+    def __init__(self, apikey, url, cache=None, voice='en-US_AllisonV3Voice', output=None, factory=None,
+                 policy=None):
+        from ibm_watson import TextToSpeechV1
+
+        self.text_to_speech = create_service(TextToSpeechV1, apikey, url, factory)
+        self.authenticator = self.text_to_speech.authenticator
+
+        # 逾時、重試與斷路器；合成是冪等的，可以重試與對沖
+        self.policy = policy or ResiliencePolicy.from_env('tts', timeout=10.0)
+        self.text_to_speech.set_http_config({'timeout': self.policy.timeout})
+
+        # 播放輸出：stream = 常駐 OutputStream，aplay = 每段話啟動 aplay，none = 不播放
+        self.audio_device = None
+        self.output = self._create_output(output or os.getenv('TTS_OUTPUT', 'stream'))
+
+        self.voice = voice  # 可以更改為其他聲音
+        self.accept = 'audio/wav'
+        self.cache = cache  # TTSCache，重複的句子不必再連網合成
+
+        # 句子平行合成，第一句合成好就開始播放
+        self.executor = ThreadPoolExecutor(max_workers=3, thread_name_prefix='tts')
+        self.last_time_to_first_audio = None
+
+        # 插話 (barge-in) 時中斷目前的播放
+        self.interrupted = threading.Event()
+        self.playing = False
+        self.stopped_at = None  # 上一次播放停止的時間 (tracing.now)，用來量測插話後多久安靜下來
+        self.interrupt_slice = 0.25  # 每次寫入的秒數，決定中斷的反應時間
+
+    def _create_output(self, output):
+        """建立播放輸出，常駐串流無法使用時退回 aplay"""
+        if not isinstance(output, str):
+            return output
+        if output == 'none':
+            return NullOutput()
+        if output == 'stream':
+            try:
+                return AudioOutput(find_output_device())
+            except Exception as e:
+                print(f"無法使用常駐音訊串流，改用 aplay: {e}")
         self.audio_device = self._detect_audio_device()
+        return AplayOutput(self.audio_device)
 
     def _detect_audio_device(self):
-        """自動偵測可用的音頻設備"""
+        """自動偵測可用的音頻設備（結果會快取，重新啟動時不必再逐一測試）"""
+        cached = load_cached_device('aplay_device')
+        if cached:
+            # 重新開機或重新插拔後 USB 音效卡的編號可能改變，快取的設備要先確認還能用
+            if self._test_audio_device(cached):
+                return cached
+            print(f"快取的音頻設備 {cached} 無法使用，重新偵測")
+            forget_cached_device('aplay_device')
+
         try:
             # 列出所有音頻設備
             result = subprocess.run(['aplay', '-l'], capture_output=True, text=True)
@@ -35,6 +107,7 @@ class TextToSpeech:
                                 # 測試設備是否可用
                                 if self._test_audio_device(device_id):
                                     print(f"找到可用音頻設備: {device_id}")
+                                    save_cached_device('aplay_device', device_id)
                                     return device_id
             
             # 如果沒找到，使用預設值
@@ -57,18 +130,96 @@ class TextToSpeech:
 
     def speak(self, text):
         """使用 IBM Watson Text to Speech 將文字轉為語音並播放"""
+        self.speak_many([text])
+
+    def speak_many(self, texts, stop_event=None):
+        """把多段回應切成句子平行合成，依序無縫播放；被 interrupt() 或 stop_event 中斷時回傳 False"""
+        chunks = [sentence for text in texts for sentence in split_sentences(text)]
+        if not chunks:
+            return True
+
+        # 每次播放使用自己的事件，舊的中斷不會影響下一次播放
+        stop_event = stop_event or threading.Event()
+        self.interrupted = stop_event
+        self.playing = True
+        started = time.monotonic()
+        trace_start = now()
+        playback_start = None
+        # 帶著目前的 context 到合成執行緒，追蹤紀錄才對得到對話回合
+        futures = [self.executor.submit(contextvars.copy_context().run, self.synthesize_audio, chunk)
+                   for chunk in chunks]
+        first = True
         try:
-            with open('response.wav', 'wb') as audio_file:
-                response = self.text_to_speech.synthesize(
-                    text,
-                    voice='en-US_AllisonV3Voice',  # 可以更改為其他聲音
-                    accept='audio/wav'
-                ).get_result()
-                audio_file.write(response.content)
-            print("Audio file saved as response.wav")
-            
-            # 使用自動偵測的音頻設備
-            os.system(f"aplay -D {self.audio_device} response.wav")
-            
+            for future in futures:
+                sample_rate, channels, pcm = decode_wav(future.result())
+                if first:
+                    first = False
+                    self.last_time_to_first_audio = time.monotonic() - started
+                    print(f"首段音訊延遲: {self.last_time_to_first_audio * 1000:.0f} ms")
+                    playback_start = now()
+                    tracer.record('tts.first_audio', trace_start, playback_start, sentences=len(chunks))
+                # 依序寫入同一個輸出，句子之間不會有空隙；分段寫入以便隨時中斷
+                step = max(int(sample_rate * self.interrupt_slice), 1) * channels
+                for start in range(0, len(pcm), step):
+                    if stop_event.is_set():
+                        break
+                    self.output.play(pcm[start:start + step], sample_rate, channels)
+                if stop_event.is_set():
+                    break
         except Exception as e:
-            print(f"Error in TTS: {e}")
\ No newline at end of file
+            print(f"Error in TTS: {e}")
+        finally:
+            for future in futures:
+                future.cancel()
+            abort = getattr(self.output, 'abort', None)
+            if stop_event.is_set() and abort is not None:
+                abort()  # 丟掉緩衝區裡還沒播的音訊
+            else:
+                self.output.finish()
+            self.stopped_at = now()
+            self.playing = False
+            if playback_start is not None:
+                tracer.record('tts.playback', playback_start, now(), interrupted=stop_event.is_set())
+        return not stop_event.is_set()
+
+    def interrupt(self):
+        """中斷正在播放的回應（可從其他執行緒呼叫）"""
+        self.interrupted.set()
+
+    def synthesize_audio(self, text):
+        """合成語音，回傳記憶體中的 WAV 位元組（有快取時優先使用快取）"""
+        if self.cache is None:
+            return self._synthesize(text)
+        return self.cache.get_or_synthesize(text, self.voice, self.accept, lambda: self._synthesize(text))
+
+    def _synthesize(self, text):
+        with tracer.span('tts.synthesize', chars=len(text)):
+            response = self.policy.call(lambda: self.text_to_speech.synthesize(
+                text,
+                voice=self.voice,
+                accept=self.accept
+            ).get_result())
+            return response.content
+
+    def prewarm(self, texts):
+        """預先合成常用回應並寫入快取"""
+        if self.cache is None:
+            return 0
+        warmed = 0
+        # 以播放時相同的句子切分寫入快取
+        for text in (sentence for t in texts for sentence in split_sentences(t)):
+            if self.cache.get(text, self.voice, self.accept) is not None:
+                continue
+            try:
+                self.cache.put(text, self.voice, self.accept, self._synthesize(text))
+                warmed += 1
+            except Exception as e:
+                print(f"預先合成失敗 ({text}): {e}")
+        print(f"TTS 快取預熱完成，新增 {warmed} 句")
+        return warmed
+
+    def close(self):
+        """關閉播放輸出與合成執行緒"""
+        self.output.close()
+        self.executor.shutdown(wait=False)
+        self.policy.close()
@@ -0,0 +1,419 @@
+import collections
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from src.watson_assistant import WatsonAssistant
+from src.text_to_speech import TextToSpeech
+from src.hardware_control import HardwareControl
+from src.led_effects import EFFECTS
+from src.tts_cache import TTSCache, load_skill_responses
+from src.intent_classifier import IntentClassifier
+from src.response_cache import ResponseCache, context_dependent_nodes
+from src.service_factory import ServiceFactory
+from src.conversation_pipeline import ConversationPipeline, PipelineThread
+from src.tracing import tracer
+
+SKILL_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'materials', 'TJBot Skill Sample.json')
+
+# 喚醒詞樣板：資料夾內的 WAV 各是一次說 "TJBot" 的錄音（python -m src.keyword_spotter 錄製）
+WAKE_WORD_DIR = os.path.join(os.path.dirname(SKILL_PATH), 'wake_word')
+
+# 保留最近幾個語音觸發的回合，介面據此補上對話歷史
+VOICE_TURN_HISTORY = 50
+
+# 可以直接呼叫的動作（對應 HardwareControl 的方法）
+GESTURES = ('wave', 'raise_arm', 'lower_arm', 'dance')
+
+
+def turn_result(turn):
+    """把對話回合轉成可序列化的結果"""
+    intent = turn.fast_intent or (turn.intents[0]['intent'] if turn.intents else None)
+    return {
+        'text': turn.text,
+        'replies': list(turn.replies),
+        'intents': list(turn.intents),
+        'entities': list(turn.entities),
+        'fast_intent': turn.fast_intent,
+        'intent': intent,
+    }
+
+
+def format_startup_times(startup_times):
+    """啟動時間明細，依耗時由大到小排列"""
+    total = startup_times.get('total')
+    lines = [f"系統啟動完成: {total:.2f} 秒" if total is not None else "系統啟動時間:"]
+    for name, seconds in sorted(startup_times.items(), key=lambda item: -item[1]):
+        if name != 'total':
+            lines.append(f"  {name:<18}{seconds * 1000:>8.0f} ms")
+    return "\n".join(lines)
+
+
+def _build_assistant(factory):
+    """Watson Assistant（選用回覆快取，依上下文回覆的節點一律不快取）"""
+    response_cache = None
+    if os.getenv('ASSISTANT_CACHE', 'false').lower() == 'true':
+        bypass = context_dependent_nodes(SKILL_PATH)
+        bypass.update(n.strip() for n in os.getenv('ASSISTANT_CACHE_BYPASS', '').split(',') if n.strip())
+        response_cache = ResponseCache(
+            ttl=float(os.getenv('ASSISTANT_CACHE_TTL', '300')),
+            bypass_nodes=bypass
+        )
+    return WatsonAssistant(
+        os.getenv('ASSISTANT_APIKEY'),
+        os.getenv('ASSISTANT_URL'),
+        os.getenv('ASSISTANT_ID'),
+        version='2023-04-15',
+        cache=response_cache,
+        factory=factory
+    )
+
+
+def _build_tts(factory):
+    """Text to Speech（包含播放裝置偵測）"""
+    return TextToSpeech(
+        os.getenv('TTS_APIKEY'),
+        os.getenv('TTS_URL'),
+        cache=TTSCache(
+            os.path.expanduser(os.getenv('TTS_CACHE_DIR', '~/.cache/tjbot/tts')),
+            max_disk_bytes=int(os.getenv('TTS_CACHE_MB', '50')) * 1024 * 1024
+        ),
+        factory=factory
+    )
+
+
+def _build_stt(factory):
+    """Speech to Text（錄音裝置在第一次錄音時才開啟）"""
+    from src.speech_to_text import SpeechToText
+
+    return SpeechToText(
+        os.getenv('STT_APIKEY'),
+        os.getenv('STT_URL'),
+        streaming=os.getenv('STT_STREAMING', 'false').lower() == 'true',
+        upload_format=os.getenv('STT_UPLOAD_FORMAT', 'wav'),
+        factory=factory
+    )
+
+
+def _build_spotter(sample_rate):
+    """依 WAKE_WORD_DIR 的樣板建立喚醒詞偵測器，沒有樣板時回傳 None"""
+    from src.keyword_spotter import KeywordSpotter
+
+    path = os.path.expanduser(os.getenv('WAKE_WORD_DIR') or WAKE_WORD_DIR)
+    threshold = os.getenv('WAKE_WORD_THRESHOLD')
+    spotter = KeywordSpotter(sample_rate, threshold=float(threshold) if threshold else None)
+    if not os.path.isdir(path) or not spotter.enroll_directory(path):
+        print(f"沒有喚醒詞樣板: {path}")
+        return None
+    return spotter
+
+
+def _build_barge_in(stt):
+    """語音對話模式：播放時麥克風也開著，扣掉回音後聽到說話就插話（有喚醒詞樣板時閒置時改聽喚醒詞）"""
+    from src.echo_suppression import BargeInDetector
+
+    if not stt.start_microphone():
+        print("沒有麥克風，無法使用語音插話")
+        return None
+    idle_trigger = None
+    if os.getenv('WAKE_WORD', 'false').lower() == 'true':
+        idle_trigger = _build_spotter(stt.sample_rate)
+    return BargeInDetector(stt.sample_rate, idle_trigger=idle_trigger)
+
+
+def _build_classifier():
+    """本機意圖分類：高信心的硬體指令不等雲端回覆直接執行"""
+    if os.getenv('INTENT_FAST_PATH', 'true').lower() != 'true':
+        return None
+    return IntentClassifier.from_skill(
+        SKILL_PATH,
+        threshold=float(os.getenv('INTENT_FAST_PATH_THRESHOLD', '0.55'))
+    )
+
+
+class TJBotRuntime:
+    """擁有 Watson 客戶端、音訊、硬體與對話管線的長駐執行環境
+
+    Streamlit（本機模式）與 tjbot_service 常駐服務都透過這個類別操作 TJBot，
+    TJBotClient 提供相同的方法，讓介面不必知道元件在哪個行程裡。
+    """
+
+    def __init__(self, assistant, tts=None, stt=None, hardware=None, classifier=None, factory=None,
+                 barge_in_detector=None):
+        self.assistant = assistant
+        self.tts = tts
+        self.stt = stt
+        self.hardware = hardware
+        self.classifier = classifier
+        self.factory = factory
+        self.started = time.time()
+        self.startup_times = {}  # 元件名稱 -> 建立秒數（from_env 建立時填入）
+        self.lock = threading.Lock()  # 麥克風一次只給一個請求使用
+
+        # 常駐聆聽：背景執行緒等待喚醒詞，之後說的話直接送進對話管線
+        self.spotter = None
+        self.wake_thread = None
+        self.wake_stop = threading.Event()
+        # 喚醒詞或語音插話觸發的回合不經過 message()，拿到回覆時記下來（介面與 /status 顯示）
+        self.voice_turns = collections.deque(maxlen=VOICE_TURN_HISTORY)
+
+        # 語音插話：播放的音訊同時交給偵測器當作回音參考，管線持續聆聽麥克風
+        self.barge_in_detector = barge_in_detector if stt is not None else None
+        if self.barge_in_detector is not None and tts is not None:
+            from src.audio_output import MonitoredOutput
+
+            tts.output = MonitoredOutput(tts.output, self.barge_in_detector.add_reference,
+                                         self.barge_in_detector.stop_reference)
+
+        # 對話管線在背景事件迴圈執行，拿到回覆即可回傳，語音與動作平行進行；
+        # 沒有回音消除時麥克風會聽到自己的回覆，所以只有語音插話模式才讓管線持續聆聽
+        self.pipeline = PipelineThread(ConversationPipeline(
+            assistant,
+            tts=tts,
+            hardware=hardware,
+            classifier=classifier,
+            stt=stt if self.barge_in_detector is not None else None,
+            barge_in_detector=self.barge_in_detector,
+            on_event=self._on_pipeline_event
+        ))
+
+    @classmethod
+    def from_env(cls, parallel=True):
+        """依環境變數建立所有元件；互不相依的元件同時建立，並記錄各自花費的時間"""
+        started = time.perf_counter()
+        startup_times = {}
+
+        # 延遲追蹤（預設關閉，關閉時幾乎沒有負擔）
+        tracer.configure(
+            enabled=os.getenv('TRACING', 'false').lower() == 'true',
+            jsonl_path=os.path.expanduser(os.getenv('TRACE_FILE', ''))
+        )
+
+        def timed(name, build):
+            start = time.perf_counter()
+            result = build()
+            startup_times[name] = time.perf_counter() - start
+            return result
+
+        # 所有 Watson 客戶端共用一個 keep-alive 連線池，相同 API key 共用 IAM token
+        factory = timed('service_factory', lambda: ServiceFactory(
+            pool_maxsize=int(os.getenv('WATSON_POOL_MAXSIZE', '8')),
+            iam_url=os.getenv('IAM_URL') or None
+        ))
+
+        # 三個 Watson 客戶端共用同一個 SDK，先載入一次，避免各執行緒互相等待 import 鎖
+        timed('watson_sdk', lambda: __import__('ibm_watson'))
+
+        builders = {
+            'assistant': lambda: _build_assistant(factory),
+            'tts': lambda: _build_tts(factory),
+            'stt': lambda: _build_stt(factory),
+            'hardware': HardwareControl,
+            'intent_classifier': _build_classifier,
+        }
+        components = {}
+        if parallel:
+            # 播放裝置偵測（PortAudio、aplay 試播）與 GPIO / NeoPixel 初始化大多在等 I/O，可以彼此重疊
+            with ThreadPoolExecutor(max_workers=len(builders), thread_name_prefix='init') as executor:
+                futures = {name: executor.submit(timed, name, build) for name, build in builders.items()}
+                for name, future in futures.items():
+                    components[name] = future.result()
+        else:
+            for name, build in builders.items():
+                components[name] = timed(name, build)
+
+        # 背景預先合成技能中的固定回應
+        if os.getenv('TTS_PREWARM', 'true').lower() == 'true':
+            threading.Thread(
+                target=components['tts'].prewarm,
+                args=(load_skill_responses(SKILL_PATH),),
+                daemon=True
+            ).start()
+
+        # 背景先取好 IAM token，第一次對話不必等
+        threading.Thread(target=factory.prefetch_tokens, daemon=True).start()
+
+        # 錄音降頻才用到的 scipy 載入要一秒多，系統可以對話後再在背景載入
+        threading.Thread(target=__import__, args=('scipy.signal',), daemon=True).start()
+
+        barge_in_detector = None
+        if components['stt'] is not None and os.getenv('VOICE_BARGE_IN', 'false').lower() == 'true':
+            barge_in_detector = timed('barge_in', lambda: _build_barge_in(components['stt']))
+
+        runtime = timed('pipeline', lambda: cls(
+            components['assistant'],
+            tts=components['tts'],
+            stt=components['stt'],
+            hardware=components['hardware'],
+            classifier=components['intent_classifier'],
+            factory=factory,
+            barge_in_detector=barge_in_detector
+        ))
+        startup_times['total'] = time.perf_counter() - started
+        runtime.startup_times = startup_times
+        print(format_startup_times(startup_times))
+
+        if os.getenv('WAKE_WORD', 'false').lower() == 'true' and barge_in_detector is None:
+            runtime.set_wake_word(True)
+        return runtime
+
+    def _on_pipeline_event(self, name, turn):
+        if name == 'reply' and turn.source == 'voice':
+            self.voice_turns.append(dict(turn_result(turn), id=turn.id))
+
+    def message(self, text, timeout=30):
+        """送出使用者訊息，拿到回覆就回傳（語音與動作在背景進行）"""
+        return turn_result(self.pipeline.ask(text, timeout))
+
+    def gesture(self, name):
+        """執行動作 (wave / raise_arm / lower_arm / dance)，不等動作做完"""
+        if self.hardware is None or name not in GESTURES:
+            return False
+        getattr(self.hardware, name)()
+        return True
+
+    def shine(self, color):
+        if self.hardware is None:
+            return False
+        self.hardware.shine(color)
+        return True
+
+    def effect(self, name, color='white'):
+        """播放燈光效果 (breathe / rainbow / chase / color_wheel)"""
+        if self.hardware is None or name not in EFFECTS:
+            return False
+        self.hardware.effect(name, color)
+        return True
+
+    def start_microphone(self):
+        return self.stt is not None and self.stt.start_microphone()
+
+    def listen(self):
+        """錄一句話並回傳識別結果"""
+        if self.stt is None or self.wake_word_active() or self.barge_in_detector is not None:
+            # 常駐聆聽或語音插話模式時，麥克風由背景聆聽使用
+            return ""
+        with self.lock:
+            return self.stt.listen() or ""
+
+    def wake_word_active(self):
+        return self.wake_thread is not None and self.wake_thread.is_alive()
+
+    def set_wake_word(self, enabled):
+        """開關常駐聆聽：說出喚醒詞後，接下來的話當成語音輸入送進對話管線，不必按按鈕"""
+        if not enabled:
+            self._stop_wake_word()
+            return False
+        if self.wake_word_active():
+            return True
+        if self.barge_in_detector is not None:
+            # 語音插話模式下由對話管線聆聽（喚醒詞設定為閒置時的觸發方式）
+            return False
+        if self.stt is None or not self.stt.start_microphone():
+            return False
+        if self.spotter is None:
+            self.spotter = _build_spotter(self.stt.sample_rate)
+            if self.spotter is None:
+                return False
+
+        self.wake_stop.clear()
+        self.wake_thread = threading.Thread(target=self._wake_word_loop, name='wake-word', daemon=True)
+        self.wake_thread.start()
+        return True
+
+    def _wake_word_loop(self):
+        while not self.wake_stop.is_set():
+            try:
+                text = self.stt.listen_for_keyword(self.spotter, stop_event=self.wake_stop)
+            except Exception as e:
+                print(f"常駐聆聽錯誤: {e}")
+                self.wake_stop.wait(1)
+                continue
+            if text and self.pipeline is not None:
+                self.pipeline.submit(text, source='voice')
+
+    def _stop_wake_word(self):
+        self.wake_stop.set()
+        if self.wake_thread is not None:
+            self.wake_thread.join(timeout=10)
+            self.wake_thread = None
+        if self.stt is not None:
+            self.stt.stop_always_on()
+
+    def interrupt(self):
+        """中斷正在播放的回覆與動作"""
+        self.pipeline.interrupt()
+        return True
+
+    def status(self):
+        return {
+            'uptime': time.time() - self.started,
+            'assistant': self.assistant is not None,
+            'tts': self.tts is not None,
+            'stt': self.stt is not None,
+            'stt_xruns': self.stt.xruns if self.stt is not None else 0,
+            'wake_word': self.wake_word_active(),
+            'voice_turns': list(self.voice_turns),
+            'voice_barge_in': self.barge_in_detector is not None,
+            'hardware': self.hardware.backend.name if self.hardware is not None else None,
+            'led_writes': self.hardware.leds.stats() if self.hardware is not None else None,
+            'fast_path': self.classifier is not None,
+            'startup': self.startup_times,
+            'tracing': tracer.enabled,
+            'resilience': {client.policy.name: client.policy.stats()
+                           for client in (self.assistant, self.tts, self.stt) if client is not None},
+        }
+
+    def set_tracing(self, enabled, clear=False):
+        """開關延遲追蹤，clear=True 時清掉已記錄的資料"""
+        tracer.configure(enabled=enabled)
+        if clear:
+            tracer.clear()
+        return tracer.enabled
+
+    def trace_stats(self):
+        """各階段最近的 p50/p95/p99（毫秒）"""
+        return tracer.stats()
+
+    def trace_events(self):
+        """Chrome trace 格式的追蹤紀錄"""
+        return tracer.chrome_trace()
+
+    def close(self):
+        """關閉系統和清理資源"""
+        self._stop_wake_word()
+
+        if self.pipeline is not None:
+            self.pipeline.stop()
+            self.pipeline = None
+
+        if self.hardware is not None:
+            # 關閉 LED
+            self.hardware.shine("off")
+            # 放下手臂，等動作完成再清理
+            try:
+                self.hardware.lower_arm().result(timeout=3)
+            except Exception as e:
+                print(f"放下手臂失敗: {e}")
+            # 清理資源
+            self.hardware.cleanup()
+            self.hardware = None
+
+        if self.tts is not None:
+            self.tts.close()
+            self.tts = None
+
+        if self.stt is not None:
+            try:
+                self.stt.stop_microphone()
+            except:
+                pass
+            self.stt = None
+
+        if self.factory is not None:
+            self.factory.close()
+            self.factory = None
+
+        tracer.close()
+        return True
@@ -0,0 +1,225 @@
+"""TJBot 常駐服務：一個長駐行程擁有硬體、音訊與 Watson 客戶端，透過本機 HTTP API 控制
+
+執行: python -m src.tjbot_service
+Streamlit 設定 TJBOT_SERVICE_URL 後只是這個服務的客戶端，重新整理頁面不會重建任何元件。
+
+API（JSON）:
+    GET  /status                     元件狀態，以及喚醒詞 / 語音插話觸發的對話回合 (voice_turns)
+    POST /message   {"text": ...}    送出訊息，回傳回覆與意圖
+    POST /gesture   {"name": ...}    wave / raise_arm / lower_arm / dance
+    POST /shine     {"color": ...}   改變 LED 顏色
+    POST /effect    {"name": ..., "color": ...}   燈光效果 breathe / rainbow / chase / color_wheel
+    POST /listen                     錄一句話並回傳識別結果
+    POST /microphone                 檢查麥克風
+    POST /interrupt                  中斷正在播放的回覆
+    POST /wake_word {"enabled": ...} 開關喚醒詞常駐聆聽
+    GET  /trace                      Chrome trace 格式的追蹤紀錄
+    GET  /trace/stats                各階段延遲的 p50/p95/p99
+    POST /trace     {"enabled": ..., "clear": ...}   開關追蹤
+"""
+import json
+import os
+import signal
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+from dotenv import load_dotenv
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+
+
+class TJBotRequestHandler(BaseHTTPRequestHandler):
+    """把 HTTP 請求轉成 TJBotRuntime 的方法呼叫"""
+
+    protocol_version = "HTTP/1.1"  # keep-alive：客戶端重複使用同一條連線
+    disable_nagle_algorithm = True  # 標頭與內容分兩次寫入，避免延遲 ACK 造成每次 40 ms
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        runtime = self.server.runtime
+        if self.path == '/status':
+            self._send_json(200, runtime.status())
+        elif self.path == '/trace':
+            self._send_json(200, runtime.trace_events())
+        elif self.path == '/trace/stats':
+            self._send_json(200, runtime.trace_stats())
+        else:
+            self._send_json(404, {'error': f"未知的路徑: {self.path}"})
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        try:
+            body = json.loads(self.rfile.read(length) or b'{}')
+        except ValueError:
+            self._send_json(400, {'error': "請求內容不是 JSON"})
+            return
+
+        runtime = self.server.runtime
+        try:
+            if self.path == '/message':
+                text = (body.get('text') or '').strip()
+                if not text:
+                    self._send_json(400, {'error': "請輸入有效訊息"})
+                    return
+                self._send_json(200, runtime.message(text, timeout=body.get('timeout', 30)))
+            elif self.path == '/gesture':
+                self._send_ok(runtime.gesture(body.get('name')), f"無法執行動作: {body.get('name')}")
+            elif self.path == '/shine':
+                self._send_ok(runtime.shine(body.get('color', 'white')), "硬體未初始化")
+            elif self.path == '/effect':
+                self._send_ok(runtime.effect(body.get('name'), body.get('color', 'white')),
+                              f"無法播放燈光效果: {body.get('name')}")
+            elif self.path == '/listen':
+                self._send_json(200, {'text': runtime.listen()})
+            elif self.path == '/microphone':
+                self._send_json(200, {'ok': runtime.start_microphone()})
+            elif self.path == '/interrupt':
+                self._send_json(200, {'ok': runtime.interrupt()})
+            elif self.path == '/wake_word':
+                self._send_json(200, {'enabled': runtime.set_wake_word(bool(body.get('enabled', True)))})
+            elif self.path == '/trace':
+                enabled = runtime.set_tracing(bool(body.get('enabled', True)), clear=bool(body.get('clear')))
+                self._send_json(200, {'enabled': enabled})
+            else:
+                self._send_json(404, {'error': f"未知的路徑: {self.path}"})
+        except Exception as e:
+            print(f"服務請求錯誤 ({self.path}): {e}")
+            self._send_json(500, {'error': str(e)})
+
+    def _send_ok(self, ok, error):
+        if ok:
+            self._send_json(200, {'ok': True})
+        else:
+            self._send_json(400, {'error': error})
+
+    def _send_json(self, status, data):
+        payload = json.dumps(data).encode('utf8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+class TJBotServer:
+    """在本機埠口提供控制 API 的伺服器"""
+
+    def __init__(self, runtime, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        self.runtime = runtime
+        self.httpd = ThreadingHTTPServer((host, port), TJBotRequestHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.runtime = runtime
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def serve_forever(self):
+        self.httpd.serve_forever()
+
+    def start(self):
+        """在背景執行緒提供服務"""
+        self.thread = threading.Thread(target=self.serve_forever, name='tjbot-service', daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class TJBotClient:
+    """TJBot 服務的客戶端，方法與 TJBotRuntime 相同"""
+
+    def __init__(self, url, timeout=35):
+        self.url = url.rstrip('/')
+        self.timeout = timeout
+        self.session = requests.Session()  # 重複使用同一條連線
+
+    def _post(self, path, body=None, timeout=None):
+        response = self.session.post(self.url + path, json=body or {}, timeout=timeout or self.timeout)
+        data = response.json()
+        if response.status_code != 200:
+            raise RuntimeError(data.get('error', f"HTTP {response.status_code}"))
+        return data
+
+    def _get(self, path):
+        response = self.session.get(self.url + path, timeout=5)
+        response.raise_for_status()
+        return response.json()
+
+    def status(self):
+        return self._get('/status')
+
+    def message(self, text, timeout=30):
+        return self._post('/message', {'text': text, 'timeout': timeout}, timeout=timeout + 5)
+
+    def gesture(self, name):
+        return self._post('/gesture', {'name': name})['ok']
+
+    def shine(self, color):
+        return self._post('/shine', {'color': color})['ok']
+
+    def effect(self, name, color='white'):
+        return self._post('/effect', {'name': name, 'color': color})['ok']
+
+    def start_microphone(self):
+        return self._post('/microphone')['ok']
+
+    def listen(self):
+        return self._post('/listen')['text']
+
+    def interrupt(self):
+        return self._post('/interrupt')['ok']
+
+    def set_wake_word(self, enabled):
+        return self._post('/wake_word', {'enabled': enabled}, timeout=15)['enabled']
+
+    def set_tracing(self, enabled, clear=False):
+        return self._post('/trace', {'enabled': enabled, 'clear': clear})['enabled']
+
+    def trace_stats(self):
+        return self._get('/trace/stats')
+
+    def trace_events(self):
+        return self._get('/trace')
+
+    def close(self):
+        """只關閉連線；服務本身繼續執行"""
+        self.session.close()
+        return True
+
+
+def main():
+    load_dotenv()
+    from src.tjbot_runtime import TJBotRuntime
+
+    host = os.getenv('TJBOT_SERVICE_HOST', DEFAULT_HOST)
+    port = int(os.getenv('TJBOT_SERVICE_PORT', str(DEFAULT_PORT)))
+
+    print("正在初始化 TJBot...")
+    runtime = TJBotRuntime.from_env()
+    server = TJBotServer(runtime, host, port)
+
+    # systemd / kill 送出 SIGTERM 時一樣正常關閉硬體
+    signal.signal(signal.SIGTERM, lambda *args: threading.Thread(target=server.httpd.shutdown).start())
+
+    print(f"TJBot 服務已啟動: {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print("正在關閉 TJBot...")
+        server.httpd.server_close()
+        runtime.close()
+
+
+if __name__ == "__main__":
+    main()
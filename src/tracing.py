@@ -0,0 +1,195 @@
+import collections
+import contextvars
+import json
+import os
+import threading
+import time
+
+# 目前的對話回合編號；asyncio.to_thread 會複製 context，所以背景執行緒裡的 span 也能對應到回合
+current_turn = contextvars.ContextVar('current_turn', default=None)
+
+
+def now():
+    """追蹤使用的時間（秒，單調遞增）"""
+    return time.perf_counter()
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+class _NullSpan:
+    """停用追蹤時回傳的 span，什麼都不做"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **args):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Span:
+    def __init__(self, tracer, name, args):
+        self.tracer = tracer
+        self.name = name
+        self.args = args
+        self.start = None
+
+    def __enter__(self):
+        self.start = now()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.args['error'] = exc_type.__name__
+        self.tracer.record(self.name, self.start, now(), **self.args)
+        return False
+
+    def set(self, **args):
+        """在 span 結束前補上參數"""
+        self.args.update(args)
+
+
+class Tracer:
+    """輕量的延遲追蹤：記錄各階段的 span，計算滾動 p50/p95/p99，匯出 Chrome trace / JSON lines
+
+    停用時 span() 回傳共用的空物件，幾乎沒有額外負擔。
+    """
+
+    def __init__(self, enabled=False, max_events=5000, window=200, jsonl_path=None):
+        self.enabled = enabled
+        self.lock = threading.Lock()
+        self.origin = now()
+        self.events = collections.deque(maxlen=max_events)
+        self.window = window  # 每個階段保留最近幾筆計算百分位數
+        self.durations = {}  # 名稱 -> deque(秒數)
+        self.jsonl_path = jsonl_path  # 設定後每個事件即時附加寫入
+        self.jsonl_file = None
+
+    def configure(self, enabled=None, jsonl_path=None):
+        with self.lock:
+            if jsonl_path is not None and jsonl_path != self.jsonl_path:
+                self._close_file()
+                self.jsonl_path = jsonl_path or None
+            if enabled is not None:
+                self.enabled = enabled
+
+    def span(self, name, **args):
+        """with tracer.span('tts.synthesize', chars=12): ..."""
+        if not self.enabled:
+            return _NULL_SPAN
+        return Span(self, name, args)
+
+    def record(self, name, start, end, **args):
+        """記錄一段已經結束的時間區間（start / end 為 now() 的值）"""
+        if not self.enabled:
+            return
+        turn = current_turn.get()
+        if turn is not None and 'turn' not in args:
+            args['turn'] = turn
+        event = {
+            'name': name,
+            'cat': name.split('.')[0],
+            'ph': 'X',
+            'ts': round((start - self.origin) * 1e6, 1),
+            'dur': round((end - start) * 1e6, 1),
+            'pid': os.getpid(),
+            'tid': threading.get_ident(),
+            'args': args,
+        }
+        with self.lock:
+            self.events.append(event)
+            durations = self.durations.get(name)
+            if durations is None:
+                durations = self.durations[name] = collections.deque(maxlen=self.window)
+            durations.append(end - start)
+            self._write(event)
+
+    def instant(self, name, **args):
+        """記錄一個時間點（例如開始播放）"""
+        if not self.enabled:
+            return
+        turn = current_turn.get()
+        if turn is not None and 'turn' not in args:
+            args['turn'] = turn
+        event = {
+            'name': name,
+            'cat': name.split('.')[0],
+            'ph': 'i',
+            's': 't',
+            'ts': round((now() - self.origin) * 1e6, 1),
+            'pid': os.getpid(),
+            'tid': threading.get_ident(),
+            'args': args,
+        }
+        with self.lock:
+            self.events.append(event)
+            self._write(event)
+
+    def _write(self, event):
+        if not self.jsonl_path:
+            return
+        try:
+            if self.jsonl_file is None:
+                self.jsonl_file = open(os.path.expanduser(self.jsonl_path), 'a', encoding='utf-8')
+            self.jsonl_file.write(json.dumps(event, ensure_ascii=False) + "\n")
+            self.jsonl_file.flush()
+        except OSError as e:
+            print(f"無法寫入追蹤檔: {e}")
+            self.jsonl_path = None
+
+    def _close_file(self):
+        if self.jsonl_file is not None:
+            self.jsonl_file.close()
+            self.jsonl_file = None
+
+    def stats(self):
+        """各階段最近 window 筆的次數與 p50/p95/p99（毫秒）"""
+        with self.lock:
+            snapshot = {name: list(values) for name, values in self.durations.items()}
+        return {
+            name: {
+                'count': len(values),
+                'p50': percentile(values, 50) * 1000,
+                'p95': percentile(values, 95) * 1000,
+                'p99': percentile(values, 99) * 1000,
+            }
+            for name, values in sorted(snapshot.items()) if values
+        }
+
+    def chrome_trace(self):
+        """Chrome trace 格式（chrome://tracing 或 Perfetto 可直接開啟）"""
+        with self.lock:
+            events = list(self.events)
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def export_chrome(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.chrome_trace(), f, ensure_ascii=False)
+
+    def export_jsonl(self, path):
+        with self.lock:
+            events = list(self.events)
+        with open(path, 'w', encoding='utf-8') as f:
+            for event in events:
+                f.write(json.dumps(event, ensure_ascii=False) + "\n")
+
+    def clear(self):
+        with self.lock:
+            self.events.clear()
+            self.durations.clear()
+
+    def close(self):
+        with self.lock:
+            self._close_file()
+
+
+# 全域追蹤器：預設停用，TJBotRuntime 依 TRACING / TRACE_FILE 設定
+tracer = Tracer()
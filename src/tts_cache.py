@@ -0,0 +1,154 @@
+import collections
+import hashlib
+import json
+import os
+import threading
+
+
+def load_skill_responses(skill_path):
+    """從 Watson Assistant 技能 JSON 取出所有固定的文字回應"""
+    with open(skill_path, encoding='utf-8') as f:
+        skill = json.load(f)
+
+    texts = []
+    for node in skill.get('dialog_nodes', []):
+        output = node.get('output') or {}
+
+        # 舊版格式: output.text.values
+        text_output = output.get('text')
+        if isinstance(text_output, dict):
+            texts.extend(text_output.get('values', []))
+
+        # 新版格式: output.generic[].values[].text
+        for generic in output.get('generic', []):
+            if generic.get('response_type') == 'text':
+                texts.extend(v.get('text', '') for v in generic.get('values', []))
+
+    # 去除重複並保留順序
+    return [t for t in dict.fromkeys(texts) if t and t.strip()]
+
+
+class TTSCache:
+    """語音合成快取：記憶體 LRU 加上以內容雜湊命名的磁碟快取"""
+
+    def __init__(self, cache_dir, max_disk_bytes=50 * 1024 * 1024, max_memory_items=32):
+        self.cache_dir = cache_dir
+        self.max_disk_bytes = max_disk_bytes
+        self.max_memory_items = max_memory_items
+        self.memory = collections.OrderedDict()
+        self.lock = threading.Lock()
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        os.makedirs(cache_dir, exist_ok=True)
+        self.disk_bytes = sum(size for _, size, _ in self._disk_entries())
+
+    @staticmethod
+    def make_key(text, voice, accept):
+        """以文字、聲音與格式計算快取鍵"""
+        content = json.dumps([text, voice, accept], ensure_ascii=False)
+        return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key + '.audio')
+
+    def _disk_entries(self):
+        """列出磁碟快取 (路徑, 大小, 最後使用時間)"""
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith('.audio'):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((path, stat.st_size, stat.st_mtime))
+        return entries
+
+    def get(self, text, voice, accept):
+        """讀取快取的音訊，沒有時回傳 None"""
+        key = self.make_key(text, voice, accept)
+        with self.lock:
+            audio = self.memory.get(key)
+            if audio is not None:
+                self.memory.move_to_end(key)
+                self.memory_hits += 1
+                return audio
+
+            path = self._path(key)
+            try:
+                with open(path, 'rb') as f:
+                    audio = f.read()
+                os.utime(path)  # 更新使用時間，淘汰時最後才刪
+            except OSError:
+                self.misses += 1
+                return None
+
+            self.disk_hits += 1
+            self._remember(key, audio)
+            return audio
+
+    def put(self, text, voice, accept, audio):
+        """寫入記憶體與磁碟快取"""
+        key = self.make_key(text, voice, accept)
+        path = self._path(key)
+        with self.lock:
+            self._remember(key, audio)
+            if os.path.exists(path):
+                return
+
+            temp_path = path + '.tmp'
+            try:
+                with open(temp_path, 'wb') as f:
+                    f.write(audio)
+                os.replace(temp_path, path)
+                self.disk_bytes += len(audio)
+            except OSError as e:
+                print(f"TTS 快取寫入失敗: {e}")
+                return
+            self._evict_disk()
+
+    def get_or_synthesize(self, text, voice, accept, synthesize):
+        """有快取就直接回傳，否則呼叫 synthesize() 並寫入快取"""
+        audio = self.get(text, voice, accept)
+        if audio is None:
+            audio = synthesize()
+            self.put(text, voice, accept, audio)
+        return audio
+
+    def _remember(self, key, audio):
+        self.memory[key] = audio
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.max_memory_items:
+            self.memory.popitem(last=False)
+
+    def _evict_disk(self):
+        """超過容量時，從最久沒用的檔案開始刪除"""
+        if self.disk_bytes <= self.max_disk_bytes:
+            return
+        for path, size, _ in sorted(self._disk_entries(), key=lambda entry: entry[2]):
+            if self.disk_bytes <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            self.disk_bytes -= size
+            self.evictions += 1
+
+    def stats(self):
+        """回傳命中與淘汰統計"""
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            'memory_hits': self.memory_hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+            'memory_items': len(self.memory),
+            'disk_bytes': self.disk_bytes,
+        }
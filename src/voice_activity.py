@@ -0,0 +1,103 @@
+import collections
+import numpy as np
+
+
+class Endpointer:
+    """能量式語音端點偵測：開始說話時開啟語句，尾端靜音超過設定時間後結束"""
+
+    def __init__(self, sample_rate, frame_size=256, threshold_db=-40.0, noise_margin_db=10.0,
+                 trailing_silence=0.6, pre_roll=0.2, noise_adapt_rate=0.05):
+        self.sample_rate = sample_rate
+        self.frame_size = frame_size  # 區塊內再切成的分析幀大小
+        self.threshold_db = threshold_db  # 絕對能量門檻 (dBFS)
+        self.noise_margin_db = noise_margin_db  # 高於背景噪音多少 dB 才算語音
+        self.trailing_silence = trailing_silence  # 尾端靜音多久算說完 (秒)
+        self.pre_roll = pre_roll  # 語音開始前保留的音訊 (秒)
+        self.noise_adapt_rate = noise_adapt_rate
+        self.reset()
+
+    def reset(self):
+        """重設狀態，準備偵測下一句"""
+        self.noise_floor_db = None
+        self.in_speech = False
+        self.ended = False
+        self.silence_samples = 0
+        self.voiced_samples = 0
+        self.discarded_samples = 0
+        self.pre_roll_blocks = collections.deque()
+        self.pre_roll_samples = 0
+
+    def frame_energies_db(self, block):
+        """以向量化方式計算區塊內每個分析幀的能量 (dBFS)"""
+        samples = np.asarray(block).reshape(len(block), -1)[:, 0]
+        if samples.dtype.kind in 'iu':
+            samples = samples.astype(np.float32) / 32768.0
+        else:
+            samples = samples.astype(np.float32, copy=False)
+
+        starts = np.arange(0, len(samples), self.frame_size)
+        counts = np.diff(np.append(starts, len(samples)))
+        power = np.add.reduceat(samples * samples, starts) / counts
+        return 10.0 * np.log10(power + 1e-12), counts
+
+    def _speech_mask(self, energies_db):
+        """判斷每個分析幀是否為語音，同時更新背景噪音估計"""
+        if self.noise_floor_db is None:
+            self.noise_floor_db = float(np.min(energies_db))
+
+        threshold = max(self.threshold_db, self.noise_floor_db + self.noise_margin_db)
+        speech = energies_db > threshold
+
+        silent = energies_db[~speech]
+        if silent.size:
+            self.noise_floor_db += self.noise_adapt_rate * (float(np.mean(silent)) - self.noise_floor_db)
+        return speech
+
+    def process(self, block):
+        """處理一個音訊區塊，回傳應該保留（送出）的音訊區塊列表"""
+        if self.ended:
+            return []
+
+        energies_db, counts = self.frame_energies_db(block)
+        speech = self._speech_mask(energies_db)
+
+        if not self.in_speech:
+            if not speech.any():
+                # 開頭靜音：只保留最近 pre_roll 秒，其餘丟棄
+                self._push_pre_roll(block)
+                return []
+
+            self.in_speech = True
+            self.silence_samples = 0
+            blocks = list(self.pre_roll_blocks) + [block]
+            self.pre_roll_blocks.clear()
+            self.pre_roll_samples = 0
+        else:
+            blocks = [block]
+
+        self.voiced_samples += int(counts[speech].sum())
+
+        if speech.any():
+            # 最後一個語音幀之後的樣本數即為目前的尾端靜音長度
+            last_speech = len(speech) - 1 - int(np.argmax(speech[::-1]))
+            self.silence_samples = int(counts[last_speech + 1:].sum())
+        else:
+            self.silence_samples += len(block)
+
+        if self.silence_samples >= self.trailing_silence * self.sample_rate:
+            self.in_speech = False
+            self.ended = True
+        return blocks
+
+    def _push_pre_roll(self, block):
+        self.pre_roll_blocks.append(block)
+        self.pre_roll_samples += len(block)
+        limit = self.pre_roll * self.sample_rate
+        while self.pre_roll_blocks and self.pre_roll_samples - len(self.pre_roll_blocks[0]) >= limit:
+            dropped = self.pre_roll_blocks.popleft()
+            self.pre_roll_samples -= len(dropped)
+            self.discarded_samples += len(dropped)
+
+    @property
+    def started(self):
+        return self.in_speech or self.ended
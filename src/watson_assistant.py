@@ -1,33 +1,53 @@
-from ibm_watson import AssistantV2
-from ibm_cloud_sdk_core.authenticators import IAMAuthenticator
+from src.resilience import ResiliencePolicy
+from src.service_factory import create_service
+from src.tracing import tracer
 
 class WatsonAssistant:
-    def __init__(self, apikey, url, assistant_id, version):
-        # 初始化 Watson Assistant 服務
+    def __init__(self, apikey, url, assistant_id, version, cache=None, factory=None, policy=None):
+        from ibm_watson import AssistantV2
+
+        # 初始化 Watson Assistant 服務（有 ServiceFactory 時共用連線池與 IAM token）
         self.assistant_id = assistant_id
-        self.authenticator = IAMAuthenticator(apikey)
-        self.assistant = AssistantV2(
-            version=version,
-            authenticator=self.authenticator
-        )
-        self.assistant.set_service_url(url)
+        self.assistant = create_service(AssistantV2, apikey, url, factory, version=version)
+        self.authenticator = self.assistant.authenticator
         self.context = None  # 保存對話的上下文
+        self.cache = cache  # 選用的 ResponseCache
+
+        # 逾時、重試與斷路器；message_stateless 不在服務端保存狀態，重送是冪等的
+        self.policy = policy or ResiliencePolicy.from_env('assistant', timeout=8.0)
+        self.assistant.set_http_config({'timeout': self.policy.timeout})
 
     def send_message(self, message):
         """與 IBM Watson Assistant 交互，返回回應"""
         try:
+            # 相同輸入與上下文的回覆直接從快取取出，不呼叫服務
+            if self.cache is not None:
+                cached = self.cache.get(message, self.context)
+                if cached is not None:
+                    tracer.instant('assistant.cache_hit')
+                    # 快取的回覆帶著當時的上下文，和呼叫服務一樣更新會話上下文
+                    self.context = cached.get('context', None)
+                    return cached
+
             # 構建訊息輸入
             message_input = {
                 'message_type': 'text',
                 'text': message
             }
+            if self.cache is not None:
+                # 需要知道經過哪些對話節點，才能判斷回覆是否可以快取
+                message_input['options'] = {'debug': True}
 
             # 發送訊息到 Watson Assistant
-            result = self.assistant.message_stateless(
-                self.assistant_id,  # 環境ID
-                input=message_input,
-                context=self.context  # 使用會話上下文來保持會話狀態
-            ).get_result()
+            with tracer.span('assistant.request'):
+                result = self.policy.call(lambda: self.assistant.message_stateless(
+                    self.assistant_id,  # 環境ID
+                    input=message_input,
+                    context=self.context  # 使用會話上下文來保持會話狀態
+                ).get_result())
+
+            if self.cache is not None:
+                self.cache.put(message, self.context, result)
 
             # 更新會話上下文
             self.context = result.get('context', None)
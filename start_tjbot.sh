@@ -56,6 +56,14 @@ source .env
 echo "Requesting sudo password..."
 sudo true
 
+# ====== 啟動常駐服務（設定 TJBOT_SERVICE_URL 時）======
+if [ -n "$TJBOT_SERVICE_URL" ]; then
+    echo "Starting TJBot service..."
+    sudo -E $(which python) -m src.tjbot_service &
+    SERVICE_PID=$!
+    trap 'sudo kill -TERM $SERVICE_PID 2>/dev/null' EXIT
+fi
+
 # ====== 啟動 Streamlit 應用 ======
 echo "Starting TJBot Controller..."
 sudo -E $(which streamlit) run app.py --server.port 8501 --server.headless true
\ No newline at end of file
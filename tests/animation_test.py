@@ -0,0 +1,84 @@
+import os
+import numpy as np
+
+from src.animation import compile_gesture, compile_track, expand_keyframes, load_gestures
+from src.motion_scheduler import MotionScheduler
+from tests.motion_scheduler_test import Recorder, SimulatedClock
+
+GESTURES_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'materials', 'gestures.json')
+COLORS = {
+    "red": (255, 0, 0), "green": (0, 255, 0), "blue": (0, 0, 255), "white": (255, 255, 255),
+    "yellow": (255, 255, 0), "purple": (255, 0, 255), "orange": (255, 165, 0), "off": (0, 0, 0),
+}
+
+
+def _play(gesture):
+    """在模擬時鐘上播放動作，回傳 (時間, 軌道, 值)"""
+    clock = SimulatedClock()
+    recorder = Recorder(clock.time)
+    scheduler = MotionScheduler({'servo': recorder.output('servo'), 'led': recorder.output('led')},
+                                clock=clock.time, sleep=clock.sleep)
+    assert scheduler.submit(gesture).result(timeout=5) == gesture.name
+    scheduler.shutdown()
+    return recorder.events
+
+
+def test_step_track_holds_values():
+    start, frame = compile_track([(0.0, 7.5), (0.1, 2.5), (0.2, 0)], tick_rate=50)
+    assert start == 0
+    assert frame.tolist() == [7.5] * 5 + [2.5] * 5 + [0.0]
+
+
+def test_linear_track_interpolates_rgb():
+    start, frame = compile_track([(0.0, 'off'), (0.1, 'red')], tick_rate=50, interpolation='linear', color_map=COLORS)
+    assert frame.dtype == np.uint8 and frame.shape == (6, 3)
+    assert frame[:, 0].tolist() == [0, 51, 102, 153, 204, 255]
+    assert not frame[:, 1:].any()
+
+
+def test_repeat_expands_keyframes():
+    keyframes = expand_keyframes({'keyframes': [[0.0, 1], [0.2, 2]], 'repeat': 3, 'period': 0.5, 'then': [[1.5, 0]]})
+    assert keyframes == [(0.0, 1), (0.2, 2), (0.5, 1), (0.7, 2), (1.0, 1), (1.2, 2), (1.5, 0)]
+
+
+def test_dance_timing_on_simulated_clock():
+    dance = load_gestures(GESTURES_PATH, COLORS)['dance']
+    assert abs(dance.duration - 6.1) < 1e-9
+    events = _play(dance)
+
+    # 每個關鍵影格都在預定時間（誤差不超過一個 tick）送出
+    # 數值沒變的關鍵影格（每輪開頭與 5.6 秒的回中）不會重送
+    expected_servo = [(0.0, 7.5)]
+    for i in range(7):
+        t = i * 0.8
+        expected_servo += [(t + 0.2, 2.5), (t + 0.4, 12.5), (t + 0.6, 7.5)]
+    expected_servo += [(6.1, 0.0)]
+    servo = [(t, v) for t, track, v in events if track == 'servo']
+    assert [v for _, v in servo] == [v for _, v in expected_servo]
+    for (t, _), (expected, _) in zip(servo, expected_servo):
+        assert abs(t - expected) <= 1 / dance.tick_rate
+
+    led = [(t, v) for t, track, v in events if track == 'led']
+    assert [v for _, v in led] == [COLORS[c] for c in
+                                   ["red", "green", "blue", "white", "yellow", "purple", "orange", "off"]]
+    assert abs(led[0][0] - 0.2) <= 1 / dance.tick_rate
+    assert abs(led[-1][0] - 6.1) <= 1 / dance.tick_rate
+
+
+def test_linear_gesture_outputs_every_tick():
+    fade = compile_gesture('fade', {'tracks': {'led': {'interpolation': 'linear',
+                                                       'keyframes': [[0.0, 'off'], [0.2, 'blue']]}}},
+                           tick_rate=50, color_map=COLORS)
+    events = _play(fade)
+    assert len(events) == 11
+    assert [round(t, 6) for t, _, _ in events] == [round(i / 50, 6) for i in range(11)]
+    assert events[-1][2] == COLORS['blue']
+
+
+if __name__ == "__main__":
+    test_step_track_holds_values()
+    test_linear_track_interpolates_rgb()
+    test_repeat_expands_keyframes()
+    test_dance_timing_on_simulated_clock()
+    test_linear_gesture_outputs_every_tick()
+    print("All animation tests passed.")
@@ -0,0 +1,114 @@
+import os
+import numpy as np
+import scipy.io.wavfile as wavfile
+
+SAMPLE_RATE = 44100
+BLOCK_SIZE = 1024
+
+
+def silence(duration, rate=SAMPLE_RATE, noise_level=0.002, seed=0):
+    """背景噪音（近似靜音）"""
+    rng = np.random.default_rng(seed)
+    return (rng.standard_normal(int(duration * rate)) * noise_level).astype(np.float32)
+
+
+def speech(duration, rate=SAMPLE_RATE, level=0.3, pitch=140.0, seed=1):
+    """合成類似語音的訊號：基頻諧波加上音節般的振幅起伏"""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(duration * rate)) / rate
+    voiced = sum(np.sin(2 * np.pi * pitch * k * t) / k for k in range(1, 6))
+    syllables = 0.6 + 0.4 * np.abs(np.sin(2 * np.pi * 3.0 * t))
+    noise = rng.standard_normal(len(t)) * 0.05
+    signal = (voiced / 2.3 + noise) * syllables * level
+    return signal.astype(np.float32)
+
+
+def concat(*parts):
+    return np.concatenate(parts).astype(np.float32)
+
+
+def write_wav(path, samples, rate=SAMPLE_RATE):
+    """以 int16 WAV 儲存測試音檔"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    wavfile.write(path, rate, (np.clip(samples, -1, 1) * 32767).astype(np.int16))
+    return path
+
+
+def read_blocks(path, block_size=BLOCK_SIZE):
+    """讀取 WAV 並切成與 InputStream 相同形狀的 (frames, 1) 區塊"""
+    rate, data = wavfile.read(path)
+    data = data.reshape(-1, 1)
+    return rate, [data[i:i + block_size] for i in range(0, len(data), block_size)]
+
+
+# 合成詞：每個音節是 (第一共振峰, 第二共振峰, 秒數)，粗略模擬母音的頻譜形狀
+KEYWORD = [(300, 2300, 0.12), (650, 1800, 0.16), (500, 1000, 0.12), (700, 1150, 0.16)]  # "TJ-Bot"
+OTHER_WORDS = [
+    [(700, 1200, 0.15), (300, 2200, 0.2)],  # "hi"
+    [(500, 1500, 0.12), (400, 900, 0.15), (650, 1700, 0.2)],  # "hello"
+    [(350, 800, 0.15), (700, 1100, 0.12), (300, 2300, 0.18), (500, 1000, 0.12)],  # 音節相近但順序不同
+    [(650, 1800, 0.2), (300, 2300, 0.15)],
+    [(400, 2000, 0.1), (600, 1000, 0.2), (350, 900, 0.12), (500, 1600, 0.15)],
+]
+
+
+def word(syllables, rate=SAMPLE_RATE, pitch=120.0, speed=1.0, level=0.3, seed=0):
+    """依共振峰合成一個詞：諧波振幅由共振峰決定，音節之間平滑轉換"""
+    rng = np.random.default_rng(seed)
+    parts = []
+    phase = 0.0
+    for f1, f2, seconds in syllables:
+        n = int(seconds / speed * rate)
+        t = np.arange(n) / rate
+        f0 = pitch * (1 + 0.03 * np.sin(2 * np.pi * 2 * t + seed))
+        phase_track = phase + 2 * np.pi * np.cumsum(f0) / rate
+        phase = phase_track[-1]
+        signal = np.zeros(n)
+        for k in range(1, int(4000 / pitch)):
+            freq = k * pitch
+            gain = sum(1.0 / (1.0 + ((freq - f) / (0.1 * f)) ** 2) for f in (f1, f2))
+            signal += gain * np.sin(k * phase_track)
+        envelope = np.minimum(1.0, np.minimum(np.arange(n), np.arange(n)[::-1]) / (0.02 * rate))
+        parts.append(signal * envelope)
+    samples = np.concatenate(parts)
+    samples = samples / (np.abs(samples).max() + 1e-9) * level
+    samples += rng.standard_normal(len(samples)) * 0.01
+    return samples.astype(np.float32)
+
+
+def sentence(duration, rate=SAMPLE_RATE, pitch=210.0, seed=0):
+    """由隨機音節組成的一段話（模擬 TTS 的回覆）"""
+    rng = np.random.default_rng(seed)
+    parts = []
+    total = 0
+    while total < duration * rate:
+        syllables = [(float(rng.uniform(280, 800)), float(rng.uniform(850, 2500)), float(rng.uniform(0.08, 0.2)))
+                     for _ in range(int(rng.integers(2, 5)))]
+        parts.append(word(syllables, rate, pitch=pitch * float(rng.uniform(0.9, 1.1)), seed=int(rng.integers(1000))))
+        parts.append(silence(float(rng.uniform(0.03, 0.12)), rate, seed=int(rng.integers(1000))))
+        total += len(parts[-2]) + len(parts[-1])
+    return np.concatenate(parts)[:int(duration * rate)].astype(np.float32)
+
+
+def echo(reference, delay, gain, rate=SAMPLE_RATE, reverb=0.3):
+    """喇叭播放的聲音傳回麥克風：延遲、衰減，加上簡單的殘響與低通"""
+    from scipy.signal import fftconvolve
+
+    length = int(0.12 * rate)
+    t = np.arange(length) / rate
+    rng = np.random.default_rng(7)
+    response = rng.standard_normal(length) * np.exp(-t / 0.03) * reverb * 0.05
+    response[0] = 1.0
+    response[int(0.007 * rate)] += 0.4 * reverb
+    response = np.convolve(response, np.ones(4) / 4)[:length]  # 小喇叭的高頻衰減
+    out = np.zeros(len(reference) + int(delay * rate))
+    out[int(delay * rate):] = fftconvolve(reference, response)[:len(reference)] * gain
+    return out[:len(reference)].astype(np.float32)
+
+
+def mix(*signals):
+    """把長度不同的訊號疊加在一起"""
+    out = np.zeros(max(len(s) for s in signals), dtype=np.float32)
+    for s in signals:
+        out[:len(s)] += s
+    return out
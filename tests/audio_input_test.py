@@ -0,0 +1,47 @@
+import time
+from ibm_cloud_sdk_core.authenticators import NoAuthAuthenticator
+
+from src.audio_input import ReplayInput
+from src.speech_to_text import SpeechToText
+from tests.audio_fixtures import SAMPLE_RATE, concat, silence, speech
+from tests.fake_watson_server import FakeWatsonServer
+
+
+def _stt(url, audio_input, streaming=False):
+    stt = SpeechToText('key', url, streaming=streaming, audio_input=audio_input)
+    stt.speech_to_text.authenticator = NoAuthAuthenticator()
+    return stt
+
+
+def test_replay_through_listen_uploads_endpointed_audio():
+    with FakeWatsonServer(transcript="wave to me", latency={'stt': (0.05, 0)}) as server:
+        replay = ReplayInput(concat(silence(0.5), speech(1.0), silence(0.2)), SAMPLE_RATE, speed=4.0)
+        stt = _stt(server.url, replay)
+
+        started = time.monotonic()
+        assert stt.listen() == "wave to me"
+        elapsed = time.monotonic() - started
+
+        content_type, size = server.recognize_requests[0]
+        assert content_type == 'audio/wav'
+        # 去掉開頭靜音並降頻到 16kHz：不到 2 秒的 16 位元音訊
+        assert size < 2.0 * 16000 * 2
+        # 端點偵測在說完話後就結束，不會錄滿 5 秒（第一次降頻還要載入 scipy）
+        assert elapsed < 4.0
+        assert replay.audio_end_at is not None
+
+
+def test_replay_through_streaming_listen():
+    with FakeWatsonServer(transcript="raise your arm", final_after_bytes=10 ** 9) as server:
+        replay = ReplayInput(concat(silence(0.3), speech(0.8), silence(0.2)), SAMPLE_RATE, speed=4.0)
+        stt = _stt(server.url, replay, streaming=True)
+
+        assert stt.listen() == "raise your arm"
+        assert server.start_messages[0]['content_type'] == 'audio/l16; rate=16000; channels=1'
+        assert server.audio_bytes > 0
+
+
+if __name__ == "__main__":
+    test_replay_through_listen_uploads_endpointed_audio()
+    test_replay_through_streaming_listen()
+    print("All audio input tests passed.")
@@ -0,0 +1,64 @@
+import struct
+import numpy as np
+from scipy import signal
+
+from src.audio_utils import PolyphaseResampler, decode_wav, encode_audio, encode_wav, resample
+
+
+def test_wav_round_trip_in_memory():
+    samples = (np.arange(4410) % 200 - 100).astype(np.int16)
+    data = encode_wav(samples, 44100)
+    rate, channels, decoded = decode_wav(data)
+
+    assert rate == 44100 and channels == 1
+    assert np.array_equal(decoded, samples)
+    # 解碼結果直接引用原始緩衝區，不複製音訊
+    assert not decoded.flags.owndata
+
+
+def test_streamed_wav_with_unknown_length():
+    samples = np.arange(1000, dtype=np.int16)
+    data = bytearray(encode_wav(samples, 22050))
+    # 模擬串流 WAV：RIFF 與 data 長度欄位都是 0xFFFFFFFF
+    data[4:8] = struct.pack('<I', 0xFFFFFFFF)
+    data[40:44] = struct.pack('<I', 0xFFFFFFFF)
+
+    rate, channels, decoded = decode_wav(bytes(data))
+    assert rate == 22050
+    assert np.array_equal(decoded, samples)
+
+
+def test_resample_matches_scipy_polyphase():
+    rng = np.random.default_rng(0)
+    samples = (rng.standard_normal(44100) * 3000).astype(np.int16)
+    resampled = resample(samples, 44100, 16000)
+    expected = signal.resample_poly(samples.astype(np.float64), 160, 441)
+
+    assert len(resampled) == 16000
+    assert np.max(np.abs(resampled - expected)) <= 1
+
+
+def test_streaming_resampler_matches_whole_signal():
+    rng = np.random.default_rng(1)
+    samples = rng.standard_normal(44100 * 2) * 3000
+
+    whole = PolyphaseResampler(44100, 16000).process(samples)
+    streaming = PolyphaseResampler(44100, 16000)
+    blocks = [streaming.process(samples[i:i + 1024]) for i in range(0, len(samples), 1024)]
+
+    assert np.allclose(np.concatenate(blocks), whole)
+
+
+def test_wav_upload_content_type():
+    payload, content_type = encode_audio(np.zeros(1600, dtype=np.int16), 16000, 'wav')
+    assert content_type == 'audio/wav'
+    assert decode_wav(payload)[0] == 16000
+
+
+if __name__ == "__main__":
+    test_wav_round_trip_in_memory()
+    test_streamed_wav_with_unknown_length()
+    test_resample_matches_scipy_polyphase()
+    test_streaming_resampler_matches_whole_signal()
+    test_wav_upload_content_type()
+    print("All audio utils tests passed.")
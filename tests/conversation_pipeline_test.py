@@ -0,0 +1,200 @@
+import asyncio
+import queue
+import time
+import numpy as np
+from ibm_cloud_sdk_core.authenticators import NoAuthAuthenticator
+
+from src.audio_utils import encode_wav
+from src.conversation_pipeline import ConversationPipeline, PipelineThread
+from src.hardware_backend import SimulatedBackend
+from src.hardware_control import HardwareControl
+from src.text_to_speech import TextToSpeech
+from src.watson_assistant import WatsonAssistant
+from tests.fake_watson_server import FakeWatsonServer
+
+
+class TimedOutput:
+    """以真實時間「播放」PCM，記錄播放區間"""
+
+    def __init__(self):
+        self.played = []  # (開始, 結束, 樣本數)
+        self.aborted = 0
+
+    def play(self, pcm, sample_rate, channels=1):
+        start = time.monotonic()
+        time.sleep(len(pcm) / channels / sample_rate)
+        self.played.append((start, time.monotonic(), len(pcm)))
+
+    def finish(self):
+        pass
+
+    def abort(self):
+        self.aborted += 1
+
+    def close(self):
+        pass
+
+
+class ScriptedListener:
+    """依序回傳預先準備的句子，記錄每次開始聆聽的時間"""
+
+    def __init__(self, lines, delay=0.05):
+        self.lines = queue.Queue()
+        for line in lines:
+            self.lines.put(line)
+        self.delay = delay
+        self.started = []
+
+    def listen(self):
+        self.started.append(time.monotonic())
+        time.sleep(self.delay)
+        try:
+            return self.lines.get_nowait()
+        except queue.Empty:
+            time.sleep(0.1)
+            return ""
+
+
+def _components(server, audio_seconds=0.5):
+    server.httpd.synthesized_audio = encode_wav(np.zeros(int(22050 * audio_seconds), dtype=np.int16), 22050)
+    assistant = WatsonAssistant('key', server.url, 'tjbot', version='2023-04-15')
+    assistant.assistant.authenticator = NoAuthAuthenticator()
+    output = TimedOutput()
+    tts = TextToSpeech('key', server.url, output=output)
+    tts.text_to_speech.authenticator = NoAuthAuthenticator()
+    backend = SimulatedBackend()
+    hardware = HardwareControl(backend=backend)
+    return assistant, tts, output, hardware, backend
+
+
+def test_gesture_runs_in_parallel_with_speech():
+    with FakeWatsonServer() as server:
+        server.intents['wave to me'] = 'wave'
+        assistant, tts, output, hardware, backend = _components(server, audio_seconds=1.0)
+
+        async def scenario():
+            pipeline = ConversationPipeline(assistant, tts=tts, hardware=hardware)
+            await pipeline.start()
+            turn = await pipeline.submit("wave to me")
+            await asyncio.wait_for(turn.done, 5)
+            await pipeline.stop()
+            return turn
+
+        started = time.monotonic()
+        turn = asyncio.run(scenario())
+        elapsed = time.monotonic() - started
+        hardware.cleanup()
+        tts.close()
+
+        assert turn.replies == ["reply 1: wave to me"]
+        assert not turn.interrupted
+        # 揮手 1.2 秒與 1 秒語音平行，總時間遠小於相加
+        assert backend.servo_log[-1][1] == 0.0
+        assert elapsed < 1.9
+        first_duty = backend.servo_log[0][0]
+        assert output.played[0][0] - 0.3 < first_duty < output.played[-1][1]
+
+
+def test_listening_overlaps_speaking():
+    with FakeWatsonServer() as server:
+        assistant, tts, output, hardware, backend = _components(server, audio_seconds=0.6)
+        listener = ScriptedListener(["hello"])
+        done = []
+
+        async def scenario():
+            pipeline = ConversationPipeline(assistant, tts=tts, stt=listener, barge_in=False,
+                                            on_event=lambda name, turn: done.append(turn) if name == 'done' else None)
+            await pipeline.start()
+            while not done:
+                await asyncio.sleep(0.02)
+            await pipeline.stop()
+
+        asyncio.run(scenario())
+        hardware.cleanup()
+        tts.close()
+
+        speech_start = output.played[0][0]
+        speech_end = output.played[-1][1]
+        assert any(speech_start <= t <= speech_end for t in listener.started)
+
+
+def test_new_input_barges_in_on_current_reply():
+    with FakeWatsonServer() as server:
+        assistant, tts, output, hardware, backend = _components(server, audio_seconds=2.0)
+
+        async def scenario():
+            pipeline = ConversationPipeline(assistant, tts=tts, hardware=hardware)
+            await pipeline.start()
+            first = await pipeline.submit("tell me a long story")
+            await asyncio.wait_for(first.replied, 5)
+            await asyncio.sleep(0.4)
+            second = await pipeline.submit("stop talking")
+            await asyncio.wait_for(first.done, 5)
+            interrupted_at = time.monotonic()
+            await asyncio.wait_for(second.done, 5)
+            await pipeline.stop()
+            return first, second, interrupted_at
+
+        first, second, interrupted_at = asyncio.run(scenario())
+        hardware.cleanup()
+        tts.close()
+
+        assert first.interrupted and not second.interrupted
+        assert output.aborted == 1
+        # 第一段只播了一小部分就停止，第二段完整播放
+        first_samples = sum(n for start, _, n in output.played if start < interrupted_at)
+        assert first_samples < 22050
+        assert second.replies == ["reply 2: stop talking"]
+
+
+def test_barge_in_drops_queued_replies():
+    with FakeWatsonServer() as server:
+        assistant, tts, output, hardware, backend = _components(server, audio_seconds=1.0)
+
+        async def scenario():
+            pipeline = ConversationPipeline(assistant, tts=tts, hardware=hardware)
+            await pipeline.start()
+            first = await pipeline.submit("tell me a story")
+            await asyncio.wait_for(first.replied, 5)
+            await asyncio.sleep(0.3)
+            # 連續兩句：第二句還在排隊時第三句插話，第二句的回覆不應該再播放
+            second = await pipeline.submit("and then")
+            third = await pipeline.submit("never mind")
+            interrupted_at = time.monotonic()
+            await asyncio.wait_for(third.done, 5)
+            await pipeline.stop()
+            return first, second, third, interrupted_at
+
+        first, second, third, interrupted_at = asyncio.run(scenario())
+        hardware.cleanup()
+        tts.close()
+
+        assert first.interrupted and second.interrupted and not third.interrupted
+        # 第二句仍送給 Assistant 以保持上下文，但只有第三句的回覆被播放
+        assert second.replies == ["reply 2: and then"]
+        played_after = sum(n for start, _, n in output.played if start >= interrupted_at)
+        assert 22050 <= played_after < 22050 * 1.2
+
+
+def test_pipeline_thread_returns_reply_before_speech_finishes():
+    with FakeWatsonServer() as server:
+        assistant, tts, output, hardware, backend = _components(server, audio_seconds=1.0)
+        runner = PipelineThread(ConversationPipeline(assistant, tts=tts, hardware=hardware))
+
+        started = time.monotonic()
+        turn = runner.ask("hello")
+        assert turn.replies == ["reply 1: hello"]
+        assert time.monotonic() - started < 0.8
+
+        runner.stop()
+        hardware.cleanup()
+        tts.close()
+
+
+if __name__ == "__main__":
+    test_gesture_runs_in_parallel_with_speech()
+    test_listening_overlaps_speaking()
+    test_new_input_barges_in_on_current_reply()
+    test_barge_in_drops_queued_replies()
+    test_pipeline_thread_returns_reply_before_speech_finishes()
+    print("All conversation pipeline tests passed.")
@@ -0,0 +1,130 @@
+import threading
+import time
+import numpy as np
+from ibm_cloud_sdk_core.authenticators import NoAuthAuthenticator
+
+from src.audio_utils import encode_wav
+from src.echo_suppression import BargeInDetector
+from src.keyword_spotter import KeywordSpotter
+from src.speech_to_text import SpeechToText
+from src.text_to_speech import TextToSpeech
+from src.tjbot_runtime import TJBotRuntime
+from src.watson_assistant import WatsonAssistant
+from tests.audio_fixtures import (KEYWORD, OTHER_WORDS, SAMPLE_RATE, concat, echo, mix, sentence, silence,
+                                  speech, word)
+from tests.fake_room import SimulatedRoom
+from tests.fake_watson_server import FakeWatsonServer
+
+
+def _int16(samples):
+    return (np.clip(samples, -1, 1) * 32767).astype(np.int16)
+
+
+def _user(level=0.3, seed=0):
+    return concat(word(OTHER_WORDS[seed % len(OTHER_WORDS)], pitch=120, level=level, seed=seed),
+                  speech(1.0, pitch=120, level=level, seed=seed))
+
+
+def _run(detector, mic, reference=None):
+    """以 1024 幀區塊同步送入參考訊號與麥克風，回傳觸發的秒數（沒有觸發回傳 None）"""
+    mic = _int16(mic)
+    reference = None if reference is None else _int16(reference)
+    for i in range(0, len(mic), 1024):
+        if reference is not None and i < len(reference):
+            detector.add_reference(reference[i:i + 1024], SAMPLE_RATE, at_index=i)
+        if detector.process(mic[i:i + 1024].reshape(-1, 1)):
+            return i / SAMPLE_RATE
+    return None
+
+
+def test_estimates_delay_and_ignores_echo():
+    for delay, gain in ((0.02, 0.3), (0.08, 1.5), (0.2, 0.8)):
+        reference = sentence(4.0, seed=1)
+        mic = mix(echo(reference, delay, gain), silence(4.0, seed=2))
+        detector = BargeInDetector(SAMPLE_RATE)
+        assert _run(detector, mic, reference) is None
+        assert abs(detector.delay - delay * SAMPLE_RATE) < 0.002 * SAMPLE_RATE
+
+
+def test_detects_user_speaking_over_playback():
+    for delay, gain, level in ((0.02, 0.3, 0.3), (0.08, 1.5, 0.3), (0.2, 0.8, 0.15)):
+        reference = sentence(4.0, seed=3)
+        user = _user(level, seed=4)
+        onset = 2.5
+        mic = mix(echo(reference, delay, gain), silence(4.0, seed=5),
+                  concat(np.zeros(int(onset * SAMPLE_RATE), np.float32), user))[:len(reference)]
+        detector = BargeInDetector(SAMPLE_RATE)
+        detected = _run(detector, mic, reference)
+        # 持續說話 min_speech (0.12 秒) 後觸發
+        assert detected is not None and onset < detected < onset + 0.3, detected
+        assert detector.during_playback
+        # 觸發前已經說的部分會交給識別
+        kept = sum(len(block) for block in detector.onset_audio)
+        assert 0.1 * SAMPLE_RATE < kept < 0.4 * SAMPLE_RATE
+
+
+def test_idle_detection_and_wake_word_trigger():
+    detector = BargeInDetector(SAMPLE_RATE)
+    detected = _run(detector, concat(silence(1.0), _user(), silence(0.5)))
+    assert detected is not None and 1.0 < detected < 1.3
+    assert not detector.during_playback
+
+    # 閒置時改由喚醒詞決定：一般的話不觸發，喚醒詞才觸發
+    spotter = KeywordSpotter(SAMPLE_RATE)
+    for i, (pitch, speed) in enumerate([(110, 1.0), (130, 0.9), (120, 1.1)]):
+        spotter.enroll(word(KEYWORD, 16000, pitch=pitch, speed=speed, seed=i), 16000)
+    detector = BargeInDetector(SAMPLE_RATE, idle_trigger=spotter)
+    assert _run(detector, concat(silence(0.5), _user(), silence(0.5))) is None
+    detector.reset()
+    assert _run(detector, concat(silence(0.5), word(KEYWORD, pitch=125, seed=9), silence(0.5))) is not None
+
+
+def test_voice_barge_in_stops_playback_and_recognizes_new_utterance():
+    reply = _int16(sentence(3.0, rate=22050, seed=6))
+    with FakeWatsonServer(transcript="stop", final_after_bytes=10 ** 9) as server:
+        server.httpd.synthesized_audio = encode_wav(reply, 22050)
+        room = SimulatedRoom(delay=0.06, gain=0.8)
+
+        assistant = WatsonAssistant('key', server.url, 'tjbot', version='2023-04-15')
+        assistant.assistant.authenticator = NoAuthAuthenticator()
+        tts = TextToSpeech('key', server.url, output=room.output)
+        tts.text_to_speech.authenticator = NoAuthAuthenticator()
+        stt = SpeechToText('key', server.url, streaming=True, audio_input=room.input)
+        stt.speech_to_text.authenticator = NoAuthAuthenticator()
+        stt.start_microphone()
+        runtime = TJBotRuntime(assistant, tts=tts, stt=stt, barge_in_detector=BargeInDetector(stt.sample_rate))
+
+        events = []
+        barged = threading.Event()
+
+        def on_event(name, turn):
+            events.append((name, turn))
+            if name == 'barge_in':
+                barged.set()
+        runtime.pipeline.pipeline.on_event = on_event
+
+        runtime.message("tell me a joke")
+        onset = room.say(_user(seed=7), after=1.2)
+        assert barged.wait(3)
+        interrupted = next(turn for name, turn in events if name == 'barge_in')
+
+        # 使用者開口後很快停止播放，接著識別出新的一句並送給 Assistant
+        deadline = time.monotonic() + 5
+        while (interrupted.barge_in_latency is None or len(server.message_requests) < 2) \
+                and time.monotonic() < deadline:
+            time.sleep(0.02)
+        assert interrupted.interrupted
+        assert interrupted.barge_in_latency < 0.5
+        assert room.aborted_at - onset < 0.5
+        assert server.message_requests[-1]['input']['text'] == "stop"
+        assert room.output.samples < len(reply) * 2  # 沒有播完
+
+        runtime.close()
+
+
+if __name__ == "__main__":
+    test_estimates_delay_and_ignores_echo()
+    test_detects_user_speaking_over_playback()
+    test_idle_detection_and_wake_word_trigger()
+    test_voice_barge_in_stops_playback_and_recognizes_new_utterance()
+    print("All echo suppression tests passed.")
@@ -0,0 +1,146 @@
+import threading
+import time
+import numpy as np
+
+
+class _RoomOutput:
+    """房間裡的喇叭：依實際時間播放，播出的聲音記錄在房間的時間軸上"""
+
+    def __init__(self, room):
+        self.room = room
+        self.samples = 0
+
+    def play(self, pcm, sample_rate, channels=1):
+        room = self.room
+        samples = np.asarray(pcm).reshape(-1, channels)[:, 0].astype(np.float32) / 32768.0
+        if sample_rate != room.sample_rate:
+            positions = np.arange(int(len(samples) * room.sample_rate / sample_rate)) * (sample_rate / room.sample_rate)
+            samples = np.interp(positions, np.arange(len(samples)), samples).astype(np.float32)
+        with room.lock:
+            start = max(room.index_now(), room.speaker_end)
+            end = min(start + len(samples), len(room.speaker))
+            room.speaker[start:end] = samples[:end - start]
+            room.speaker_end = end
+        self.samples += len(samples)
+        # 像真的音效卡一樣，寫入後要等前面的音訊播出才返回
+        wait = (end - room.buffer) / room.sample_rate - room.elapsed()
+        if wait > 0:
+            time.sleep(wait)
+
+    def finish(self):
+        wait = self.room.speaker_end / self.room.sample_rate - self.room.elapsed()
+        if wait > 0:
+            time.sleep(wait)
+
+    def abort(self):
+        room = self.room
+        with room.lock:
+            stop = room.index_now()
+            room.speaker[stop:room.speaker_end] = 0.0
+            room.speaker_end = min(room.speaker_end, stop)
+            room.aborted_at = time.monotonic()
+
+    def close(self):
+        pass
+
+
+class _RoomInput:
+    """房間裡的麥克風：喇叭的回音 + 使用者的聲音 + 背景噪音，依實際時間送出區塊"""
+
+    name = 'room'
+
+    def __init__(self, room):
+        self.room = room
+        self.sample_rate = room.sample_rate
+
+    def open(self, callback, blocksize=1024, dtype='float32'):
+        return _RoomStream(self.room, callback, blocksize, np.dtype(dtype))
+
+
+class _RoomStream:
+    def __init__(self, room, callback, blocksize, dtype):
+        self.room = room
+        self.callback = callback
+        self.blocksize = blocksize
+        self.dtype = dtype
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def _run(self):
+        room = self.room
+        position = room.index_now()
+        rng = np.random.default_rng(0)
+        while not self.stop_event.is_set():
+            if room.index_now() < position + self.blocksize:
+                self.stop_event.wait((position + self.blocksize - room.index_now()) / room.sample_rate)
+                continue
+            with room.lock:
+                block = room.microphone(position, position + self.blocksize)
+            block = block + rng.standard_normal(self.blocksize).astype(np.float32) * room.noise_level
+            position += self.blocksize
+            if self.dtype == np.int16:
+                block = (np.clip(block, -1, 1) * 32767).astype(np.int16)
+            self.callback(block.reshape(-1, 1), self.blocksize, None, None)
+
+    def start(self):
+        self.thread = threading.Thread(target=self._run, name='room-input', daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join(timeout=2)
+
+    def close(self):
+        self.stop()
+
+
+class SimulatedRoom:
+    """模擬 TJBot 所在的房間：喇叭播出的聲音延遲、衰減後回到麥克風，再加上使用者說的話
+
+    output 給 TextToSpeech 當播放輸出（依實際時間播放），input 給 SpeechToText 當錄音來源。
+    """
+
+    def __init__(self, sample_rate=44100, delay=0.06, gain=0.8, noise_level=0.002, seconds=30, buffer=0.05):
+        self.sample_rate = sample_rate
+        self.delay = int(delay * sample_rate)
+        self.gain = gain
+        self.noise_level = noise_level
+        self.buffer = int(buffer * sample_rate)  # 喇叭輸出的緩衝長度
+        self.speaker = np.zeros(int(seconds * sample_rate), dtype=np.float32)
+        self.voice = np.zeros(int(seconds * sample_rate), dtype=np.float32)
+        self.speaker_end = 0
+        self.aborted_at = None
+        self.lock = threading.Lock()
+        self.started = time.monotonic()
+        self.output = _RoomOutput(self)
+        self.input = _RoomInput(self)
+
+    def elapsed(self):
+        return time.monotonic() - self.started
+
+    def index_now(self):
+        return int(self.elapsed() * self.sample_rate)
+
+    def say(self, samples, after=0.0):
+        """使用者在 after 秒後開始說話，回傳開始的時間 (time.monotonic)"""
+        start = self.index_now() + int(after * self.sample_rate)
+        end = min(start + len(samples), len(self.voice))
+        with self.lock:
+            self.voice[start:end] += samples[:end - start]
+        return self.started + start / self.sample_rate
+
+    def microphone(self, start, stop):
+        """start～stop 這段時間麥克風收到的聲音（不含噪音）"""
+        echo_start = start - self.delay
+        reflection = int(0.007 * self.sample_rate)
+        direct = self._speaker(echo_start, stop - self.delay)
+        reflected = self._speaker(echo_start - reflection, stop - self.delay - reflection)
+        return self.gain * (direct + 0.4 * reflected) + self.voice[start:stop]
+
+    def _speaker(self, start, stop):
+        out = np.zeros(stop - start, dtype=np.float32)
+        lo = max(start, 0)
+        if stop > lo:
+            out[lo - start:] = self.speaker[lo:stop]
+        return out
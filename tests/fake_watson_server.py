@@ -0,0 +1,324 @@
+import base64
+import hashlib
+import json
+import random
+import struct
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+WEBSOCKET_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+
+class FakeRecognizerHandler(BaseHTTPRequestHandler):
+    """模擬 Watson Speech to Text 的 websocket 識別介面與 Assistant 的 message API"""
+
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True  # 標頭與內容分兩次寫入，避免延遲 ACK 造成每次 40 ms
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.headers.get('Upgrade', '').lower() != 'websocket':
+            self.send_error(404)
+            return
+
+        key = self.headers['Sec-WebSocket-Key']
+        accept = base64.b64encode(hashlib.sha1((key + WEBSOCKET_GUID).encode()).digest()).decode()
+        self.send_response(101)
+        self.send_header('Upgrade', 'websocket')
+        self.send_header('Connection', 'Upgrade')
+        self.send_header('Sec-WebSocket-Accept', accept)
+        self.end_headers()
+        self.wfile.flush()
+        self.server.requests.append(self.path)
+        self._recognize_session()
+
+    def _delay(self, kind):
+        """依 server.latency[kind] = (基本秒數, 抖動秒數) 模擬服務延遲"""
+        base, jitter = self.server.latency.get(kind, (0, 0))
+        with self.server.rng_lock:
+            seconds = base + self.server.rng.uniform(-jitter, jitter) if jitter else base
+        if seconds > 0:
+            time.sleep(seconds)
+
+    def _inject_fault(self, kind):
+        """依 server.stalls[kind] 多等幾秒、依 server.errors[kind] 回傳錯誤狀態碼（各自依序用掉一個）
+
+        回傳 True 表示已經回覆錯誤，不必再處理這個請求。
+        """
+        server = self.server
+        with server.rng_lock:
+            stall = server.stalls[kind].pop(0) if server.stalls.get(kind) else 0
+            status = server.errors[kind].pop(0) if server.errors.get(kind) else None
+            server.attempts[kind] = server.attempts.get(kind, 0) + 1
+        if stall:
+            time.sleep(stall)
+        if status is None:
+            return False
+        payload = json.dumps({'code': status, 'error': f"injected {status}"}).encode('utf8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+        return True
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        body = self.rfile.read(length)
+        if self.path.startswith('/identity/token'):
+            self._delay('iam')
+            self._issue_token(body)
+            return
+        if self.path.startswith('/v1/recognize'):
+            if not self._inject_fault('stt'):
+                self._recognize_http(body)
+            return
+        body = json.loads(body or b'{}')
+        self.server.requests.append(self.path)
+        self.server.authorizations.append(self.headers.get('Authorization'))
+
+        if self.path.startswith('/v1/synthesize'):
+            if self._inject_fault('tts'):
+                return
+            self._delay('tts')
+            self.server.synthesize_requests.append(body.get('text', ''))
+            self._send_http_bytes(self.server.synthesized_audio, 'audio/wav')
+            return
+        if '/message' not in self.path:
+            self.send_error(404)
+            return
+        if self._inject_fault('assistant'):
+            return
+        self._delay('assistant')
+        self.server.message_requests.append(body)
+        self._send_http_json(self._assistant_reply(body))
+
+    def _recognize_http(self, audio):
+        """模擬一次上傳整段錄音的識別，回傳目前設定的 transcript"""
+        self.server.requests.append(self.path)
+        self.server.recognize_requests.append((self.headers.get('Content-Type'), len(audio)))
+        self.server.audio_bytes += len(audio)
+        self._delay('stt')
+        self._send_http_json({
+            'result_index': 0,
+            'results': [{'final': True, 'alternatives': [{'transcript': self.server.transcript + " "}]}]
+        })
+
+    def _issue_token(self, body):
+        """模擬 IAM：回傳可解碼（未簽章）的 JWT，有效期為 token_ttl 秒"""
+        server = self.server
+        form = urllib.parse.parse_qs(body.decode('utf8'))
+        server.token_requests.append(form.get('apikey', [''])[0])
+        now = int(time.time())
+
+        def encode(part):
+            return base64.urlsafe_b64encode(json.dumps(part).encode()).rstrip(b'=').decode()
+
+        claims = {'iat': now, 'exp': now + server.token_ttl, 'n': len(server.token_requests)}
+        token = f"{encode({'alg': 'RS256', 'typ': 'JWT'})}.{encode(claims)}.c2lnbmF0dXJl"
+        self._send_http_json({'access_token': token, 'refresh_token': 'unused', 'token_type': 'Bearer',
+                              'expires_in': server.token_ttl, 'expiration': now + server.token_ttl})
+
+    def _assistant_reply(self, body):
+        """依輸入文字回覆；回覆文字帶有請求序號，測試可分辨是否來自快取"""
+        server = self.server
+        message_input = body.get('input', {})
+        text = message_input.get('text', '')
+        node = server.dialog_nodes.get(text.lower().strip(), 'node_default')
+        user_defined = dict(((body.get('context') or {}).get('skills', {})
+                             .get('main skill', {}).get('user_defined') or {}))
+        user_defined.update(server.set_context.get(node, {}))
+
+        output = {
+            'generic': [{'response_type': 'text', 'text': f"reply {len(server.message_requests)}: {text}"}],
+            'intents': [{'intent': server.intents[text.lower().strip()], 'confidence': 1.0}]
+                       if text.lower().strip() in server.intents else [],
+            'entities': [],
+        }
+        if message_input.get('options', {}).get('debug'):
+            output['debug'] = {'nodes_visited': [{'dialog_node': node, 'title': node}]}
+        return {
+            'output': output,
+            'context': {'skills': {'main skill': {
+                'user_defined': user_defined,
+                'system': {'state': f"state-{len(server.message_requests)}"},
+            }}},
+        }
+
+    def _send_http_json(self, data):
+        self._send_http_bytes(json.dumps(data).encode('utf8'), 'application/json')
+
+    def _send_http_bytes(self, payload, content_type):
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _recognize_session(self):
+        server = self.server
+        words = server.transcript.split()
+        received = 0
+        sent_words = 0
+        finalized = False
+
+        while True:
+            frame = self._read_frame()
+            if frame is None:
+                return
+            opcode, payload = frame
+
+            if opcode == 0x8:  # close
+                self._send_frame(b'', opcode=0x8)
+                return
+
+            if opcode == 0x1:
+                message = json.loads(payload.decode('utf8'))
+                if message.get('action') == 'start':
+                    server.start_messages.append(message)
+                    self._send_json({'state': 'listening'})
+                elif message.get('action') == 'stop':
+                    if not finalized and words:
+                        self._delay('stt')
+                        self._send_result(" ".join(words), final=True)
+                    self._send_json({'state': 'listening'})
+                continue
+
+            if opcode == 0x2 and not finalized:
+                received += len(payload)
+                server.audio_bytes += len(payload)
+
+                # 依收到的音訊量逐字送出暫時結果，模擬即時辨識
+                progress = min(len(words), received * len(words) // max(server.final_after_bytes, 1))
+                if progress > sent_words:
+                    sent_words = progress
+                    self._send_result(" ".join(words[:sent_words]), final=False)
+
+                if received >= server.final_after_bytes:
+                    self._delay('stt')
+                    self._send_result(" ".join(words), final=True)
+                    finalized = True
+
+    def _send_result(self, transcript, final):
+        self._send_json({
+            'result_index': 0,
+            'results': [{
+                'final': final,
+                'alternatives': [{'transcript': transcript + " "}]
+            }]
+        })
+
+    def _send_json(self, data):
+        self._send_frame(json.dumps(data).encode('utf8'))
+
+    def _send_frame(self, payload, opcode=0x1):
+        header = bytes([0x80 | opcode])
+        length = len(payload)
+        if length < 126:
+            header += bytes([length])
+        elif length < 65536:
+            header += bytes([126]) + struct.pack('!H', length)
+        else:
+            header += bytes([127]) + struct.pack('!Q', length)
+        try:
+            self.wfile.write(header + payload)
+            self.wfile.flush()
+        except OSError:
+            pass
+
+    def _read_exact(self, size):
+        data = b''
+        while len(data) < size:
+            chunk = self.rfile.read(size - len(data))
+            if not chunk:
+                return None
+            data += chunk
+        return data
+
+    def _read_frame(self):
+        header = self._read_exact(2)
+        if header is None:
+            return None
+        opcode = header[0] & 0x0F
+        masked = header[1] & 0x80
+        length = header[1] & 0x7F
+        if length == 126:
+            length = struct.unpack('!H', self._read_exact(2))[0]
+        elif length == 127:
+            length = struct.unpack('!Q', self._read_exact(8))[0]
+        mask = self._read_exact(4) if masked else None
+        payload = self._read_exact(length) if length else b''
+        if payload is None:
+            return None
+        if mask:
+            payload = bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+        return opcode, payload
+
+
+class FakeWatsonServer:
+    """在本機啟動的 Watson 替身伺服器，供測試使用"""
+
+    def __init__(self, transcript="hello tjbot", final_after_bytes=32000, latency=None, seed=0):
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), FakeRecognizerHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.transcript = transcript
+        self.httpd.final_after_bytes = final_after_bytes
+        self.httpd.audio_bytes = 0
+        self.httpd.requests = []
+        self.httpd.start_messages = []
+        self.httpd.message_requests = []
+        self.httpd.dialog_nodes = {}  # 輸入文字 -> 對話節點
+        self.httpd.set_context = {}  # 對話節點 -> 回覆時設定的 user_defined 變數
+        self.httpd.intents = {}  # 輸入文字 -> 回覆的意圖
+        self.httpd.token_requests = []  # 每次 IAM token 請求使用的 API key
+        self.httpd.token_ttl = 3600
+        self.httpd.authorizations = []  # 服務請求帶的 Authorization 標頭
+        self.httpd.synthesize_requests = []
+        self.httpd.recognize_requests = []  # (Content-Type, 位元組數)
+        # 模擬延遲：'stt' / 'assistant' / 'tts' / 'iam' -> (基本秒數, 抖動秒數)，抖動以固定種子產生
+        self.httpd.latency = dict(latency or {})
+        self.httpd.rng = random.Random(seed)
+        self.httpd.rng_lock = threading.Lock()
+        # 故障注入：'stt' / 'assistant' / 'tts' -> 接下來每個請求依序用掉一個
+        self.httpd.errors = {}  # 回傳的錯誤狀態碼，例如 [503, 503]
+        self.httpd.stalls = {}  # 額外等待的秒數，例如 [2.0]（0 表示不等）
+        self.httpd.attempts = {}  # 各服務收到的 HTTP 請求數（含注入錯誤的）
+        # 0.1 秒 22050Hz 靜音 WAV
+        self.httpd.synthesized_audio = (b'RIFF' + struct.pack('<I', 36 + 4410) + b'WAVEfmt '
+                                        + struct.pack('<IHHIIHH', 16, 1, 1, 22050, 44100, 2, 16)
+                                        + b'data' + struct.pack('<I', 4410) + b'\x00' * 4410)
+        self.thread = None
+
+    @property
+    def port(self):
+        return self.httpd.server_address[1]
+
+    @property
+    def ws_url(self):
+        return f"ws://127.0.0.1:{self.port}"
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.port}"
+
+    def __getattr__(self, name):
+        return getattr(self.httpd, name)
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
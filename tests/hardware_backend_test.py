@@ -0,0 +1,94 @@
+import os
+import types
+
+from src import hardware_backend
+from src.hardware_backend import SimulatedBackend, create_backend
+from src.hardware_control import COLOR_MAP, HardwareControl
+from tests.motion_scheduler_test import SimulatedClock
+
+
+def _simulated_hardware(led_count=1):
+    clock = SimulatedClock()
+    backend = SimulatedBackend(led_count=led_count, clock=clock.time)
+    return HardwareControl(led_count=led_count, backend=backend, clock=clock.time, sleep=clock.sleep), backend
+
+
+def test_create_backend_from_config():
+    os.environ['HARDWARE_BACKEND'] = 'simulated'
+    try:
+        backend = create_backend(led_count=3)
+    finally:
+        del os.environ['HARDWARE_BACKEND']
+    assert backend.name == 'simulated'
+    assert backend.pixels == [(0, 0, 0)] * 3
+
+    try:
+        create_backend('gpio-expander')
+        assert False, "應該拒絕未知的驅動"
+    except ValueError:
+        pass
+
+
+def test_auto_backend_only_falls_back_without_drivers():
+    # 這裡沒有 RPi.GPIO / neopixel：auto 改用模擬
+    assert create_backend('auto').name == 'simulated'
+
+    # 有驅動模組但初始化失敗（例如沒有 root 權限）時要讓呼叫端知道，不能改用模擬
+    def setup(pin, mode):
+        raise RuntimeError("No access to /dev/mem")
+
+    gpio = types.SimpleNamespace(setwarnings=lambda flag: None, cleanup=lambda: None, setmode=lambda mode: None,
+                                 BCM='BCM', OUT='OUT', setup=setup)
+    original = hardware_backend._import_drivers
+    hardware_backend._import_drivers = lambda: (gpio, None, None)
+    try:
+        create_backend('auto')
+    except RuntimeError as e:
+        assert '/dev/mem' in str(e)
+    else:
+        raise AssertionError("樹莓派上的初始化錯誤不應該被吞掉")
+    finally:
+        hardware_backend._import_drivers = original
+
+
+def test_simulated_backend_records_servo_timeline():
+    hardware, backend = _simulated_hardware()
+    hardware.wave().result(timeout=5)
+    hardware.cleanup()
+
+    # 位置不明時以最遠的一端估計；90 度 0.16 秒（600 度/秒，進位到 tick），
+    # 180 度要 0.3 秒但定義只給 0.2 秒，照定義換下一步；整個動作不會比定義的 1.2 秒慢
+    assert [(round(t, 6), duty) for t, duty in backend.servo_log] == [
+        (0.0, 7.5), (0.16, 2.5), (0.32, 12.5), (0.52, 2.5), (0.72, 12.5), (0.92, 7.5), (1.12, 0.0)]
+    assert backend.closed
+
+
+def test_simulated_backend_records_pixel_frames():
+    hardware, backend = _simulated_hardware(led_count=4)
+    hardware.shine("purple").result(timeout=5)
+    hardware.shine("not-a-color").result(timeout=5)
+    hardware.cleanup()
+
+    assert [pixels for _, pixels in backend.frames] == [
+        (COLOR_MAP["purple"],) * 4,
+        ((255, 255, 255),) * 4,
+    ]
+
+
+def test_dance_runs_headless():
+    hardware, backend = _simulated_hardware()
+    hardware.dance().result(timeout=5)
+    hardware.cleanup()
+
+    assert abs(backend.frames[-1][0] - 6.1) < 1e-6
+    assert backend.frames[-1][1] == (COLOR_MAP["off"],)
+    assert backend.duty == 0
+
+
+if __name__ == "__main__":
+    test_create_backend_from_config()
+    test_auto_backend_only_falls_back_without_drivers()
+    test_simulated_backend_records_servo_timeline()
+    test_simulated_backend_records_pixel_frames()
+    test_dance_runs_headless()
+    print("All hardware backend tests passed.")
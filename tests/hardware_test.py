@@ -7,31 +7,38 @@ def test_hardware():
         hardware = HardwareControl(led_count=1, led_pin=18)
 
         print("Testing servo motor: Raising arm...")
-        hardware.raise_arm()
+        hardware.raise_arm().result()
         time.sleep(1)
 
         print("Testing servo motor: Lowering arm...")
-        hardware.lower_arm()
+        hardware.lower_arm().result()
         time.sleep(1)
 
         print("Testing servo motor: Waving...")
-        hardware.wave()
+        hardware.wave().result()
         time.sleep(1)
 
         print("Testing Neopixel LED: Shining red...")
-        hardware.shine("red")
+        hardware.shine("red").result()
         time.sleep(1)
 
         print("Testing Neopixel LED: Shining green...")
-        hardware.shine("green")
+        hardware.shine("green").result()
         time.sleep(1)
 
         print("Testing Neopixel LED: Shining blue...")
-        hardware.shine("blue")
+        hardware.shine("blue").result()
+        time.sleep(1)
+
+        print("Testing dance interrupted by shine...")
+        dance = hardware.dance()
+        time.sleep(2)
+        hardware.shine("purple").result()  # 取代跳舞中的燈光軌道
+        dance.result()
         time.sleep(1)
 
         print("Testing Neopixel LED: Turning off...")
-        hardware.shine("off")
+        hardware.shine("off").result()
         time.sleep(1)
 
     except KeyboardInterrupt:
@@ -0,0 +1,55 @@
+import os
+
+from src.hardware_backend import SimulatedBackend
+from src.hardware_control import COLOR_MAP, HardwareControl
+from src.intent_classifier import IntentClassifier, char_ngrams
+
+SKILL_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'materials', 'TJBot Skill Sample.json')
+
+
+def test_char_ngrams_pad_words():
+    assert char_ngrams("Hi!", (2, 3)) == [' h', 'hi', 'i ', ' hi', 'hi ']
+
+
+def test_skill_examples_classify_to_their_intent():
+    classifier = IntentClassifier.from_skill(SKILL_PATH)
+    for text, intent in [("wave your arm", 'wave'), ("raise your arm", 'raise-arm'),
+                         ("put your hand down", 'lower-arm'), ("tell me a joke", 'tell-joke')]:
+        assert classifier.classify(text)['intent'] == intent
+
+
+def test_fast_path_only_for_confident_hardware_commands():
+    classifier = IntentClassifier.from_skill(SKILL_PATH)
+
+    result = classifier.fast_path("make the light red")
+    assert result['intent'] == 'shine'
+    assert result['entities'] == [{'entity': 'color', 'value': 'red'}]
+    assert classifier.fast_path("raise your arm up")['intent'] == 'raise-arm'
+
+    # 沒說顏色的 shine 交給雲端決定，不會先亮成白色
+    assert classifier.classify("change the color")['intent'] == 'shine'
+    assert classifier.fast_path("change the color") is None
+
+    # 非硬體意圖、或與訓練範例不像的句子都交給雲端
+    assert classifier.fast_path("hello") is None
+    assert classifier.fast_path("how is the weather today") is None
+
+
+def test_perform_runs_fast_path_result():
+    backend = SimulatedBackend()
+    hardware = HardwareControl(backend=backend)
+    classifier = IntentClassifier.from_skill(SKILL_PATH)
+
+    fast = classifier.fast_path("change the color to green")
+    hardware.perform(fast['intent'], fast['entities']).result(timeout=2)
+    assert hardware.perform('greeting', []) is None
+    hardware.cleanup()
+    assert backend.pixels == [COLOR_MAP['green']]
+
+
+if __name__ == "__main__":
+    test_char_ngrams_pad_words()
+    test_skill_examples_classify_to_their_intent()
+    test_fast_path_only_for_confident_hardware_commands()
+    test_perform_runs_fast_path_result()
+    print("All intent classifier tests passed.")
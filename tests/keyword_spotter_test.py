@@ -0,0 +1,101 @@
+import threading
+import numpy as np
+from ibm_cloud_sdk_core.authenticators import NoAuthAuthenticator
+
+from src.audio_input import ReplayInput
+from src.keyword_spotter import KeywordSpotter, MfccExtractor
+from src.speech_to_text import SpeechToText
+from tests.audio_fixtures import KEYWORD, OTHER_WORDS, SAMPLE_RATE, concat, silence, speech, word
+from tests.fake_watson_server import FakeWatsonServer
+
+
+def _spotter(rate=SAMPLE_RATE):
+    spotter = KeywordSpotter(rate)
+    # 樣板以 16kHz 錄製，比對時可以用不同的採樣率
+    for i, (pitch, speed) in enumerate([(110, 1.0), (130, 0.9), (120, 1.1)]):
+        spotter.enroll(word(KEYWORD, 16000, pitch=pitch, speed=speed, seed=i), 16000)
+    return spotter
+
+
+def _detections(spotter, samples):
+    spotter.reset()
+    samples = (np.clip(samples, -1, 1) * 32767).astype(np.int16)
+    return [i / SAMPLE_RATE for i in range(0, len(samples), 1024)
+            if spotter.process(samples[i:i + 1024].reshape(-1, 1))]
+
+
+def test_mfcc_shapes():
+    extractor = MfccExtractor(16000)
+    features, energies = extractor.compute(np.zeros(16000, dtype=np.float32))
+    assert features.shape == (98, 13) and energies.shape == (98,)
+    assert extractor.compute(np.zeros(100))[0].shape == (0, 13)
+
+
+def test_detects_keyword_between_other_speech():
+    spotter = _spotter()
+    for i, (pitch, speed) in enumerate([(100, 1.0), (150, 0.8), (125, 1.25)]):
+        keyword = word(KEYWORD, pitch=pitch, speed=speed, seed=10 + i)
+        samples = concat(silence(0.5), speech(0.8, pitch=150), silence(0.3), keyword, speech(1.0), silence(0.5))
+        detections = _detections(spotter, samples)
+        # 只觸發一次，而且在喚醒詞說完後不久
+        keyword_end = 0.5 + 0.8 + 0.3 + len(keyword) / SAMPLE_RATE
+        assert len(detections) == 1, detections
+        assert keyword_end - 0.3 < detections[0] < keyword_end + 0.3
+
+
+def test_rejects_other_words_and_skips_silence():
+    spotter = _spotter()
+    for i, syllables in enumerate(OTHER_WORDS):
+        samples = concat(silence(0.3), word(syllables, pitch=125, seed=20 + i), silence(0.2), speech(1.0))
+        assert _detections(spotter, samples) == []
+
+    # 安靜時只算能量，不做 DTW
+    spotter.checks = 0
+    assert _detections(spotter, silence(5.0)) == []
+    assert spotter.checks == 0
+
+
+def test_enroll_rejects_silence():
+    try:
+        KeywordSpotter(16000).enroll(silence(1.0, rate=16000), 16000)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("靜音不能當作樣板")
+
+
+def test_always_on_streams_only_audio_after_wake_word():
+    before = concat(silence(0.3), speech(1.5, pitch=150), silence(0.3))
+    after = concat(silence(0.2), speech(1.0), silence(0.2))
+    keyword = word(KEYWORD, pitch=125, seed=30)
+    samples = concat(before, keyword, after)
+
+    with FakeWatsonServer(transcript="wave to me", final_after_bytes=10 ** 9) as server:
+        replay = ReplayInput(samples, SAMPLE_RATE, speed=2.0)
+        stt = SpeechToText('key', server.url, streaming=True, audio_input=replay)
+        stt.speech_to_text.authenticator = NoAuthAuthenticator()
+
+        assert stt.listen_for_keyword(_spotter()) == "wave to me"
+        # 喚醒詞之前的 2 秒沒有上傳；上傳的只有之後的話（16kHz int16）。
+        # 錄音區塊的切法隨執行時間變動，觸發點可能早一個區塊，所以上限從喚醒詞開頭算起，
+        # 加上端點偵測的尾端靜音與一個區塊，不依賴重播是否剛好即時
+        limit = (len(keyword) + len(after)) / SAMPLE_RATE + stt.trailing_silence + 1024 / SAMPLE_RATE
+        assert 0 < server.audio_bytes < limit * 16000 * 2
+        assert len(server.start_messages) == 1
+
+        # 沒有喚醒詞時一直等待，stop_event 設定後回傳空字串
+        stop = threading.Event()
+        threading.Timer(0.3, stop.set).start()
+        assert stt.listen_for_keyword(_spotter(), stop_event=stop) == ""
+        assert len(server.start_messages) == 1
+        stt.stop_always_on()
+        assert stt.always_on_stream is None
+
+
+if __name__ == "__main__":
+    test_mfcc_shapes()
+    test_detects_keyword_between_other_speech()
+    test_rejects_other_words_and_skips_silence()
+    test_enroll_rejects_silence()
+    test_always_on_streams_only_audio_after_wake_word()
+    print("All keyword spotter tests passed.")
@@ -0,0 +1,92 @@
+import colorsys
+import time
+import numpy as np
+
+from src.hardware_backend import SimulatedBackend
+from src.hardware_control import COLOR_MAP, HardwareControl
+from src.led_effects import BREATH, HUE_WHEEL, LedEffectRenderer, create_effect
+
+
+def test_lookup_tables_match_colorsys():
+    for i in range(0, 256, 16):
+        expected = [round(c * 255) for c in colorsys.hsv_to_rgb(i / 256, 1, 1)]
+        assert np.abs(HUE_WHEEL[i].astype(int) - expected).max() <= 1
+    assert BREATH[0] == 0 and BREATH[128] == 256
+    assert np.all(np.diff(BREATH[:129].astype(int)) >= 0)
+
+
+def test_effects_render_whole_frames():
+    for count in (1, 12, 300):
+        breathe = create_effect('breathe', count, COLOR_MAP["blue"], period=2.0)
+        assert breathe.render(0.0).tolist() == [[0, 0, 0]] * count
+        assert breathe.render(1.0).tolist() == [[0, 0, 255]] * count
+
+        rainbow = create_effect('rainbow', count, period=1.0)
+        frame = rainbow.render(0.0)
+        assert frame.shape == (count, 3) and frame.dtype == np.uint8
+        assert frame[0].tolist() == HUE_WHEEL[0].tolist()
+        # 色相隨時間轉動
+        assert rainbow.render(0.25)[0].tolist() == HUE_WHEEL[64].tolist()
+
+    # 呼吸彩虹：色相相同，亮度隨呼吸週期變化
+    breathing = create_effect('rainbow', 12, period=4.0, breathe=True, breathe_period=2.0)
+    assert breathing.render(0.0).tolist() == [[0, 0, 0]] * 12
+    assert breathing.render(1.0)[0].tolist() == HUE_WHEEL[64].tolist()
+
+    # 彩虹沿著燈條分布；追逐的亮點每秒前進 speed 顆
+    assert len({tuple(c) for c in create_effect('rainbow', 12).render(0.0).tolist()}) == 12
+    chase = create_effect('chase', 12, COLOR_MAP["red"], speed=10.0, tail=2)
+    frame = chase.render(0.5)
+    assert np.argmax(frame[:, 0]) == 5
+    assert frame[5, 0] > frame[4, 0] > frame[3, 0] > 0 and frame[6, 0] == 0 and frame[2, 0] == 0
+
+
+def test_color_wheel_stays_near_entity_color():
+    effect = create_effect('color_wheel', 60, COLOR_MAP["blue"], spread=0.25)
+    blue_hue = 2.0 / 3.0
+    for t in np.linspace(0, 10, 23):
+        for r, g, b in effect.render(t).tolist():
+            hue = colorsys.rgb_to_hsv(r / 255, g / 255, b / 255)[0]
+            assert abs(hue - blue_hue) <= 0.125 + 1 / 256
+
+    # 白色沒有色相，走完整個色相環
+    hues = {tuple(c) for c in create_effect('color_wheel', 60, COLOR_MAP["white"]).render(0.0).tolist()}
+    assert len(hues) > 30
+
+
+def test_renderer_caps_frame_rate_and_stops():
+    frames = []
+    renderer = LedEffectRenderer(lambda frame: frames.append(frame.copy()), fps=20)
+    renderer.start(create_effect('rainbow', 30, period=1.0))
+    time.sleep(0.5)
+    renderer.stop()
+    count = len(frames)
+    time.sleep(0.1)
+
+    assert 6 <= count <= 12
+    assert len(frames) == count
+    assert not renderer.running
+    assert renderer.stats()['frames'] == count
+
+
+def test_shine_replaces_running_effect():
+    backend = SimulatedBackend(led_count=12)
+    hardware = HardwareControl(led_count=12, backend=backend)
+    hardware.effect('chase', 'green')
+    time.sleep(0.2)
+    assert hardware.effects.running
+    assert len(backend.frames) >= 2
+
+    hardware.shine('red').result(timeout=5)
+    assert not hardware.effects.running
+    hardware.cleanup()
+    assert backend.frames[-1][1] == (COLOR_MAP["red"],) * 12
+
+
+if __name__ == "__main__":
+    test_lookup_tables_match_colorsys()
+    test_effects_render_whole_frames()
+    test_color_wheel_stays_near_entity_color()
+    test_renderer_caps_frame_rate_and_stops()
+    test_shine_replaces_running_effect()
+    print("All LED effect tests passed.")
@@ -0,0 +1,72 @@
+import time
+
+from src.hardware_backend import SimulatedBackend
+from src.hardware_control import COLOR_MAP
+from src.led_state import LedState
+from tests.hardware_backend_test import _simulated_hardware
+from tests.motion_scheduler_test import SimulatedClock
+
+
+def test_identical_frames_are_not_rewritten():
+    clock = SimulatedClock()
+    backend = SimulatedBackend(led_count=8, clock=clock.time)
+    leds = LedState(backend, 8, clock=clock.time)
+    for _ in range(10):
+        leds.fill(COLOR_MAP["blue"])
+        clock.sleep(0.1)
+    leds.close()
+
+    assert [pixels for _, pixels in backend.frames] == [(COLOR_MAP["blue"],) * 8]
+    assert leds.stats() == {'requests': 10, 'writes': 1, 'redundant': 9, 'coalesced': 0}
+
+
+def test_burst_is_coalesced_into_one_write_per_tick():
+    backend = SimulatedBackend(led_count=3)
+    leds = LedState(backend, 3, tick_rate=50)
+    started = time.monotonic()
+    for color in ("red", "green", "blue", "yellow", "purple"):
+        leds.fill(COLOR_MAP[color])
+    assert time.monotonic() - started < 0.01  # 呼叫端不會等 tick
+
+    # 第一個立刻寫入，其餘在下一個 tick 只寫出最後一個
+    deadline = time.monotonic() + 1
+    while len(backend.frames) < 2 and time.monotonic() < deadline:
+        time.sleep(0.005)
+    leds.close()
+    assert [pixels[0] for _, pixels in backend.frames] == [COLOR_MAP["red"], COLOR_MAP["purple"]]
+    assert backend.frames[1][0] - backend.frames[0][0] >= 0.02 - 1e-3
+    assert leds.stats() == {'requests': 5, 'writes': 2, 'redundant': 0, 'coalesced': 3}
+
+
+def test_pending_frame_back_to_shown_is_dropped_and_pixels_merge():
+    clock = SimulatedClock()
+    backend = SimulatedBackend(led_count=3, clock=clock.time)
+    leds = LedState(backend, 3, clock=clock.time)
+    leds.fill(COLOR_MAP["off"])
+    leds.fill(COLOR_MAP["red"])  # 同一個 tick 內又改回去，不必寫
+    leds.fill(COLOR_MAP["off"])
+    leds.flush()
+    assert len(backend.frames) == 1
+
+    clock.sleep(0.1)
+    leds.set_pixel(1, COLOR_MAP["green"])
+    leds.close()
+    assert backend.frames[-1][1] == (COLOR_MAP["off"], COLOR_MAP["green"], COLOR_MAP["off"])
+
+
+def test_hardware_control_skips_repeated_shine():
+    hardware, backend = _simulated_hardware(led_count=4)
+    for _ in range(5):
+        hardware.shine("green").result(timeout=5)
+    hardware.cleanup()
+
+    assert [pixels for _, pixels in backend.frames] == [(COLOR_MAP["green"],) * 4]
+    assert hardware.leds.stats()['redundant'] == 4
+
+
+if __name__ == "__main__":
+    test_identical_frames_are_not_rewritten()
+    test_burst_is_coalesced_into_one_write_per_tick()
+    test_pending_frame_back_to_shown_is_dropped_and_pixels_merge()
+    test_hardware_control_skips_repeated_shine()
+    print("All LED state tests passed.")
@@ -1,20 +1,21 @@
-from rpi_ws281x import PixelStrip, Color
+from src.hardware_backend import create_backend
 
 
 def test_led():
     LED_COUNT = 1  # LED 燈的數量
     LED_PIN = 18   # GPIO 引腳
 
-    strip = PixelStrip(LED_COUNT, LED_PIN, 800000, 10, False, 255, 0)
-    strip.begin()
-
-    # 亮紅燈
-    strip.setPixelColor(0, Color(255, 0, 0))
-    strip.show()
-    input("Press Enter to turn off the LED...")
-    # 關閉 LED
-    strip.setPixelColor(0, Color(0, 0, 0))
-    strip.show()
+    # HARDWARE_BACKEND=simulated 時不需要樹莓派也能執行
+    backend = create_backend(led_count=LED_COUNT, led_pin=LED_PIN)
+    print(f"使用 {backend.name} 驅動")
+    try:
+        # 亮紅燈
+        backend.fill((255, 0, 0))
+        input("Press Enter to turn off the LED...")
+        # 關閉 LED
+        backend.fill((0, 0, 0))
+    finally:
+        backend.cleanup()
 
 if __name__ == "__main__":
-    test_led()
\ No newline at end of file
+    test_led()
@@ -1,13 +1,19 @@
 from src.watson_assistant import WatsonAssistant
 from src.text_to_speech import TextToSpeech
 from src.hardware_control import HardwareControl
+from src.intent_classifier import IntentClassifier
+from src.conversation_pipeline import ConversationPipeline
+from src.tracing import now
 from ibm_watson import SpeechToTextV1
 from ibm_cloud_sdk_core.authenticators import IAMAuthenticator
 import pyaudio
 import asyncio
 import os
+import time
 from dotenv import load_dotenv
 
+SKILL_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'materials', 'TJBot Skill Sample.json')
+
 class SpeechToText:
     def __init__(self, apikey, url):
         # 初始化 Speech to Text 服務
@@ -81,53 +87,52 @@ async def main():
     tts = TextToSpeech(tts_apikey, tts_url)
     stt = SpeechToText(stt_apikey, stt_url)
     hardware = HardwareControl()
+    classifier = IntentClassifier.from_skill(SKILL_PATH)
 
     print("TJBot is ready to interact with you using voice and hardware!")
     stt.start_microphone()
 
-    try:
-        while True:
-            # 從麥克風捕獲語音並轉錄
+    loop = asyncio.get_running_loop()
+    stopped = asyncio.Event()
+
+    class Listener:
+        """包住 stt.listen，聽到 stop 就結束
+
+        這個錄音沒有回音消除：播放回覆時不錄音，錄音期間有播放就丟掉這段，
+        否則會把 TJBot 自己的回覆當成使用者說的話（邊說邊聽請用 VOICE_BARGE_IN 的回音消除）。
+        """
+
+        def listen(self):
+            while tts.playing:
+                time.sleep(0.05)
+            started = now()
             print("Listening for your command...")
             user_input = stt.listen().strip()
-            if not user_input:
-                continue
-
+            if tts.playing or (tts.stopped_at or 0) > started:
+                return ""
             if "stop" in user_input.lower():
                 print("Stopping...")
-                break
-
-            # 發送訊息到 Assistant 並獲取回應
-            response = assistant.send_message(user_input)
-            if response:
-                intents = response.get('output', {}).get('intents', [])
-                entities = response.get('output', {}).get('entities', [])
-                response_texts = response.get('output', {}).get('generic', [])
-
-                for text in response_texts:
-                    if text['response_type'] == 'text':
-                        print(f"TJBot: {text['text']}")
-                        tts.speak(text['text'])  # 語音回應
-
-                # 處理 Assistant 的意圖
-                if intents:
-                    top_intent = intents[0]['intent']
-                    if top_intent == 'wave':
-                        hardware.wave()
-                    elif top_intent == 'lower-arm':
-                        hardware.lower_arm()
-                    elif top_intent == 'raise-arm':
-                        hardware.raise_arm()
-                    elif top_intent == 'shine':
-                        # 從 entities 提取顏色
-                        color = next((e['value'] for e in entities if e['entity'] == 'color'), 'white')
-                        hardware.shine(color)
-            else:
-                print("No response from Assistant.")
-
-    except KeyboardInterrupt:
+                loop.call_soon_threadsafe(stopped.set)
+                return ""
+            return user_input
+
+    def on_event(name, turn):
+        if name == 'reply':
+            for reply in turn.replies:
+                print(f"TJBot: {reply}")
+        elif name == 'interrupted':
+            print("(interrupted)")
+
+    # 聆聽、Assistant、語音播放與硬體動作在管線中平行進行；動作進行中仍在聆聽下一句
+    pipeline = ConversationPipeline(assistant, tts=tts, hardware=hardware, stt=Listener(),
+                                    classifier=classifier, on_event=on_event)
+    await pipeline.start()
+    try:
+        await stopped.wait()
+    except (KeyboardInterrupt, asyncio.CancelledError):
         print("Program terminated by user.")
     finally:
+        await pipeline.stop()
         stt.stop_microphone()
         hardware.cleanup()
 
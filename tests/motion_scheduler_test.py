@@ -0,0 +1,125 @@
+import threading
+import time
+from concurrent.futures import CancelledError
+
+from src.animation import compile_gesture
+from src.motion_scheduler import MotionScheduler
+
+COLORS = {'red': (255, 0, 0), 'green': (0, 255, 0), 'blue': (0, 0, 255), 'off': (0, 0, 0)}
+
+
+def _gesture(name, tracks, cancel_values=None):
+    return compile_gesture(name, {'tracks': tracks, 'cancel': cancel_values or {}}, color_map=COLORS)
+
+
+class SimulatedClock:
+    """模擬時鐘：sleep 直接把時間往前推"""
+
+    def __init__(self):
+        self.now = 0.0
+        self.lock = threading.Lock()
+
+    def time(self):
+        with self.lock:
+            return self.now
+
+    def sleep(self, seconds):
+        with self.lock:
+            self.now += seconds
+
+
+class Recorder:
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self.events = []
+
+    def output(self, track):
+        return lambda value: self.events.append((self.clock(), track, value))
+
+
+def _scheduler(recorder, **kwargs):
+    return MotionScheduler({'servo': recorder.output('servo'), 'led': recorder.output('led')}, **kwargs)
+
+
+def test_keyframes_run_on_schedule_with_simulated_clock():
+    clock = SimulatedClock()
+    recorder = Recorder(clock.time)
+    scheduler = _scheduler(recorder, clock=clock.time, sleep=clock.sleep)
+
+    gesture = _gesture('wave', {'servo': [(0.0, 7.5), (0.2, 2.5), (0.4, 12.5), (0.6, 0)]})
+    assert scheduler.submit(gesture).result(timeout=2) == 'wave'
+    scheduler.shutdown()
+
+    assert [(round(t, 6), v) for t, _, v in recorder.events] == [(0.0, 7.5), (0.2, 2.5), (0.4, 12.5), (0.6, 0)]
+
+
+def test_submit_does_not_block_caller():
+    recorder = Recorder()
+    scheduler = _scheduler(recorder)
+    started = time.monotonic()
+    future = scheduler.submit(_gesture('raise_arm', {'servo': [(0.0, 12.5), (0.3, 0)]}))
+    assert time.monotonic() - started < 0.05
+    assert not future.done()
+    assert future.result(timeout=2) == 'raise_arm'
+    scheduler.shutdown()
+
+
+def test_shine_preempts_only_led_track_of_dance():
+    recorder = Recorder()
+    scheduler = _scheduler(recorder)
+    dance = scheduler.submit(_gesture('dance', {
+        'servo': [(0.0, 7.5), (0.1, 2.5), (0.3, 12.5)],
+        'led': [(0.0, 'red'), (0.2, 'green'), (0.3, 'off')],
+    }))
+    time.sleep(0.05)
+    shine = scheduler.submit(_gesture('shine', {'led': [(0.0, 'blue')]}))
+
+    assert shine.result(timeout=2) == 'shine'
+    assert dance.result(timeout=2) == 'dance'
+    scheduler.shutdown()
+
+    led = [v for _, track, v in recorder.events if track == 'led']
+    servo = [v for _, track, v in recorder.events if track == 'servo']
+    assert led == [COLORS['red'], COLORS['blue']]
+    assert servo == [7.5, 2.5, 12.5]
+
+
+def test_preempting_all_tracks_cancels_future_and_applies_cancel_value():
+    recorder = Recorder()
+    scheduler = _scheduler(recorder)
+    wave = scheduler.submit(_gesture('wave', {'servo': [(0.0, 7.5), (0.5, 2.5)]}, {'servo': 0}))
+    time.sleep(0.05)
+    lower = scheduler.submit(_gesture('lower_arm', {'servo': [(0.0, 2.5)]}))
+
+    lower.result(timeout=2)
+    assert wave.cancelled()
+    scheduler.shutdown()
+    assert [v for _, _, v in recorder.events] == [7.5, 0, 2.5]
+
+
+def test_caller_can_cancel_future():
+    recorder = Recorder()
+    scheduler = _scheduler(recorder)
+    future = scheduler.submit(_gesture('wave', {'servo': [(0.0, 7.5), (0.2, 2.5), (0.4, 12.5)]}, {'servo': 0}))
+    time.sleep(0.05)
+    assert future.cancel()
+    # 取消值立即送出，不必等到下一個關鍵影格
+    assert [v for _, _, v in recorder.events] == [7.5, 0]
+    time.sleep(0.3)
+    scheduler.shutdown()
+
+    try:
+        future.result()
+        assert False, "應該被取消"
+    except CancelledError:
+        pass
+    assert [v for _, _, v in recorder.events] == [7.5, 0]
+
+
+if __name__ == "__main__":
+    test_keyframes_run_on_schedule_with_simulated_clock()
+    test_submit_does_not_block_caller()
+    test_shine_preempts_only_led_track_of_dance()
+    test_preempting_all_tracks_cancels_future_and_applies_cancel_value()
+    test_caller_can_cancel_future()
+    print("All motion scheduler tests passed.")
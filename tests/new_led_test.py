@@ -1,33 +1,26 @@
 import time
-import math
-import board
-import neopixel
-import colorsys
+
+from src.hardware_control import HardwareControl
 
 
 def main():
 
     num_pixels = 1  # LED 數量，可改為你的實際數量
-    pixels = neopixel.NeoPixel(board.D13, num_pixels, brightness=1.0, auto_write=False, pixel_order=neopixel.RGB)
+    # HARDWARE_BACKEND=simulated 時不需要樹莓派也能執行
+    hardware = HardwareControl(led_count=num_pixels, led_pin=13)
+    print(f"使用 {hardware.backend.name} 驅動，按 Ctrl+C 結束")
     try:
-        hue = 0.0  # 色相初始值
+        # 呼吸彩虹：色相 10 秒一圈、亮度 3.6 秒呼吸一次，由背景執行緒渲染
+        hardware.effect('rainbow', period=10.0, breathe=True, breathe_period=3.6)
         while True:
-            for i in range(0, 360, 2):  # 呼吸波：0~360 度
-                # 計算亮度（呼吸節奏）
-                breath = (math.sin(math.radians(i)) + 1) / 2  # 範圍 0~1
-                # HSV 轉 RGB（色相持續變化，飽和度與亮度為1）
-                r, g, b = colorsys.hsv_to_rgb(hue, 1, breath)
-                rgb = (int(r * 255), int(g * 255), int(b * 255))
-                pixels.fill(rgb)
-                pixels.show()
-                time.sleep(0.02)
-                hue += 0.002  # 色相平滑改變，彩虹顏色循環
-                if hue > 1:
-                    hue -= 1
+            time.sleep(1)
     except KeyboardInterrupt:
-        pixels.fill((0, 0, 0))
-        pixels.show()
+        hardware.shine("off").result()
+    finally:
+        stats = hardware.effects.stats()
+        hardware.cleanup()
+        print(f"渲染 {stats['frames']} 個影格，每個影格 {stats['cpu_per_frame_ms']:.3f} ms")
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,196 @@
+import time
+
+from ibm_cloud_sdk_core import ApiException
+from ibm_cloud_sdk_core.authenticators import NoAuthAuthenticator
+
+from src.resilience import CircuitOpenError, DeadlineExceeded, ResiliencePolicy
+from src.speech_to_text import SpeechToText
+from src.text_to_speech import TextToSpeech
+from src.watson_assistant import WatsonAssistant
+from tests.audio_fixtures import speech, silence, concat
+from tests.fake_watson_server import FakeWatsonServer
+from tests.response_cache_test import FakeClock
+
+
+class Flaky:
+    """前幾次丟出指定的錯誤，之後成功"""
+
+    def __init__(self, errors, delays=()):
+        self.errors = list(errors)
+        self.delays = list(delays)
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        if self.delays:
+            time.sleep(self.delays.pop(0))
+        if self.errors:
+            raise self.errors.pop(0)
+        return "ok"
+
+
+def test_retries_transient_errors_with_jittered_backoff():
+    pauses = []
+    policy = ResiliencePolicy('test', timeout=1.0, retries=3, backoff=0.1, max_backoff=0.25,
+                              sleep=pauses.append, seed=1)
+    call = Flaky([ApiException(503), ApiException(500), ApiException(429)])
+    assert policy.call(call) == "ok"
+    assert call.calls == 4
+    # full jitter：第 n 次重試等 0～min(max_backoff, backoff * 2^n) 秒
+    assert len(pauses) == 3
+    for attempt, pause in enumerate(pauses):
+        assert 0 <= pause <= min(0.25, 0.1 * 2 ** attempt)
+    assert policy.stats()['retries'] == 3
+
+    # 用戶端錯誤與非冪等的呼叫不重試
+    call = Flaky([ApiException(400)])
+    try:
+        policy.call(call)
+        assert False, "應該丟出 400"
+    except ApiException as e:
+        assert e.status_code == 400
+    assert call.calls == 1
+    call = Flaky([ApiException(503)])
+    try:
+        policy.call(call, idempotent=False)
+        assert False, "非冪等的呼叫不應該重試"
+    except ApiException:
+        pass
+    assert call.calls == 1
+    policy.close()
+
+
+def test_deadline_bounds_slow_calls():
+    policy = ResiliencePolicy('test', timeout=0.2, deadline=0.5, retries=5, backoff=0.01, max_backoff=0.01)
+    started = time.monotonic()
+    try:
+        policy.call(Flaky([], delays=[2.0] * 10))
+        assert False, "應該超過期限"
+    except DeadlineExceeded:
+        pass
+    elapsed = time.monotonic() - started
+    assert 0.45 < elapsed < 0.7
+    assert policy.stats()['timeouts'] >= 2
+
+    # 只有第一次慢：單次逾時後重試成功
+    call = Flaky([], delays=[2.0])
+    started = time.monotonic()
+    assert policy.call(call) == "ok"
+    assert time.monotonic() - started < 0.4
+    policy.close()
+
+
+def test_circuit_breaker_opens_and_recovers():
+    clock = FakeClock()
+    policy = ResiliencePolicy('test', retries=0, failure_threshold=3, reset_timeout=10.0, clock=clock)
+    failing = Flaky([ApiException(503)] * 10)
+    for _ in range(3):
+        try:
+            policy.call(failing)
+        except ApiException:
+            pass
+    assert policy.breaker.state == 'open'
+
+    # 開啟期間直接失敗，不呼叫服務
+    calls = failing.calls
+    try:
+        policy.call(failing)
+        assert False, "斷路器開啟時應該直接失敗"
+    except CircuitOpenError:
+        pass
+    assert failing.calls == calls
+
+    # 時間到放行一次試探：失敗就再開啟，成功才恢復
+    clock.now += 10
+    try:
+        policy.call(failing)
+    except ApiException:
+        pass
+    assert policy.breaker.state == 'open'
+    clock.now += 10
+    assert policy.call(Flaky([])) == "ok"
+    assert policy.breaker.state == 'closed'
+    assert policy.stats()['rejected'] == 1
+    policy.close()
+
+
+def test_hedges_after_p95_latency():
+    policy = ResiliencePolicy('test', timeout=2.0, hedge=True, hedge_min_samples=10, hedge_budget=0.5)
+    for _ in range(10):
+        assert policy.call(Flaky([], delays=[0.02])) == "ok"
+    assert 0.015 < policy.hedge_delay() < 0.1
+
+    # 第一個請求卡住，p95 之後送出的對沖請求先回來
+    call = Flaky([], delays=[1.0, 0.02])
+    started = time.monotonic()
+    assert policy.call(call) == "ok"
+    assert time.monotonic() - started < 0.3
+    assert call.calls == 2
+    stats = policy.stats()
+    assert stats['hedges'] == 1 and stats['hedge_wins'] == 1
+    policy.close()
+
+
+def _clients(server, **policy_kwargs):
+    assistant = WatsonAssistant('key', server.url, 'tjbot', version='2023-04-15',
+                                policy=ResiliencePolicy('assistant', **policy_kwargs))
+    assistant.assistant.authenticator = NoAuthAuthenticator()
+    tts = TextToSpeech('key', server.url, output='none', policy=ResiliencePolicy('tts', **policy_kwargs))
+    tts.text_to_speech.authenticator = NoAuthAuthenticator()
+    stt = SpeechToText('key', server.url, policy=ResiliencePolicy('stt', **policy_kwargs))
+    stt.speech_to_text.authenticator = NoAuthAuthenticator()
+    return assistant, tts, stt
+
+
+def test_clients_survive_injected_errors_and_stalls():
+    with FakeWatsonServer(transcript="wave to me") as server:
+        assistant, tts, stt = _clients(server, timeout=0.5, deadline=3.0, backoff=0.05)
+
+        server.httpd.errors['assistant'] = [503, 502]
+        result = assistant.send_message("hello")
+        assert result['output']['generic'][0]['text'] == "reply 1: hello"
+        assert server.httpd.attempts['assistant'] == 3
+
+        # 第一次合成卡住超過單次逾時，重試後成功
+        server.httpd.stalls['tts'] = [2.0]
+        started = time.monotonic()
+        assert tts.synthesize_audio("hi there") == server.httpd.synthesized_audio
+        assert time.monotonic() - started < 1.5
+        assert tts.policy.stats()['timeouts'] == 1
+
+        server.httpd.errors['stt'] = [500]
+        recording = (concat(silence(0.2), speech(0.5), silence(0.2)) * 32767).astype('int16')
+        assert stt._recognize_recording(recording) == "wave to me"
+        assert stt.policy.stats()['retries'] == 1
+        tts.close()
+
+
+def test_clients_fail_fast_when_service_is_down():
+    with FakeWatsonServer() as server:
+        assistant, _, _ = _clients(server, timeout=0.3, deadline=0.8, backoff=0.01, failure_threshold=3)
+
+        # 服務一直卡住：一次對話最多等 deadline，不會拖住整個回合
+        server.httpd.stalls['assistant'] = [5.0] * 3
+        started = time.monotonic()
+        assert assistant.send_message("hello") is None
+        assert time.monotonic() - started < 1.0
+
+        # 連續 5xx 之後斷路器開啟，下一次不送出請求
+        server.httpd.errors['assistant'] = [503] * 10
+        assert assistant.send_message("hello") is None
+        attempts = server.httpd.attempts['assistant']
+        started = time.monotonic()
+        assert assistant.send_message("hello") is None
+        assert time.monotonic() - started < 0.05
+        assert server.httpd.attempts['assistant'] == attempts
+        assert assistant.policy.stats()['breaker'] == 'open'
+
+
+if __name__ == "__main__":
+    test_retries_transient_errors_with_jittered_backoff()
+    test_deadline_bounds_slow_calls()
+    test_circuit_breaker_opens_and_recovers()
+    test_hedges_after_p95_latency()
+    test_clients_survive_injected_errors_and_stalls()
+    test_clients_fail_fast_when_service_is_down()
+    print("All resilience tests passed.")
@@ -0,0 +1,114 @@
+import os
+from ibm_cloud_sdk_core.authenticators import NoAuthAuthenticator
+
+from src.response_cache import ResponseCache, context_dependent_nodes, normalize_text
+from src.watson_assistant import WatsonAssistant
+from tests.fake_watson_server import FakeWatsonServer
+
+SKILL_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'materials', 'TJBot Skill Sample.json')
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _assistant(server, cache):
+    assistant = WatsonAssistant('test-apikey', server.url, 'test-assistant', version='2023-04-15', cache=cache)
+    assistant.assistant.authenticator = NoAuthAuthenticator()
+    return assistant
+
+
+def _reply(response):
+    return response['output']['generic'][0]['text']
+
+
+def test_normalize_text():
+    assert normalize_text("  Wave!  ") == "wave"
+    assert normalize_text("What   can you DO?") == "what can you do"
+
+
+def test_repeated_input_served_from_cache():
+    with FakeWatsonServer() as server:
+        cache = ResponseCache()
+        assistant = _assistant(server, cache)
+
+        first = assistant.send_message("wave")
+        second = assistant.send_message("Wave!")
+        assert _reply(first) == _reply(second) == "reply 1: wave"
+        assert len(server.message_requests) == 1
+        assert server.message_requests[0]['input']['options'] == {'debug': True}
+        assert cache.stats()['hits'] == 1
+
+        # 快取回傳的是複本，呼叫端修改不會影響快取
+        second['output']['generic'].clear()
+        assert _reply(assistant.send_message("wave")) == "reply 1: wave"
+
+
+def test_cache_hit_updates_context():
+    with FakeWatsonServer() as server:
+        assistant = _assistant(server, ResponseCache())
+
+        first = assistant.send_message("wave")
+        assistant.send_message("hello")
+        assert assistant.context['skills']['main skill']['system']['state'] == "state-2"
+
+        # 命中快取時，上下文和呼叫服務時一樣換成這則回覆的上下文
+        cached = assistant.send_message("wave")
+        assert len(server.message_requests) == 2
+        assert assistant.context == first['context'] == cached['context']
+
+
+def test_ttl_and_lru_eviction():
+    clock = FakeClock()
+    cache = ResponseCache(ttl=10, max_items=2, clock=clock)
+    response = {'output': {}, 'context': None}
+    for text in ["hello", "wave", "what can you do"]:
+        cache.put(text, None, response)
+    assert cache.get("hello", None) is None  # 最舊的被淘汰
+    assert cache.get("wave", None) is not None
+
+    clock.now = 11
+    assert cache.get("wave", None) is None
+    stats = cache.stats()
+    assert stats['evictions'] == 1 and stats['expirations'] == 1 and stats['items'] == 1
+
+
+def test_context_dependent_turns_bypass_cache():
+    with FakeWatsonServer() as server:
+        server.dialog_nodes.update({'my name is tj': 'node_set_name', 'what is my name': 'node_get_name'})
+        server.set_context['node_set_name'] = {'name': 'tj'}
+        cache = ResponseCache(bypass_nodes={'node_get_name'})
+        assistant = _assistant(server, cache)
+
+        # 改變 context 變數的回合不快取
+        assistant.send_message("my name is tj")
+        assistant.send_message("my name is tj")
+        # 列在略過名單的節點不快取
+        assistant.send_message("what is my name")
+        assistant.send_message("what is my name")
+        assert len(server.message_requests) == 4
+        assert cache.stats()['bypasses'] == 3  # 第二次名字已在 context 中，沒有再改變
+
+        # context 變數不同就是不同的快取鍵
+        assistant.send_message("hello")
+        assistant.context = None
+        assistant.send_message("hello")
+        assert len(server.message_requests) == 6
+
+
+def test_sample_skill_has_no_context_dependent_nodes():
+    assert context_dependent_nodes(SKILL_PATH) == set()
+
+
+if __name__ == "__main__":
+    test_normalize_text()
+    test_repeated_input_served_from_cache()
+    test_cache_hit_updates_context()
+    test_ttl_and_lru_eviction()
+    test_context_dependent_turns_bypass_cache()
+    test_sample_skill_has_no_context_dependent_nodes()
+    print("All response cache tests passed.")
@@ -0,0 +1,89 @@
+import threading
+import numpy as np
+
+from src.audio_input import ReplayInput
+from src.ring_buffer import RingBuffer
+from src.speech_to_text import SpeechToText
+from tests.audio_fixtures import SAMPLE_RATE, concat, silence, speech
+
+
+def _block(start, frames):
+    return np.arange(start, start + frames, dtype=np.int16).reshape(-1, 1)
+
+
+def test_wraparound_returns_views_without_copying():
+    ring = RingBuffer(8)
+    assert ring.write(_block(0, 6)) == 6
+    ring.advance(5)
+    assert ring.write(_block(6, 5)) == 5
+
+    views = ring.peek()
+    # 跨過尾端分成兩段，都是緩衝區本身的檢視
+    assert len(views) == 2
+    assert all(np.shares_memory(view, ring.data) for view in views)
+    assert np.concatenate(views).reshape(-1).tolist() == [5, 6, 7, 8, 9, 10]
+
+    ring.advance(4)
+    assert ring.read().reshape(-1).tolist() == [9, 10]
+    assert ring.available() == 0 and ring.peek() == ()
+
+
+def test_overrun_drops_new_audio_and_counts_xrun():
+    ring = RingBuffer(8)
+    ring.write(_block(0, 6))
+    assert ring.write(_block(6, 4)) == 2
+    assert ring.overruns == 1 and ring.dropped_frames == 2
+    # 還沒讀取的資料不會被覆蓋
+    assert ring.read().reshape(-1).tolist() == list(range(8))
+    assert ring.write(_block(0, 0)) == 0 and ring.overruns == 1
+
+
+def test_single_producer_single_consumer_keeps_order():
+    ring = RingBuffer(1000, dtype=np.int32)
+    total = 200000
+    received = []
+
+    def produce():
+        position = 0
+        while position < total:
+            frames = min(97, total - position)
+            position += ring.write(np.arange(position, position + frames, dtype=np.int32).reshape(-1, 1))
+
+    producer = threading.Thread(target=produce)
+    producer.start()
+    while len(received) < total:
+        views = ring.peek(300)
+        frames = 0
+        for view in views:
+            received.extend(view.reshape(-1).tolist())
+            frames += len(view)
+        ring.advance(frames)
+    producer.join()
+
+    assert received == list(range(total))
+
+
+def test_stalled_consumer_counts_xruns_in_speech_to_text():
+    replay = ReplayInput(concat(speech(1.0), silence(0.2)), SAMPLE_RATE, speed=0)
+    stt = SpeechToText('key', 'http://127.0.0.1:9', vad=False, audio_input=replay)
+    stt.find_microphone()
+    stt.ring_seconds = 0.1
+
+    # 消費端暫停時，回調只會把放不下的音訊丟掉並計數
+    stt._process_pending = lambda: 0
+    stt.is_recording = True
+    with stt._open_input(dtype='int16'):
+        while replay.audio_end_at is None:
+            threading.Event().wait(0.01)
+    stt.is_recording = False
+
+    assert stt.xruns > 0
+    assert stt.ring.available() == stt.ring.capacity
+
+
+if __name__ == "__main__":
+    test_wraparound_returns_views_without_copying()
+    test_overrun_drops_new_audio_and_counts_xrun()
+    test_single_producer_single_consumer_keeps_order()
+    test_stalled_consumer_counts_xruns_in_speech_to_text()
+    print("All ring buffer tests passed.")
@@ -0,0 +1,98 @@
+import threading
+import time
+from ibm_watson import TextToSpeechV1
+
+from src.service_factory import ServiceFactory
+from src.text_to_speech import TextToSpeech
+from src.watson_assistant import WatsonAssistant
+from tests.fake_watson_server import FakeWatsonServer
+from tests.text_to_speech_test import RecordingOutput
+
+
+def _factory(server, **kwargs):
+    return ServiceFactory(iam_url=server.url, **kwargs)
+
+
+def test_clients_share_token_and_session():
+    with FakeWatsonServer() as server:
+        factory = _factory(server)
+        assistant = WatsonAssistant('shared-key', server.url, 'tjbot', version='2023-04-15', factory=factory)
+        tts = TextToSpeech('shared-key', server.url, output=RecordingOutput(), factory=factory)
+        other = factory.create(TextToSpeechV1, 'other-key', server.url)
+
+        assert assistant.authenticator is tts.authenticator
+        assert assistant.assistant.http_client is tts.text_to_speech.http_client is factory.session
+
+        assistant.send_message("hello")
+        tts.synthesize_audio("Hello there!")
+        assistant.send_message("wave")
+        other.synthesize("hi", accept='audio/wav')
+        factory.close()
+        tts.close()
+
+        # 相同 API key 只取一次 token
+        assert server.token_requests == ['shared-key', 'other-key']
+        assert factory.token_fetches() == 2
+        assert all(auth.startswith('Bearer ') for auth in server.authorizations)
+
+
+def test_concurrent_first_calls_fetch_token_once():
+    with FakeWatsonServer() as server:
+        factory = _factory(server)
+        assistants = [WatsonAssistant('key', server.url, 'tjbot', version='2023-04-15', factory=factory)
+                      for _ in range(4)]
+        threads = [threading.Thread(target=a.send_message, args=("hello",)) for a in assistants]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        factory.close()
+
+        assert len(server.message_requests) == 4
+        assert server.token_requests == ['key']
+
+
+def test_keep_alive_reuses_connection_and_records_setup():
+    with FakeWatsonServer() as server:
+        factory = _factory(server)
+        assistant = WatsonAssistant('key', server.url, 'tjbot', version='2023-04-15', factory=factory)
+        for text in ["hello", "wave", "what can you do"]:
+            assistant.send_message(text)
+        factory.close()
+
+        stats = factory.stats.summary()
+        # 一次 token 請求 + 三次 message，全部走同一條連線
+        assert stats['calls'] == 4
+        assert stats['new_connections'] == 1
+        assert stats['reused_connections'] == 3
+        setups = [setup for _, _, _, setup in factory.stats.recent]
+        assert setups[0] > 0 and setups[1:] == [0.0, 0.0, 0.0]
+
+
+def test_background_refresh_before_expiry():
+    with FakeWatsonServer() as server:
+        server.httpd.token_ttl = 14  # SDK 在到期前 10 秒就會同步更新，背景再提前 2 秒
+        factory = _factory(server, refresh_ahead=2, poll_interval=0.2)
+        assistant = WatsonAssistant('key', server.url, 'tjbot', version='2023-04-15', factory=factory)
+        assistant.send_message("hello")
+        assert len(server.token_requests) == 1
+
+        deadline = time.monotonic() + 4
+        while len(server.token_requests) < 2 and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert len(server.token_requests) >= 2
+
+        # 前景呼叫使用背景更新後的 token，不必再同步取 token
+        fetched = len(server.token_requests)
+        assistant.send_message("wave")
+        factory.close()
+        assert len(server.token_requests) == fetched
+        assert server.authorizations[-1] != server.authorizations[0]
+
+
+if __name__ == "__main__":
+    test_clients_share_token_and_session()
+    test_concurrent_first_calls_fetch_token_once()
+    test_keep_alive_reuses_connection_and_records_setup()
+    test_background_refresh_before_expiry()
+    print("All service factory tests passed.")
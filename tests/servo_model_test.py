@@ -0,0 +1,75 @@
+from src.servo_model import ServoModel
+from tests.hardware_backend_test import _simulated_hardware
+
+
+def _timeline(backend, start=0):
+    return [(round(t - backend.servo_log[start][0], 6), duty) for t, duty in backend.servo_log[start:]]
+
+
+def test_move_time_is_proportional_to_distance():
+    servo = ServoModel(speed=600.0)
+    assert servo.move_time(2.5, 12.5) == 0.3  # 180 度
+    assert servo.move_time(7.5, 12.5) == 0.16  # 90 度，進位到 tick
+    assert servo.move_time(12.5, 12.5) == 0.0
+    assert servo.move_time(None, 7.5) == servo.move_time(2.5, 7.5)
+    assert servo.move_time(None, 2.5) == 0.3
+
+    slow = ServoModel(speed=100.0)
+    assert slow.move_time(2.5, 12.5) == 1.8
+
+
+def test_authored_timing_is_an_upper_bound():
+    servo = ServoModel(speed=600.0)
+    servo.position, servo.active = 2.5, True
+    # 90 度 0.16 秒比定義的 0.5 秒快；180 度要 0.3 秒，定義只給 0.2 秒
+    assert servo.plan([(0.0, 7.5), (0.5, 12.5), (0.7, 0)]) == [(0.0, 7.5), (0.16, 12.5), (0.36, 0)]
+    # 放開前的穩定時間也在定義的時間內
+    servo.position = 2.5
+    assert servo.plan([(0.0, 7.5), (0.2, 0)]) == [(0.0, 7.5), (0.2, 0)]
+    # 最後一步沒有上限，照模型的時間
+    assert servo.plan([(0.0, 12.5)]) == [(0.0, 12.5)]
+    assert ServoModel(speed=100.0).plan([(0.0, 12.5), (1.0, 0)]) == [(0.0, 12.5), (1.0, 0)]
+
+
+def test_arm_moves_skip_when_already_in_position():
+    hardware, backend = _simulated_hardware()
+    hardware.lower_arm().result(timeout=5)
+    assert _timeline(backend) == [(0.0, 2.5), (0.4, 0.0)]
+
+    # 已經放下：不輸出、不等待
+    count = len(backend.servo_log)
+    assert hardware.lower_arm().result(timeout=5) == 'lower_arm'
+    assert len(backend.servo_log) == count
+    assert hardware.servo.skipped == 1
+
+    # 舉手從已知的位置出發：180 度 0.3 秒，比原本固定的 1 秒短
+    hardware.raise_arm().result(timeout=5)
+    assert _timeline(backend, count) == [(0.0, 12.5), (0.4, 0.0)]
+    hardware.cleanup()
+
+
+def test_smooth_moves_follow_s_curve():
+    hardware, backend = _simulated_hardware()
+    hardware.servo.smooth = True
+    hardware.raise_arm().result(timeout=5)
+    count = len(backend.servo_log)
+    hardware.lower_arm().result(timeout=5)
+    hardware.cleanup()
+
+    steps = _timeline(backend, count)
+    duties = [duty for _, duty in steps[:-1]]
+    assert len(duties) == 15  # 0.3 秒，每個 tick 一步
+    assert duties[-1] == 2.5 and steps[-1][1] == 0.0
+    assert round(steps[-1][0] - steps[-2][0], 6) == 0.1  # 到位後穩定 0.1 秒才放開
+    moves = [a - b for a, b in zip([12.5] + duties, duties)]
+    assert all(m > 0 for m in moves)
+    # 加減速：中間的步伐最大，頭尾最小
+    assert moves[7] > moves[0] * 5 and moves[7] > moves[-1] * 5
+
+
+if __name__ == "__main__":
+    test_move_time_is_proportional_to_distance()
+    test_authored_timing_is_an_upper_bound()
+    test_arm_moves_skip_when_already_in_position()
+    test_smooth_moves_follow_s_curve()
+    print("All servo model tests passed.")
@@ -0,0 +1,79 @@
+import queue
+import threading
+import time
+from ibm_watson import SpeechToTextV1
+from ibm_cloud_sdk_core.authenticators import NoAuthAuthenticator
+
+from src.streaming_recognizer import StreamingRecognizer
+from tests.fake_watson_server import FakeWatsonServer
+
+
+def _make_client(server):
+    client = SpeechToTextV1(authenticator=NoAuthAuthenticator())
+    client.set_service_url(server.ws_url)
+    return client
+
+
+def _feed_audio(audio_queue, chunks, chunk_bytes=2048, interval=0.005):
+    """模擬麥克風回調，把 int16 音訊區塊陸續放入 queue"""
+    for _ in range(chunks):
+        audio_queue.put(b'\x00\x01' * (chunk_bytes // 2))
+        time.sleep(interval)
+
+
+def test_streaming_returns_interim_and_final():
+    with FakeWatsonServer(transcript="raise your arm", final_after_bytes=16384) as server:
+        interim = []
+        recognizer = StreamingRecognizer(_make_client(server), on_interim=interim.append)
+        audio_queue = queue.Queue()
+        recognizer.start(audio_queue, 16000)
+
+        feeder = threading.Thread(target=_feed_audio, args=(audio_queue, 40))
+        feeder.start()
+
+        transcript = recognizer.wait_for_final(timeout=5)
+        recognizer.close()
+        feeder.join()
+
+        assert transcript == "raise your arm"
+        assert interim and interim[0] == "raise"
+        assert server.start_messages[0]['content_type'] == 'audio/l16; rate=16000; channels=1'
+        assert server.start_messages[0]['interim_results'] is True
+
+
+def test_final_arrives_before_audio_stops():
+    with FakeWatsonServer(transcript="wave", final_after_bytes=8192) as server:
+        recognizer = StreamingRecognizer(_make_client(server))
+        audio_queue = queue.Queue()
+        recognizer.start(audio_queue, 44100)
+
+        started = time.monotonic()
+        feeder = threading.Thread(target=_feed_audio, args=(audio_queue, 200, 2048, 0.01))
+        feeder.start()
+
+        # 最終結果應該在 2 秒的音訊送完之前就回來
+        transcript = recognizer.wait_for_final(timeout=5)
+        elapsed = time.monotonic() - started
+        recognizer.close()
+        feeder.join()
+
+        assert transcript == "wave"
+        assert elapsed < 1.0
+
+
+def test_stop_flushes_final_result():
+    with FakeWatsonServer(transcript="hello there", final_after_bytes=10 ** 9) as server:
+        recognizer = StreamingRecognizer(_make_client(server))
+        audio_queue = queue.Queue()
+        recognizer.start(audio_queue, 16000)
+        _feed_audio(audio_queue, 5)
+
+        recognizer.close(timeout=5)
+        assert recognizer.transcript == "hello there"
+
+
+if __name__ == "__main__":
+    test_streaming_returns_interim_and_final()
+    test_final_arrives_before_audio_stops()
+    test_stop_flushes_final_result()
+    print("All streaming recognizer tests passed.")
@@ -0,0 +1,126 @@
+import json
+import os
+import subprocess
+import tempfile
+import threading
+import time
+import numpy as np
+
+from src import audio_output, text_to_speech
+from src.audio_utils import encode_wav
+from src.text_to_speech import TextToSpeech, split_sentences
+
+
+class RecordingOutput:
+    """取代音訊輸出，記錄寫入的 PCM 與時間"""
+
+    def __init__(self):
+        self.writes = []
+        self.closed = False
+
+    def play(self, pcm, sample_rate, channels=1):
+        self.writes.append((time.monotonic(), pcm.tobytes()))
+
+    def finish(self):
+        self.closed = True
+
+    def close(self):
+        pass
+
+
+def _make_tts(delays):
+    player = RecordingOutput()
+    tts = TextToSpeech('fake-apikey', 'http://127.0.0.1:9', output=player)
+    lock = threading.Lock()
+    synthesized = []
+
+    # encode_wav 第一次呼叫才載入 scipy；先載入，免得算進第一句的合成時間
+    encode_wav(np.zeros(1, dtype=np.int16), 22050)
+
+    def fake_synthesize(text):
+        time.sleep(delays.get(text, 0.2))
+        with lock:
+            synthesized.append(text)
+        # 每句以不同的樣本值區分播放順序
+        marker = len(text)
+        return encode_wav(np.full(100, marker, dtype=np.int16), 22050)
+
+    tts._synthesize = fake_synthesize
+    return tts, player
+
+
+def test_split_sentences_merges_short_fragments():
+    assert split_sentences("Hi! I'm TJ Bot, a robot. Nice to meet you, friend. Bye.") == [
+        "Hi! I'm TJ Bot, a robot.", "Nice to meet you, friend. Bye."
+    ]
+    assert split_sentences("Okay") == ["Okay"]
+    assert split_sentences("   ") == []
+
+
+def test_playback_starts_before_all_chunks_are_synthesized():
+    text = ("This is the first sentence. This one is the second. "
+            "Here comes the third one! And finally the last sentence?")
+    sentences = split_sentences(text)
+    delays = {sentences[0]: 0.05}
+    tts, player = _make_tts(delays)
+
+    started = time.monotonic()
+    tts.speak(text)
+    total = time.monotonic() - started
+
+    assert len(player.writes) == 4
+    assert player.closed
+    assert tts.last_time_to_first_audio < 0.15
+    # 三個工作執行緒平行合成，比逐句合成 (0.65 秒) 快
+    assert total < 0.5
+
+    # 依原本的句子順序播放
+    markers = [np.frombuffer(data, dtype=np.int16)[0] for _, data in player.writes]
+    assert markers == [len(s) for s in sentences]
+
+
+def test_speak_many_pipelines_multiple_responses():
+    tts, player = _make_tts({})
+    tts.speak_many(["Okay", "Hello, I am a TJ Bot!"])
+    assert len(player.writes) == 2
+
+
+def test_stale_cached_aplay_device_is_redetected():
+    # USB 音效卡重新插拔後從 card 2 變成 card 3，快取裡還是舊的編號
+    aplay_list = ("card 0: Headphones [bcm2835 Headphones], device 0: bcm2835 Headphones [bcm2835 Headphones]\n"
+                  "card 3: Device [USB Audio Device], device 0: USB Audio [USB Audio]\n")
+    tested = []
+
+    def fake_run(args, **kwargs):
+        assert args == ['aplay', '-l']
+        return subprocess.CompletedProcess(args, 0, stdout=aplay_list)
+
+    original_cache, original_run = audio_output.AUDIO_DEVICE_CACHE, text_to_speech.subprocess.run
+    with tempfile.TemporaryDirectory() as tmp:
+        audio_output.AUDIO_DEVICE_CACHE = os.path.join(tmp, 'audio_device.json')
+        text_to_speech.subprocess.run = fake_run
+        try:
+            audio_output.save_cached_device('aplay_device', 'plughw:2,0')
+            tts = TextToSpeech('fake-apikey', 'http://127.0.0.1:9', output=RecordingOutput())
+            tts._test_audio_device = lambda device: tested.append(device) or device == 'plughw:3,0'
+
+            assert tts._detect_audio_device() == 'plughw:3,0'
+            assert tested == ['plughw:2,0', 'plughw:0,0', 'plughw:3,0']
+            with open(audio_output.AUDIO_DEVICE_CACHE, encoding='utf-8') as f:
+                assert json.load(f) == {'aplay_device': 'plughw:3,0'}
+
+            # 快取的設備還能用時不必重新掃描
+            tested.clear()
+            assert tts._detect_audio_device() == 'plughw:3,0'
+            assert tested == ['plughw:3,0']
+        finally:
+            audio_output.AUDIO_DEVICE_CACHE = original_cache
+            text_to_speech.subprocess.run = original_run
+
+
+if __name__ == "__main__":
+    test_split_sentences_merges_short_fragments()
+    test_playback_starts_before_all_chunks_are_synthesized()
+    test_speak_many_pipelines_multiple_responses()
+    test_stale_cached_aplay_device_is_redetected()
+    print("All text to speech tests passed.")
@@ -0,0 +1,70 @@
+import os
+import subprocess
+import sys
+import tempfile
+
+from src.tjbot_runtime import TJBotRuntime, format_startup_times
+from tests.fake_watson_server import FakeWatsonServer
+
+COMPONENTS = ('service_factory', 'watson_sdk', 'assistant', 'tts', 'stt', 'hardware', 'intent_classifier', 'pipeline')
+
+
+def _fake_env(server, cache_dir):
+    env = {'ASSISTANT_ID': 'tjbot', 'IAM_URL': server.url, 'HARDWARE_BACKEND': 'simulated',
+           'TTS_OUTPUT': 'none', 'TTS_PREWARM': 'false', 'TTS_CACHE_DIR': cache_dir}
+    for service in ('ASSISTANT', 'TTS', 'STT'):
+        env[f'{service}_APIKEY'] = 'key'
+        env[f'{service}_URL'] = server.url
+    return env
+
+
+def _with_env(env, func):
+    saved = {key: os.environ.get(key) for key in env}
+    os.environ.update(env)
+    try:
+        return func()
+    finally:
+        for key, value in saved.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+
+def test_parallel_and_sequential_startup_report_every_component():
+    with FakeWatsonServer() as server, tempfile.TemporaryDirectory() as cache_dir:
+        env = _fake_env(server, cache_dir)
+        for parallel in (True, False):
+            runtime = _with_env(env, lambda: TJBotRuntime.from_env(parallel=parallel))
+            times = runtime.startup_times
+            assert all(name in times for name in COMPONENTS)
+            assert times['total'] >= max(times[name] for name in COMPONENTS) * 0.99
+            assert runtime.status()['startup'] == times
+            assert runtime.status()['hardware'] == 'simulated'
+
+            result = runtime.message("hello")
+            assert result['replies'][0].endswith("hello")
+            runtime.close()
+
+
+def test_format_startup_times_sorts_by_cost():
+    text = format_startup_times({'tts': 0.2, 'hardware': 1.5, 'assistant': 0.05, 'total': 1.6})
+    lines = text.splitlines()
+    assert "1.60" in lines[0]
+    assert [line.split()[0] for line in lines[1:]] == ['hardware', 'tts', 'assistant']
+
+
+def test_importing_runtime_defers_heavy_modules():
+    code = ("import sys, src.tjbot_runtime, src.tjbot_service; "
+            "print(','.join(m for m in ('scipy', 'ibm_watson', 'sounddevice', 'streamlit') if m in sys.modules))")
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True,
+                            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == ""
+
+
+if __name__ == "__main__":
+    test_parallel_and_sequential_startup_report_every_component()
+    test_format_startup_times_sorts_by_cost()
+    test_importing_runtime_defers_heavy_modules()
+    print("All TJBot runtime tests passed.")
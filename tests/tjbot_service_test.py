@@ -0,0 +1,141 @@
+import time
+from ibm_cloud_sdk_core.authenticators import NoAuthAuthenticator
+
+from src.audio_output import NullOutput
+from src.hardware_backend import SimulatedBackend
+from src.hardware_control import HardwareControl
+from src.text_to_speech import TextToSpeech
+from src.tjbot_runtime import TJBotRuntime
+from src.tjbot_service import TJBotClient, TJBotServer
+from src.watson_assistant import WatsonAssistant
+from tests.fake_watson_server import FakeWatsonServer
+
+
+def _runtime(server):
+    assistant = WatsonAssistant('key', server.url, 'tjbot', version='2023-04-15')
+    assistant.assistant.authenticator = NoAuthAuthenticator()
+    tts = TextToSpeech('key', server.url, output=NullOutput())
+    tts.text_to_speech.authenticator = NoAuthAuthenticator()
+    backend = SimulatedBackend()
+    return TJBotRuntime(assistant, tts=tts, hardware=HardwareControl(backend=backend)), backend
+
+
+def test_message_round_trip_through_service():
+    with FakeWatsonServer() as watson:
+        watson.intents['wave to me'] = 'wave'
+        runtime, backend = _runtime(watson)
+        service = TJBotServer(runtime, port=0).start()
+        client = TJBotClient(service.url)
+
+        result = client.message("wave to me")
+        assert result['replies'] == ["reply 1: wave to me"]
+        assert result['intent'] == 'wave'
+
+        # 揮手由服務行程裡的硬體執行
+        deadline = time.monotonic() + 3
+        while not backend.servo_log and time.monotonic() < deadline:
+            time.sleep(0.02)
+        assert backend.servo_log
+
+        client.close()
+        service.stop()
+        runtime.close()
+        assert backend.closed
+
+
+def test_gesture_shine_and_status():
+    with FakeWatsonServer() as watson:
+        runtime, backend = _runtime(watson)
+        service = TJBotServer(runtime, port=0).start()
+        client = TJBotClient(service.url)
+
+        status = client.status()
+        assert status['hardware'] == 'simulated' and not status['stt']
+        assert client.shine('red')
+        deadline = time.monotonic() + 2
+        while backend.pixels[0] == (0, 0, 0) and time.monotonic() < deadline:
+            time.sleep(0.02)
+        assert backend.pixels[0] != (0, 0, 0)
+
+        assert client.gesture('raise_arm')
+        try:
+            client.gesture('backflip')
+        except RuntimeError as e:
+            assert 'backflip' in str(e)
+        else:
+            raise AssertionError("未知的動作應該回傳錯誤")
+
+        # 沒有錄音裝置時 listen 回傳空字串，也無法開啟常駐聆聽
+        assert client.listen() == ""
+        assert client.set_wake_word(True) is False
+        assert client.status()['wake_word'] is False
+
+        client.close()
+        service.stop()
+        runtime.close()
+
+
+def test_voice_turns_reported_in_status():
+    with FakeWatsonServer() as watson:
+        runtime, backend = _runtime(watson)
+        service = TJBotServer(runtime, port=0).start()
+        client = TJBotClient(service.url)
+
+        # 喚醒詞聆聽送進管線的語音回合；文字訊息由介面自己記錄，不重複回報
+        client.message("hello")
+        runtime.pipeline.submit("wave to me", source='voice').result(5)
+        deadline = time.monotonic() + 3
+        while not client.status()['voice_turns'] and time.monotonic() < deadline:
+            time.sleep(0.02)
+        turns = client.status()['voice_turns']
+        assert [(t['text'], t['replies']) for t in turns] == [("wave to me", ["reply 2: wave to me"])]
+
+        client.close()
+        service.stop()
+        runtime.close()
+
+
+def test_client_rejects_empty_message():
+    with FakeWatsonServer() as watson:
+        runtime, backend = _runtime(watson)
+        service = TJBotServer(runtime, port=0).start()
+        client = TJBotClient(service.url)
+        try:
+            client.message("   ")
+        except RuntimeError:
+            pass
+        else:
+            raise AssertionError("空白訊息應該回傳錯誤")
+        assert watson.message_requests == []
+
+        client.close()
+        service.stop()
+        runtime.close()
+
+
+def test_trace_endpoints():
+    with FakeWatsonServer() as watson:
+        runtime, backend = _runtime(watson)
+        service = TJBotServer(runtime, port=0).start()
+        client = TJBotClient(service.url)
+
+        assert client.set_tracing(True, clear=True)
+        client.message("hello")
+        stats = client.trace_stats()
+        assert stats['assistant.request']['count'] == 1
+        assert any(e['name'] == 'turn.reply' for e in client.trace_events()['traceEvents'])
+        assert not client.set_tracing(False, clear=True)
+        assert client.trace_stats() == {}
+
+        client.close()
+        service.stop()
+        runtime.close()
+
+
+if __name__ == "__main__":
+    test_message_round_trip_through_service()
+    test_gesture_shine_and_status()
+    test_voice_turns_reported_in_status()
+    test_client_rejects_empty_message()
+    test_trace_endpoints()
+    print("All TJBot service tests passed.")
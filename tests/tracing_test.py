@@ -0,0 +1,100 @@
+import asyncio
+import json
+import os
+import tempfile
+import time
+from ibm_cloud_sdk_core.authenticators import NoAuthAuthenticator
+
+from src.audio_output import NullOutput
+from src.conversation_pipeline import ConversationPipeline
+from src.hardware_backend import SimulatedBackend
+from src.hardware_control import HardwareControl
+from src.text_to_speech import TextToSpeech
+from src.tracing import Tracer, tracer
+from src.watson_assistant import WatsonAssistant
+from tests.fake_watson_server import FakeWatsonServer
+
+
+def test_disabled_tracer_records_nothing_and_is_cheap():
+    local = Tracer()
+    start = time.perf_counter()
+    for _ in range(100000):
+        with local.span('stage', n=1):
+            pass
+    elapsed = time.perf_counter() - start
+    assert not local.events and local.stats() == {}
+    # 停用時 span() 只檢查一次旗標，平均每次遠低於 5 微秒
+    assert elapsed / 100000 < 5e-6
+
+
+def test_percentiles_and_exports():
+    with tempfile.TemporaryDirectory() as folder:
+        jsonl_path = os.path.join(folder, 'live.jsonl')
+        local = Tracer(enabled=True, jsonl_path=jsonl_path)
+        for i in range(100):
+            local.record('stt.request', 0.0, (i + 1) / 1000)
+        with local.span('tts.synthesize', chars=5) as span:
+            span.set(cached=False)
+        local.instant('tts.playback_start')
+
+        stats = local.stats()
+        assert stats['stt.request']['count'] == 100
+        assert round(stats['stt.request']['p50']) == 51
+        assert round(stats['stt.request']['p95']) == 96
+        assert round(stats['stt.request']['p99']) == 100
+
+        chrome_path = os.path.join(folder, 'trace.json')
+        local.export_chrome(chrome_path)
+        with open(chrome_path) as f:
+            events = json.load(f)['traceEvents']
+        assert len(events) == 102
+        synth = next(e for e in events if e['name'] == 'tts.synthesize')
+        assert synth['ph'] == 'X' and synth['args'] == {'chars': 5, 'cached': False}
+        assert events[-1]['ph'] == 'i'
+
+        local.close()
+        with open(jsonl_path) as f:
+            assert len(f.read().splitlines()) == 102
+
+
+def test_pipeline_turn_spans_share_turn_id():
+    with FakeWatsonServer() as server:
+        server.intents['wave to me'] = 'wave'
+        assistant = WatsonAssistant('key', server.url, 'tjbot', version='2023-04-15')
+        assistant.assistant.authenticator = NoAuthAuthenticator()
+        tts = TextToSpeech('key', server.url, output=NullOutput())
+        tts.text_to_speech.authenticator = NoAuthAuthenticator()
+        hardware = HardwareControl(backend=SimulatedBackend())
+
+        async def scenario():
+            pipeline = ConversationPipeline(assistant, tts=tts, hardware=hardware)
+            await pipeline.start()
+            turn = await pipeline.submit("wave to me")
+            await asyncio.wait_for(turn.done, 5)
+            await pipeline.stop()
+            return turn
+
+        tracer.clear()
+        tracer.configure(enabled=True)
+        try:
+            turn = asyncio.run(scenario())
+        finally:
+            tracer.configure(enabled=False)
+            hardware.cleanup()
+            tts.close()
+
+        events = {e['name']: e for e in tracer.chrome_trace()['traceEvents']}
+        tracer.clear()
+        for name in ('assistant.request', 'tts.synthesize', 'tts.first_audio', 'tts.playback',
+                     'gesture.wave', 'turn.reply', 'turn.total'):
+            assert name in events, name
+            assert events[name]['args'].get('turn') == turn.id, name
+        # 回覆一定在整個回合結束之前
+        assert events['turn.reply']['dur'] <= events['turn.total']['dur']
+
+
+if __name__ == "__main__":
+    test_disabled_tracer_records_nothing_and_is_cheap()
+    test_percentiles_and_exports()
+    test_pipeline_turn_spans_share_turn_id()
+    print("All tracing tests passed.")
@@ -0,0 +1,75 @@
+import os
+import tempfile
+
+from src.tts_cache import TTSCache, load_skill_responses
+
+SKILL_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'materials', 'TJBot Skill Sample.json')
+VOICE = 'en-US_AllisonV3Voice'
+
+
+def test_memory_and_disk_hits():
+    cache_dir = tempfile.mkdtemp()
+    calls = []
+
+    def synthesize():
+        calls.append(1)
+        return b'RIFF-hello'
+
+    cache = TTSCache(cache_dir)
+    assert cache.get_or_synthesize("Hello!", VOICE, 'audio/wav', synthesize) == b'RIFF-hello'
+    assert cache.get_or_synthesize("Hello!", VOICE, 'audio/wav', synthesize) == b'RIFF-hello'
+    assert len(calls) == 1
+    assert cache.stats()['memory_hits'] == 1 and cache.stats()['misses'] == 1
+
+    # 重新啟動後仍可從磁碟讀到
+    restarted = TTSCache(cache_dir)
+    assert restarted.get("Hello!", VOICE, 'audio/wav') == b'RIFF-hello'
+    assert restarted.stats()['disk_hits'] == 1
+
+
+def test_key_includes_voice_and_format():
+    cache = TTSCache(tempfile.mkdtemp())
+    cache.put("Okay", VOICE, 'audio/wav', b'a')
+    assert cache.get("Okay", 'en-US_MichaelV3Voice', 'audio/wav') is None
+    assert cache.get("Okay", VOICE, 'audio/mp3') is None
+    assert cache.get("Okay", VOICE, 'audio/wav') == b'a'
+
+
+def test_memory_tier_is_lru():
+    cache = TTSCache(tempfile.mkdtemp(), max_memory_items=2)
+    cache.put("a", VOICE, 'audio/wav', b'1')
+    cache.put("b", VOICE, 'audio/wav', b'2')
+    cache.get("a", VOICE, 'audio/wav')
+    cache.put("c", VOICE, 'audio/wav', b'3')
+
+    assert list(cache.memory) == [TTSCache.make_key(t, VOICE, 'audio/wav') for t in ("a", "c")]
+
+
+def test_disk_eviction_by_size():
+    cache_dir = tempfile.mkdtemp()
+    cache = TTSCache(cache_dir, max_disk_bytes=250)
+    for i in range(5):
+        path = cache._path(cache.make_key(str(i), VOICE, 'audio/wav'))
+        cache.put(str(i), VOICE, 'audio/wav', bytes(100))
+        # 讓每個檔案的使用時間明確先後排序
+        os.utime(path, (1000 + i, 1000 + i))
+
+    assert cache.disk_bytes <= 250
+    assert cache.evictions == 3
+    assert cache.get("4", VOICE, 'audio/wav') is not None
+
+
+def test_skill_responses_for_prewarm():
+    texts = load_skill_responses(SKILL_PATH)
+    assert "Hello there!" in texts
+    assert "Okay" in texts
+    assert len(texts) == len(set(texts))
+
+
+if __name__ == "__main__":
+    test_memory_and_disk_hits()
+    test_key_includes_voice_and_format()
+    test_memory_tier_is_lru()
+    test_disk_eviction_by_size()
+    test_skill_responses_for_prewarm()
+    print("All TTS cache tests passed.")
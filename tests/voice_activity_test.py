@@ -0,0 +1,92 @@
+import os
+import tempfile
+import numpy as np
+
+from src.voice_activity import Endpointer
+from tests.audio_fixtures import SAMPLE_RATE, concat, read_blocks, silence, speech, write_wav
+
+
+def _run(path, **kwargs):
+    """把 WAV 依 1024 幀區塊送進端點偵測，回傳保留的樣本數與結束時讀到的樣本位置"""
+    rate, blocks = read_blocks(path)
+    endpointer = Endpointer(rate, **kwargs)
+    kept = 0
+    consumed = 0
+    first_kept_at = None
+    for block in blocks:
+        out = endpointer.process(block)
+        if out and first_kept_at is None:
+            first_kept_at = consumed - sum(len(b) for b in out[:-1])
+        kept += sum(len(b) for b in out)
+        consumed += len(block)
+        if endpointer.ended:
+            break
+    return endpointer, kept, consumed, first_kept_at
+
+
+def _fixture(name, samples):
+    return write_wav(os.path.join(tempfile.mkdtemp(), name), samples)
+
+
+def test_leading_silence_is_discarded():
+    path = _fixture("lead.wav", concat(silence(2.0), speech(1.0), silence(1.5)))
+    endpointer, kept, consumed, first_kept_at = _run(path, trailing_silence=0.6, pre_roll=0.2)
+
+    assert endpointer.ended
+    # 開頭 2 秒靜音只保留 pre_roll，語句從語音前約 0.2 秒開始
+    assert abs(first_kept_at / SAMPLE_RATE - 1.8) < 0.05
+    # 保留：pre_roll + 語音 + 尾端靜音視窗
+    assert abs(kept / SAMPLE_RATE - (0.2 + 1.0 + 0.6)) < 0.1
+    assert endpointer.discarded_samples > 1.7 * SAMPLE_RATE
+
+
+def test_utterance_closes_after_trailing_silence():
+    path = _fixture("trail.wav", concat(silence(0.5), speech(1.0), silence(3.0)))
+    for trailing in (0.3, 0.8):
+        endpointer, kept, consumed, _ = _run(path, trailing_silence=trailing)
+        assert endpointer.ended
+        assert abs(consumed / SAMPLE_RATE - (1.5 + trailing)) < 0.05
+
+
+def test_short_pause_does_not_split_utterance():
+    samples = concat(silence(0.5), speech(0.8), silence(0.3), speech(0.8, seed=2), silence(2.0))
+    path = _fixture("pause.wav", samples)
+    endpointer, kept, consumed, _ = _run(path, trailing_silence=0.6, pre_roll=0.0)
+
+    assert endpointer.ended
+    assert abs(kept / SAMPLE_RATE - (0.8 + 0.3 + 0.8 + 0.6)) < 0.1
+
+
+def test_silence_never_opens_an_utterance():
+    path = _fixture("quiet.wav", silence(3.0, noise_level=0.01))
+    endpointer, kept, consumed, _ = _run(path)
+    assert not endpointer.started
+    assert kept == 0
+
+
+def test_adapts_to_noisy_background():
+    rng = np.random.default_rng(3)
+    noisy = (rng.standard_normal(int(1.0 * SAMPLE_RATE)) * 0.02).astype(np.float32)
+    path = _fixture("noisy.wav", concat(noisy, speech(1.0) + noisy, noisy, noisy))
+    endpointer, kept, consumed, first_kept_at = _run(path, pre_roll=0.0)
+    assert endpointer.ended
+    assert abs(first_kept_at / SAMPLE_RATE - 1.0) < 0.05
+
+
+def test_energies_are_computed_per_frame():
+    endpointer = Endpointer(SAMPLE_RATE, frame_size=256)
+    block = np.zeros((1024, 1), dtype=np.int16)
+    block[512:768] = 16384
+    energies, counts = endpointer.frame_energies_db(block)
+    assert list(counts) == [256, 256, 256, 256]
+    assert energies[2] > -10 and energies[0] < -100
+
+
+if __name__ == "__main__":
+    test_leading_silence_is_discarded()
+    test_utterance_closes_after_trailing_silence()
+    test_short_pause_does_not_split_utterance()
+    test_silence_never_opens_an_utterance()
+    test_adapts_to_noisy_background()
+    test_energies_are_computed_per_frame()
+    print("All voice activity tests passed.")